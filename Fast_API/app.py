@@ -1,42 +1,211 @@
 # -------------------- Imports --------------------
+# Start-up is timed from the first line (see startup_profile.py and GET /startup)
+
+from startup_profile import StartupProfile
+
+startup_profile = StartupProfile()
+
+with startup_profile.step("fastapi", "import"):
+    from fastapi import FastAPI, Body, HTTPException
+    from fastapi.concurrency import run_in_threadpool
+    from fastapi.responses import JSONResponse
+    from pydantic import BaseModel, Field, computed_field, model_validator, ValidationError
+
+from typing import Literal, Annotated, Any, Dict, List, Optional, Tuple
+from contextlib import asynccontextmanager
+import asyncio
+import os
+import signal
+import sys
+import threading
+import time
+
+# numpy only: pandas and scikit-learn are imported when the model is loaded
+with startup_profile.step("app modules", "import"):
+    from prediction_cache import PredictionCache
+    from features import FEATURE_COLUMNS, build_feature_frame, compute_bmi, get_age_group, get_lifestyle_risk, get_city_tier
+    from micro_batcher import MicroBatcher
+    from model_registry import ModelRegistry
+    from metrics import REGISTRY, install_metrics, observe_stage, stage_timer
+
+
+# -------------------- Model Settings --------------------
+# MODEL_DIR holds versioned models (models/<version>/model.pkl, see model_registry.py).
+# MODEL_PATH is the single-file model used when MODEL_DIR has no versions.
+# USE_FAST_ENCODER=0       → always go through the full pipeline (DataFrame + ColumnTransformer)
+# INFERENCE_ENGINE=sklearn → RandomForestClassifier.predict (default)
+# INFERENCE_ENGINE=flat    → FlatForest, trees flattened into NumPy arrays
+# The flat engine works on encoded features, so it needs the fast encoder.
+# MODEL_MMAP=1 (default)   → serve model.joblib instead of model.pkl when it exists (exported with
+#                            model_artifact.py): its arrays are memory-mapped and shared by all workers.
+# MODEL_WATCH_INTERVAL > 0 → poll MODEL_DIR every N seconds and hot reload on change.
+# SHADOW_MODEL_VERSION     → score live traffic on this version in the background.
+# APP_WARMUP=eager         → load the model while app.py is imported (default)
+# APP_WARMUP=background    → start serving right away; pandas / scikit-learn are imported and the
+#                            model is loaded in a background thread. /predict answers 503 and
+#                            GET /ready reports "loading" until the model is usable.
+
+MODEL_DIR = os.getenv("MODEL_DIR", "models")
+MODEL_PATH = os.getenv("MODEL_PATH", "model.pkl")
+USE_FAST_ENCODER = os.getenv("USE_FAST_ENCODER", "1") != "0"
+INFERENCE_ENGINE = os.getenv("INFERENCE_ENGINE", "sklearn")
+MODEL_MMAP = os.getenv("MODEL_MMAP", "1") != "0"
+MODEL_WATCH_INTERVAL = float(os.getenv("MODEL_WATCH_INTERVAL", "0"))
+SHADOW_MODEL_VERSION = os.getenv("SHADOW_MODEL_VERSION")
+APP_WARMUP = os.getenv("APP_WARMUP", "eager")
+
+
+# -------------------- Prediction Cache --------------------
+# Caches predictions per engineered feature tuple (see prediction_cache.py)
+# PREDICTION_CACHE_SIZE=0 disables the cache.
+
+prediction_cache = PredictionCache(
+    FEATURE_COLUMNS,
+    max_size=int(os.getenv("PREDICTION_CACHE_SIZE", "10000")),
+    ttl_seconds=float(os.getenv("PREDICTION_CACHE_TTL")) if os.getenv("PREDICTION_CACHE_TTL") else None,
+    round_digits=int(os.getenv("PREDICTION_CACHE_ROUND")) if os.getenv("PREDICTION_CACHE_ROUND") else None,
+)
 
-from fastapi import FastAPI
-from fastapi.responses import JSONResponse
-from pydantic import BaseModel, Field, computed_field
-from typing import Literal, Annotated
-import pickle
-import pandas as pd
 
+# -------------------- Load ML Model --------------------
+# Load trained ML model once when server starts (or in the background, see APP_WARMUP).
+# Later versions are swapped in by the registry without restarting the server.
 
-# -------------------- City Tier Data --------------------
-# These lists are used to determine the city tier of the user
+model_registry = ModelRegistry(
+    models_dir=MODEL_DIR,
+    legacy_path=MODEL_PATH,
+    use_fast_encoder=USE_FAST_ENCODER,
+    inference_engine=INFERENCE_ENGINE,
+    use_mmap=MODEL_MMAP,
+)
 
-tier_1_cities = ["Mumbai", "Delhi", "Bangalore", "Chennai", "Kolkata", "Hyderabad", "Pune"]
+# Set once a model is active (by the warm-up, or later by /admin/reload-model)
+model_ready = threading.Event()
 
-tier_2_cities = [
-    "Jaipur", "Chandigarh", "Indore", "Lucknow", "Patna", "Ranchi", "Visakhapatnam",
-    "Coimbatore", "Bhopal", "Nagpur", "Vadodara", "Surat", "Rajkot", "Jodhpur",
-    "Raipur", "Amritsar", "Varanasi", "Agra", "Dehradun", "Mysore", "Jabalpur",
-    "Guwahati", "Thiruvananthapuram", "Ludhiana", "Nashik", "Allahabad", "Udaipur",
-    "Aurangabad", "Hubli", "Belgaum", "Salem", "Vijayawada", "Tiruchirappalli",
-    "Bhavnagar", "Gwalior", "Dhanbad", "Bareilly", "Aligarh", "Gaya", "Kozhikode",
-    "Warangal", "Kolhapur", "Bilaspur", "Jalandhar", "Noida", "Guntur",
-    "Asansol", "Siliguri"
-]
+# Every swap invalidates the prediction cache
+model_registry.on_swap(lambda loaded: prediction_cache.invalidate())
+model_registry.on_swap(lambda loaded: model_ready.set())
 
+# Modules the pickled pipeline needs, imported (and timed) before unpickling it
+WARMUP_IMPORTS = ["pandas", "sklearn.pipeline", "sklearn.ensemble"]
 
-# -------------------- Load ML Model --------------------
-# Load trained ML model once when server starts
-# rb = read binary mode
+_warmup_thread: Optional[threading.Thread] = None
+_warmup_lock = threading.Lock()
+
+
+def warm_up():
+    """Imports the heavy modules and loads the model, recording each step in startup_profile."""
+    try:
+        for module in WARMUP_IMPORTS:
+            startup_profile.import_module(module)
+
+        start_ms = startup_profile.elapsed_ms()
+        loaded = model_registry.activate()
+        for step, ms in loaded.load_timings.items():
+            startup_profile.record(f"model {step}", start_ms, ms)
+            start_ms += ms
+
+        if SHADOW_MODEL_VERSION:
+            with startup_profile.step("shadow model"):
+                model_registry.set_shadow(SHADOW_MODEL_VERSION)
+    except Exception as exc:
+        startup_profile.mark_failed(exc)
+        raise
+
+    startup_profile.mark_ready()
+    print(f"Model {loaded.version} {startup_profile.summary()}", file=sys.stderr, flush=True)
+
+
+def start_warmup():
+    """Starts the background warm-up once (no-op when the model is already loaded or loading)."""
+    global _warmup_thread
+    with _warmup_lock:
+        if model_ready.is_set() or _warmup_thread is not None:
+            return
+        _warmup_thread = threading.Thread(target=warm_up, name="model-warmup", daemon=True)
+        _warmup_thread.start()
+
+
+if APP_WARMUP != "background":
+    warm_up()
+
+
+# -------------------- Batch Settings --------------------
+# Maximum number of rows passed to model.predict in a single call.
+# Large batches are split into chunks of this size to keep memory bounded.
+
+BATCH_CHUNK_SIZE = 1024
+
+
+# -------------------- Micro-Batching --------------------
+# MICRO_BATCHING=1 queues concurrent /predict requests and scores them together.
+# A batch is flushed when it reaches MICRO_BATCH_MAX_SIZE rows
+# or MICRO_BATCH_MAX_WAIT_MS after its first request, whichever comes first.
+
+MICRO_BATCHING = os.getenv("MICRO_BATCHING", "0") == "1"
+
+micro_batcher = None
+
+
+def report_reload(future: "asyncio.Future"):
+    """Done-callback of a SIGHUP reload: nothing awaits it, so a failure is reported here."""
+    if future.cancelled() or future.exception() is None:
+        return
+    exc = future.exception()
+    print(f"SIGHUP model reload failed, the previous model keeps serving: {type(exc).__name__}: {exc}",
+          file=sys.stderr, flush=True)
 
-with open("model.pkl", "rb") as f:
-    model = pickle.load(f)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    global micro_batcher
+
+    # APP_WARMUP=background: load the model while the server already answers
+    start_warmup()
+
+    if MICRO_BATCHING:
+        micro_batcher = MicroBatcher(
+            predict_categories,
+            max_batch_size=int(os.getenv("MICRO_BATCH_MAX_SIZE", "64")),
+            max_wait_ms=float(os.getenv("MICRO_BATCH_MAX_WAIT_MS", "2")),
+            max_queue_size=int(os.getenv("MICRO_BATCH_MAX_QUEUE", "10000")),
+        )
+        await micro_batcher.start()
+
+    if MODEL_WATCH_INTERVAL > 0:
+        model_registry.start_watching(MODEL_WATCH_INTERVAL)
+
+    # SIGHUP → reload the model (in a thread, so the event loop keeps serving)
+    loop = asyncio.get_running_loop()
+    try:
+        loop.add_signal_handler(
+            signal.SIGHUP, lambda: loop.run_in_executor(None, model_registry.reload).add_done_callback(report_reload)
+        )
+    except (NotImplementedError, AttributeError, RuntimeError, ValueError):
+        pass  # signals are not available on this platform / thread
+
+    yield
+
+    model_registry.stop_watching()
+
+    if micro_batcher is not None:
+        await micro_batcher.stop()
+        micro_batcher = None
 
 
 # -------------------- App Initialization --------------------
 
 # Create FastAPI application instance
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
+
+# Per-route latency / count / size metrics + GET /metrics (see metrics.py)
+install_metrics(app, "app")
+
+
+# Liveness: answers as soon as the server runs, whether or not the model is loaded yet
+@app.get("/")
+def hello():
+    return {"message": "Insurance premium prediction API"}
 
 
 # -------------------- Input Validation Model --------------------
@@ -68,76 +237,267 @@ class UserInput(BaseModel):
         "business_owner", "unemployed", "private_job"
     ]
 
+    # Time spent in Pydantic validation (reported as the "validate" stage on /metrics)
+    @model_validator(mode="wrap")
+    @classmethod
+    def time_validation(cls, data, handler):
+        start = time.perf_counter()
+        try:
+            return handler(data)
+        finally:
+            observe_stage("app", "validate", time.perf_counter() - start)
+
     # -------------------- Computed Fields --------------------
+    # The feature logic lives in features.py and is shared with the training notebook
 
     # BMI is computed automatically from height & weight
     @computed_field
     @property
     def bmi(self) -> float:
-        return round(self.weight / (self.height ** 2), 2)
+        return compute_bmi(self.weight, self.height)
 
     # Lifestyle risk depends on smoking and BMI
     @computed_field
     @property
     def lifestyle_risk(self) -> str:
-        if self.smoker and self.bmi > 30:
-            return "high"
-        elif self.smoker or self.bmi > 27:
-            return "medium"
-        else:
-            return "low"
+        return get_lifestyle_risk(self.smoker, self.bmi)
 
     # Age group is derived from age
     @computed_field
     @property
     def age_group(self) -> str:
-        if self.age < 25:
-            return "young"
-        elif self.age < 45:
-            return "adult"
-        elif self.age < 60:
-            return "middle_aged"
-        return "senior"
-
-    # City tier is determined using predefined city lists
+        return get_age_group(self.age)
+
+    # City tier is determined using predefined city lists (case-insensitive)
     @computed_field
     @property
     def city_tier(self) -> int:
-        if self.city in tier_1_cities:
-            return 1
-        elif self.city in tier_2_cities:
-            return 2
-        else:
-            return 3
+        return get_city_tier(self.city)
+
+
+# -------------------- Prediction Helpers --------------------
+
+def require_model():
+    """Answers 503 until the model is loaded (only happens with APP_WARMUP=background)."""
+    if model_ready.is_set():
+        return
+    start_warmup()  # in case the server runs without lifespan events
+    if startup_profile.error:
+        raise HTTPException(status_code=503, detail=f"Model failed to load: {startup_profile.error}")
+    raise HTTPException(status_code=503, detail="Model is loading, retry shortly", headers={"Retry-After": "1"})
+
+
+def predict_categories(users: List[UserInput]) -> List[Tuple[str, str]]:
+    """
+    Predicts the premium category for each user.
+    Returns (category, model version) per user.
+
+    - Cached feature tuples are answered directly.
+    - Only the misses reach the model, and they are scored together in one call.
+    - The active model is read once, so the whole call uses a single version
+      even if a new version is swapped in meanwhile.
+    """
+    # Generation first: a swap sets the new model before invalidating the cache, so a
+    # prediction made by the old model is always stored under the old generation (and dropped)
+    generation = prediction_cache.generation
+    loaded = model_registry.active
+
+    if not prediction_cache.enabled:
+        predictions = [(category, loaded.version) for category in loaded.predict(users)]
+    else:
+        keys = [prediction_cache.make_key(user) for user in users]
+        predictions: List[Any] = [None] * len(users)
+        missing: List[int] = []
+
+        for i, key in enumerate(keys):
+            found, value = prediction_cache.get(key)
+            if found:
+                predictions[i] = value
+            else:
+                missing.append(i)
+
+        if missing:
+            scored = loaded.predict([users[i] for i in missing])
+            for i, category in zip(missing, scored):
+                predictions[i] = (category, loaded.version)
+                prediction_cache.put(keys[i], predictions[i], generation=generation)
+
+    # Candidate model (if any) scores the same traffic off the hot path
+    model_registry.shadow_score(users, [category for category, _ in predictions])
+
+    return predictions
 
 
 # -------------------- Prediction API --------------------
 
 @app.post("/predict")
-def predict_premium(data: UserInput):
+async def predict_premium(data: UserInput):
     """
     Steps:
     1. Receive validated user input
-    2. Convert computed fields into a pandas DataFrame
-    3. Pass DataFrame to ML model
+    2. Encode computed fields into the model's feature vector
+    3. Pass features to ML model (alone, or inside a micro-batch)
     4. Return predicted insurance category
     """
 
-    # Convert user data into DataFrame (model expects DataFrame input)
-    input_df = pd.DataFrame([{
-        "bmi": data.bmi,
-        "age_group": data.age_group,
-        "lifestyle_risk": data.lifestyle_risk,
-        "city_tier": data.city_tier,
-        "income_lpa": data.income_lpa,
-        "occupation": data.occupation
-    }]) 
+    require_model()
 
-    # Predict using trained ML model
-    prediction = model.predict(input_df)[0]
+    if micro_batcher is not None:
+        # Wait for the shared batch this request was added to
+        try:
+            prediction, version = await micro_batcher.submit(data)
+        except asyncio.QueueFull:
+            raise HTTPException(status_code=503, detail="Prediction queue is full, retry later")
+    else:
+        # Predict using trained ML model (fast encoder or full pipeline)
+        prediction, version = (await run_in_threadpool(predict_categories, [data]))[0]
 
     # Return prediction as JSON response
+    with stage_timer("app", "serialize"):
+        return JSONResponse(
+            status_code=200,
+            content={"predicted_category": prediction, "model_version": version}
+        )
+
+
+# -------------------- Batch Prediction API --------------------
+
+@app.post("/predict/batch")
+def predict_premium_batch(records: List[Any] = Body(..., description="List of UserInput records")):
+    """
+    Steps:
+    1. Validate every record on its own (one bad row, even one that is not an object, does not fail the batch)
+    2. Build the features of all valid rows in a single matrix
+    3. Call the ML model once per chunk of BATCH_CHUNK_SIZE rows
+    4. Return one result per input record, in input order
+    """
+
+    require_model()
+
+    results: List[Dict[str, Any]] = [{"index": i} for i in range(len(records))]
+    valid_users: List[UserInput] = []
+    valid_indexes: List[int] = []
+
+    # Validate each record and remember which positions are usable
+    for i, record in enumerate(records):
+        try:
+            valid_users.append(UserInput.model_validate(record))
+            valid_indexes.append(i)
+        except ValidationError as exc:
+            results[i]["errors"] = exc.errors(include_url=False, include_context=False)
+
+    # Score valid rows in bounded chunks and write predictions back in order
+    for start in range(0, len(valid_users), BATCH_CHUNK_SIZE):
+        chunk = valid_users[start:start + BATCH_CHUNK_SIZE]
+        predictions = predict_categories(chunk)
+
+        for i, (prediction, version) in zip(valid_indexes[start:start + BATCH_CHUNK_SIZE], predictions):
+            results[i]["predicted_category"] = prediction
+            results[i]["model_version"] = version
+
+    with stage_timer("app", "serialize"):
+        return JSONResponse(
+            status_code=200,
+            content={
+                "predictions": results,
+                "succeeded": len(valid_users),
+                "failed": len(records) - len(valid_users)
+            }
+        )
+
+
+# -------------------- Admin / Monitoring --------------------
+
+@app.post("/admin/reload-model")
+def reload_model(version: Optional[str] = None):
+    """
+    Loads and warms up a model version, then swaps it in.
+    - Without version: whatever MODEL_DIR points to (CURRENT file or newest version).
+    - In-flight requests finish on the previous version.
+    - The prediction cache is cleared as part of the swap.
+    """
+    try:
+        loaded = model_registry.activate(version)
+    except FileNotFoundError as exc:
+        raise HTTPException(status_code=404, detail=str(exc))
+    return {"message": "Model reloaded successfully", "model": loaded.info()}
+
+
+@app.get("/admin/models")
+def list_models():
+    """Available versions, the active one and shadow scoring results."""
+    require_model()
+    return {
+        "versions": model_registry.list_versions(),
+        "active": model_registry.active.info(),
+        "shadow": model_registry.shadow_stats(),
+    }
+
+
+@app.post("/admin/shadow")
+def set_shadow_model(version: Optional[str] = None):
+    """
+    Scores live traffic on a candidate version in the background.
+    Call without version to turn shadow mode off.
+    """
+    try:
+        model_registry.set_shadow(version)
+    except FileNotFoundError as exc:
+        raise HTTPException(status_code=404, detail=str(exc))
+    return model_registry.shadow_stats()
+
+
+@app.get("/ready")
+def ready():
+    """Readiness probe: 200 once the model can serve predictions, 503 while it is loading or if it failed."""
+    if model_ready.is_set():
+        return {"ready": True, "model": model_registry.active.info()}
+    start_warmup()
     return JSONResponse(
-        status_code=200,
-        content={"predicted_category": str(prediction)}
+        status_code=503,
+        content={"ready": False, "status": "failed" if startup_profile.error else "loading", "error": startup_profile.error},
     )
+
+
+@app.get("/startup")
+def startup_report():
+    """Time spent per import and per load step since the process started importing app.py."""
+    return startup_profile.report()
+
+
+@app.get("/cache/stats")
+def cache_stats():
+    """Hit / miss / eviction counters of the prediction cache."""
+    return prediction_cache.stats()
+
+
+@app.get("/batcher/stats")
+def batcher_stats():
+    """Batch size, queue depth and wait time metrics of the micro-batcher."""
+    if micro_batcher is None:
+        return {"enabled": False}
+    return {"enabled": True, **micro_batcher.stats()}
+
+
+# -------------------- Scrape-Time Metrics --------------------
+# Cache and micro-batcher counters are read when /metrics is scraped
+
+def collect_prediction_metrics():
+    cache = prediction_cache.stats()
+    yield "prediction_cache_entries", "gauge", "Entries in the prediction cache", (), {(): cache["size"]}
+    yield "prediction_cache_hits_total", "counter", "Prediction cache hits", (), {(): cache["hits"]}
+    yield "prediction_cache_misses_total", "counter", "Prediction cache misses", (), {(): cache["misses"]}
+    yield "prediction_cache_evictions_total", "counter", "Prediction cache LRU evictions", (), {(): cache["evictions"]}
+    yield "prediction_cache_expirations_total", "counter", "Prediction cache TTL expirations", (), {(): cache["expirations"]}
+
+    if micro_batcher is not None:
+        batcher = micro_batcher.stats()
+        yield "micro_batch_queue_depth", "gauge", "Requests waiting for a micro-batch", (), {(): batcher["queue_depth"]}
+        yield "micro_batches_total", "counter", "Micro-batches flushed", (), {(): batcher["batches"]}
+        yield "micro_batch_items_total", "counter", "Requests scored through micro-batches", (), {(): batcher["items"]}
+        yield "micro_batch_rejected_total", "counter", "Requests rejected by a full queue", (), {(): batcher["rejected"]}
+        yield "micro_batch_avg_size", "gauge", "Average micro-batch size", (), {(): batcher["avg_batch_size"]}
+        yield "micro_batch_avg_wait_ms", "gauge", "Average queue wait before a flush", (), {(): batcher["avg_queue_wait_ms"]}
+
+
+REGISTRY.register_collector(collect_prediction_metrics)
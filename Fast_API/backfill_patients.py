@@ -0,0 +1,88 @@
+"""
+Adds or fixes the stored bmi / verdict of every patient in one pass.
+
+New and edited patients get bmi and verdict at write time (see Patient in patient.py).
+Records written before that, or edited by hand, may lack them or hold stale values;
+this script finds them with vectorized NumPy checks and saves all fixes with a single
+bulk write. It uses the same storage mode as the API (PATIENT_STORAGE).
+
+Examples (run from the Fast_API folder):
+    python backfill_patients.py
+    python backfill_patients.py /data/patient.json --dry-run
+"""
+
+# -------------------- Imports --------------------
+
+import argparse
+import sys
+import time
+from typing import List, Optional
+
+import numpy as np
+
+from features import bmi_column, bmi_verdict_column, get_bmi_verdict
+from patient_store import get_store
+
+
+def _numbers(records, field: str) -> np.ndarray:
+    """Column of a numeric field, NaN where it is missing or not a number."""
+    return np.fromiter(
+        (value if isinstance(value, (int, float)) and not isinstance(value, bool) else np.nan
+         for value in (record.get(field) for record in records)),
+        dtype=np.float64,
+        count=len(records),
+    )
+
+
+# -------------------- Backfill --------------------
+
+def backfill(path: str = "patient.json", dry_run: bool = False) -> int:
+    """Returns the number of patients whose bmi / verdict were (or would be) updated."""
+    start = time.perf_counter()
+    store = get_store(path)
+    data = store.all()
+    ids = list(data)
+    records = list(data.values())
+
+    height = _numbers(records, "height")
+    weight = _numbers(records, "weight")
+    stored_bmi = _numbers(records, "bmi")
+    stored_verdict = np.array([record.get("verdict") for record in records], dtype=object)
+
+    # features.bmi_column rounds exactly like the API's compute_bmi (see verify_bmi_parity),
+    # so a stored value that differs at all, even in the last digit, is really stale
+    computable = (height > 0) & np.isfinite(height) & np.isfinite(weight)
+    bmi = np.full(len(records), np.nan)
+    bmi[computable] = bmi_column(weight[computable], height[computable])
+
+    stale = computable & ((stored_bmi != bmi) | (stored_verdict != bmi_verdict_column(bmi)))
+
+    changes = []
+    for i in np.flatnonzero(stale):
+        exact_bmi = float(bmi[i])
+        changes.append(("update", ids[i], {"bmi": exact_bmi, "verdict": get_bmi_verdict(exact_bmi)}))
+
+    skipped = len(records) - int(computable.sum())
+    if changes and not dry_run:
+        store.bulk_write(changes)
+
+    elapsed = time.perf_counter() - start
+    action = "Would update" if dry_run else "Updated"
+    print(f"{action} {len(changes):,} of {len(records):,} patients in {elapsed:.2f}s"
+          f" ({skipped:,} without a usable height / weight)", file=sys.stderr)
+    return len(changes)
+
+
+# -------------------- CLI --------------------
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("path", nargs="?", default="patient.json", help="Patient file (default: patient.json)")
+    parser.add_argument("--dry-run", action="store_true", help="Only report how many patients would change")
+    args = parser.parse_args(argv)
+
+    backfill(args.path, dry_run=args.dry_run)
+
+
+if __name__ == "__main__":
+    main()
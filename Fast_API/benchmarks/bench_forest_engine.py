@@ -0,0 +1,102 @@
+"""
+Compares RandomForestClassifier.predict with the FlatForest engine.
+
+Run from the Fast_API folder:
+    python benchmarks/bench_forest_engine.py [--repeat 50] [--json results.json]
+
+For each batch size (1, 64, 4096) it reports median / p99 latency per call
+and rows per second, and checks that both engines return the same labels.
+"""
+
+# -------------------- Imports --------------------
+
+import argparse
+import json
+import os
+import pickle
+import statistics
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from forest_engine import FlatForest  # noqa: E402
+
+
+BATCH_SIZES = [1, 64, 4096]
+
+
+# -------------------- Helpers --------------------
+
+def random_features(classifier, n_rows: int, seed: int = 0) -> np.ndarray:
+    """
+    Random rows shaped like the encoder output:
+    one-hot blocks are left as random 0/1 values and the last two
+    columns (bmi, income_lpa) are drawn from realistic ranges.
+    """
+    rng = np.random.default_rng(seed)
+    X = rng.integers(0, 2, size=(n_rows, classifier.n_features_in_)).astype(np.float64)
+    X[:, -2] = rng.uniform(15, 45, n_rows)    # bmi
+    X[:, -1] = rng.uniform(1, 60, n_rows)     # income_lpa
+    return X
+
+
+def time_calls(fn, X, repeat: int):
+    """Returns per-call latencies in seconds."""
+    fn(X)  # warm-up
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(X)
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def summarize(timings, batch_size: int):
+    timings = sorted(timings)
+    median = statistics.median(timings)
+    return {
+        "median_ms": round(median * 1000, 4),
+        "p99_ms": round(timings[min(len(timings) - 1, int(len(timings) * 0.99))] * 1000, 4),
+        "rows_per_sec": round(batch_size / median, 1),
+    }
+
+
+# -------------------- Main --------------------
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default="model.pkl")
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--json", dest="json_path", default=None, help="Write results to this file")
+    args = parser.parse_args()
+
+    with open(args.model, "rb") as f:
+        pipeline = pickle.load(f)
+
+    classifier = pipeline.steps[-1][1]
+    engine = FlatForest.from_classifier(classifier)
+
+    results = []
+    print(f"{'batch':>6} {'engine':>8} {'median ms':>10} {'p99 ms':>10} {'rows/sec':>12}")
+
+    for batch_size in BATCH_SIZES:
+        X = random_features(classifier, batch_size)
+
+        if not np.array_equal(classifier.predict(X), engine.predict(X)):
+            raise SystemExit(f"FlatForest predictions differ from sklearn at batch size {batch_size}")
+
+        for name, fn in (("sklearn", classifier.predict), ("flat", engine.predict)):
+            stats = summarize(time_calls(fn, X, args.repeat), batch_size)
+            results.append({"batch_size": batch_size, "engine": name, **stats})
+            print(f"{batch_size:>6} {name:>8} {stats['median_ms']:>10} {stats['p99_ms']:>10} {stats['rows_per_sec']:>12}")
+
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump(results, f, indent=4)
+
+
+if __name__ == "__main__":
+    main()
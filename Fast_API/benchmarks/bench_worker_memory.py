@@ -0,0 +1,198 @@
+"""
+Memory per worker process when N workers serve the same model, loaded from the
+pickle (model.pkl) or from its memory-mapped export (model.joblib, model_artifact.py).
+
+Run from the Fast_API folder:
+    python benchmarks/bench_worker_memory.py [--trees 50] [--rows 10000] [--workers 1 4 16] [--json results.json]
+
+model.pkl itself is small, so the benchmark first trains a larger forest with the
+same pipeline (random labels on synthetic applicants → deep trees). Each worker is
+a fresh Python process that imports app.py exactly like a uvicorn worker does
+(APP_WARMUP=eager), then predicts a few thousand random rows so most of the tree
+pages have been touched. Memory is read from /proc/<pid>/smaps_rollup:
+- RSS: resident pages, shared ones counted in every process that maps them
+- PSS: shared pages split between the processes that map them
+- sum PSS: what all workers really cost together
+
+Results on the development machine (50 trees; model.pkl 34.3 MiB, model.joblib
+21.8 MiB; MiB per worker, sum PSS for all workers):
+
+    model     workers        RSS        PSS    private    sum PSS
+    pickle          1      266.4      226.9      188.4      226.9
+    pickle          4      266.6      203.2      187.2      812.7
+    pickle         16      266.5      191.9      187.1     3069.9
+    mmap            1      220.2      180.6      142.1      180.6
+    mmap            4      220.2      140.6      119.3      562.4
+    mmap           16      220.3      125.3      119.2     2004.6
+
+About 120 MiB per worker is Python, pandas, scikit-learn and FastAPI either way. With
+the pickle every worker adds ~68 MiB of private tree memory; with the export the
+~22 MiB of mapped arrays are shared, so private memory stops growing with the forest
+and 16 workers need about 1 GiB less. RSS counts the shared pages in every worker,
+so it understates the saving: compare PSS.
+"""
+
+# -------------------- Imports --------------------
+
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List
+
+import numpy as np
+
+FAST_API_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, FAST_API_DIR)
+
+from benchmarks.synthetic import generate_applicants  # noqa: E402
+
+
+# Rows each worker predicts before it is measured
+TOUCH_ROWS = 5000
+
+
+# -------------------- Model --------------------
+
+def build_models(workdir: str, n_trees: int, n_rows: int) -> Dict[str, str]:
+    """Trains a larger copy of model.pkl's pipeline and writes model.pkl + model.joblib into workdir."""
+    import pickle
+
+    from sklearn.base import clone
+
+    from features import FEATURE_COLUMNS, add_engineered_features
+    from model_artifact import export
+    from model_registry import load_pipeline
+
+    pipeline = clone(load_pipeline(os.path.join(FAST_API_DIR, "model.pkl")))
+    pipeline.set_params(classifier__n_estimators=n_trees, classifier__n_jobs=-1)
+
+    X = add_engineered_features(generate_applicants(n_rows))[FEATURE_COLUMNS]
+    y = np.random.default_rng(0).choice(["High", "Low", "Medium"], size=n_rows)
+    pipeline.fit(X, y)
+
+    pickle_path = os.path.join(workdir, "model.pkl")
+    with open(pickle_path, "wb") as f:
+        pickle.dump(pipeline, f)
+    pipeline.set_params(classifier__n_jobs=None)
+
+    return {"pickle": pickle_path, "mmap": export(pickle_path)}
+
+
+# -------------------- Workers --------------------
+
+def worker():
+    """Entry point of one worker process (--worker): load the app, touch the model, wait."""
+    import app
+
+    loaded = app.model_registry.active
+    X = np.random.default_rng(os.getpid()).random((TOUCH_ROWS, loaded.encoder.n_features)) * 50
+    loaded.classifier.predict(X)
+
+    print("ready", flush=True)
+    sys.stdin.read()  # until the benchmark closes our stdin
+
+
+def smaps_rollup(pid: int) -> Dict[str, float]:
+    """RSS / PSS / private memory of a process in MiB."""
+    values = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) == 3 and parts[2] == "kB":
+                values[parts[0].rstrip(":")] = int(parts[1]) / 1024
+    return {
+        "rss": values["Rss"],
+        "pss": values["Pss"],
+        "private": values["Private_Clean"] + values["Private_Dirty"],
+    }
+
+
+def measure(model_path: str, use_mmap: bool, n_workers: int) -> Dict[str, Any]:
+    env = dict(
+        os.environ,
+        MODEL_DIR=os.path.join(os.path.dirname(model_path), "no-versions"),
+        MODEL_PATH=os.path.join(os.path.dirname(model_path), "model.pkl"),
+        MODEL_MMAP="1" if use_mmap else "0",
+        APP_WARMUP="eager",
+    )
+    processes = []
+    try:
+        for _ in range(n_workers):
+            process = subprocess.Popen(
+                [sys.executable, os.path.abspath(__file__), "--worker"],
+                cwd=os.path.dirname(model_path), env=env,
+                stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True,
+            )
+            processes.append(process)
+        for process in processes:
+            if process.stdout.readline().strip() != "ready":
+                raise RuntimeError(f"Worker {process.pid} failed to load the model")
+
+        time.sleep(0.5)
+        usage = [smaps_rollup(process.pid) for process in processes]
+    finally:
+        for process in processes:
+            process.stdin.close()
+        for process in processes:
+            process.wait()
+
+    return {
+        "model": "mmap" if use_mmap else "pickle",
+        "workers": n_workers,
+        "rss_mib": round(float(np.mean([u["rss"] for u in usage])), 1),
+        "pss_mib": round(float(np.mean([u["pss"] for u in usage])), 1),
+        "private_mib": round(float(np.mean([u["private"] for u in usage])), 1),
+        "sum_pss_mib": round(sum(u["pss"] for u in usage), 1),
+    }
+
+
+# -------------------- Benchmark --------------------
+
+def run(n_trees: int, n_rows: int, worker_counts: List[int]) -> Dict[str, Any]:
+    workdir = tempfile.mkdtemp(prefix="bench-worker-memory-")
+    try:
+        paths = build_models(workdir, n_trees, n_rows)
+        sizes = {name: round(os.path.getsize(path) / 2**20, 1) for name, path in paths.items()}
+
+        results = []
+        for use_mmap in (False, True):
+            for n_workers in worker_counts:
+                results.append(measure(paths["pickle"], use_mmap, n_workers))
+                row = results[-1]
+                print(f"{row['model']:<8} {row['workers']:>8} {row['rss_mib']:>10} {row['pss_mib']:>10} "
+                      f"{row['private_mib']:>10} {row['sum_pss_mib']:>10}", flush=True)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    return {"trees": n_trees, "pickle_mib": sizes["pickle"], "mmap_mib": sizes["mmap"], "results": results}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--trees", type=int, default=50, help="Trees in the benchmark forest")
+    parser.add_argument("--rows", type=int, default=10_000, help="Training rows (more rows → deeper trees)")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4, 16], help="Worker counts to measure")
+    parser.add_argument("--json", dest="json_path", default=None, help="Write results to this file")
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        worker()
+        return
+
+    print(f"{'model':<8} {'workers':>8} {'RSS':>10} {'PSS':>10} {'private':>10} {'sum PSS':>10}", flush=True)
+    report = run(args.trees, args.rows, args.workers)
+    print(f"{report['trees']} trees: model.pkl {report['pickle_mib']} MiB, model.joblib {report['mmap_mib']} MiB")
+
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump(report, f, indent=4)
+
+
+if __name__ == "__main__":
+    main()
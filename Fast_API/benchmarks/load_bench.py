@@ -0,0 +1,268 @@
+"""
+In-process load and latency benchmark for app.py, main.py and patient.py.
+
+Requests go through httpx's ASGI transport (no network, no server), so the numbers
+measure the application itself: validation, handlers, storage and serialization.
+
+Run from the Fast_API folder:
+    python benchmarks/load_bench.py --scale 10k --requests 200 --concurrency 16
+    python benchmarks/load_bench.py --scale 100k --scenarios view patient sort --output results.json
+    python benchmarks/load_bench.py --baseline benchmarks/baseline.json
+
+Every scenario starts from the same freshly seeded dataset, so the edit / delete
+scenarios find their patients no matter what ran before them.
+
+With --baseline, each scenario is compared to the stored run and the script exits with
+status 1 if p95 latency grew or throughput dropped by more than --tolerance (default 20%),
+or if more of its requests failed than in the baseline.
+Baselines are machine specific: record a new one (--output) on the machine you compare on.
+"""
+
+# -------------------- Imports --------------------
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import httpx
+
+FAST_API_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, FAST_API_DIR)
+
+from benchmarks.synthetic import generate_applicants, generate_patients, parse_scale, write_patients  # noqa: E402
+
+
+SCENARIOS = ["predict", "view", "patient", "sort", "create", "edit", "delete"]
+
+# (app name, method, url, json body)
+Request = Tuple[str, str, str, Optional[Dict[str, Any]]]
+
+
+# -------------------- Request Builders --------------------
+
+def build_requests(scenario: str, count: int, n_patients: int, seed: int) -> List[Request]:
+    """Pre-builds every request of a scenario so generation is not part of the timing."""
+    rng = random.Random(seed)
+
+    def patient_id(i: int) -> str:
+        return f"P{i:07d}"
+
+    if scenario == "predict":
+        applicants = generate_applicants(count, seed).to_dict(orient="records")
+        return [("app", "POST", "/predict", {**row, "smoker": bool(row["smoker"])}) for row in applicants]
+
+    if scenario == "view":
+        return [("main", "GET", "/view", None)] * count
+
+    if scenario == "patient":
+        return [("main", "GET", f"/patient/{patient_id(rng.randint(1, n_patients))}", None) for _ in range(count)]
+
+    if scenario == "sort":
+        keys = ["height", "weight", "bmi"]
+        return [
+            ("main", "GET", f"/sort?sort_by={rng.choice(keys)}&order={rng.choice(['asc', 'desc'])}", None)
+            for _ in range(count)
+        ]
+
+    if scenario == "create":
+        return [
+            ("patient", "POST", "/create", {
+                "ID": f"B{i:07d}", "name": "Bench Patient", "city": "Pune", "age": 30 + i % 40,
+                "gender": "Female", "height": 1.65, "weight": 60.0 + i % 30,
+            })
+            for i in range(count)
+        ]
+
+    if scenario == "edit":
+        return [
+            ("patient", "PUT", f"/edit/{patient_id(rng.randint(1, n_patients))}", {"weight": round(rng.uniform(50, 100), 1)})
+            for _ in range(count)
+        ]
+
+    if scenario == "delete":
+        # Distinct IDs from the end of the dataset, each deleted once
+        return [("patient", "DELETE", f"/delete/{patient_id(n_patients - i)}", None) for i in range(min(count, n_patients))]
+
+    raise ValueError(f"Unknown scenario {scenario!r}")
+
+
+# -------------------- Runner --------------------
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(q * (len(sorted_values) - 1)))))
+    return sorted_values[index]
+
+
+async def run_scenario(clients: Dict[str, httpx.AsyncClient], requests: List[Request], concurrency: int) -> Dict[str, Any]:
+    """Sends the requests with `concurrency` workers and returns latency / throughput stats."""
+    latencies: List[float] = []
+    errors = 0
+    position = 0
+
+    async def worker():
+        nonlocal errors, position
+        while position < len(requests):
+            app_name, method, url, body = requests[position]
+            position += 1
+
+            start = time.perf_counter()
+            response = await clients[app_name].request(method, url, json=body)
+            latencies.append(time.perf_counter() - start)
+
+            if response.status_code >= 400:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "duration_s": round(elapsed, 4),
+        "throughput_rps": round(len(latencies) / elapsed, 2) if elapsed > 0 else 0.0,
+        "mean_ms": round(statistics.fmean(latencies) * 1000, 3) if latencies else 0.0,
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 3),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 3),
+    }
+
+
+async def run_benchmarks(scenarios: List[str], n_patients: int, n_requests: int, concurrency: int, seed: int) -> Dict[str, Any]:
+    # app.py loads model.pkl relative to the working directory at import time
+    os.chdir(FAST_API_DIR)
+    import app as prediction_app
+    import main as patient_read_app
+    import patient as patient_write_app
+    from patient_store import get_store
+
+    # main.py / patient.py read patient.json from the working directory → use a scratch copy
+    workdir = tempfile.mkdtemp(prefix="fastapi-bench-")
+    write_patients(os.path.join(workdir, "patient.json"), n_patients, seed)
+    os.chdir(workdir)
+    dataset = generate_patients(n_patients, seed)
+
+    apps = {"app": prediction_app.app, "main": patient_read_app.app, "patient": patient_write_app.app}
+    clients = {
+        name: httpx.AsyncClient(transport=httpx.ASGITransport(app=asgi_app), base_url="http://bench")
+        for name, asgi_app in apps.items()
+    }
+
+    results: Dict[str, Any] = {}
+    try:
+        async with prediction_app.app.router.lifespan_context(prediction_app.app):
+            for scenario in scenarios:
+                # Reseed: create / edit / delete change the data the following scenarios read
+                get_store(patient_write_app.DATA_FILE).replace_all({pid: dict(record) for pid, record in dataset.items()})
+                requests = build_requests(scenario, n_requests, n_patients, seed)
+                results[scenario] = await run_scenario(clients, requests, concurrency)
+                print(format_row(scenario, results[scenario]), flush=True)
+    finally:
+        for client in clients.values():
+            await client.aclose()
+        os.chdir(FAST_API_DIR)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    return results
+
+
+# -------------------- Reporting --------------------
+
+HEADER = f"{'scenario':<10} {'reqs':>6} {'errors':>6} {'req/s':>10} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}"
+
+
+def format_row(scenario: str, stats: Dict[str, Any]) -> str:
+    return (
+        f"{scenario:<10} {stats['requests']:>6} {stats['errors']:>6} {stats['throughput_rps']:>10} "
+        f"{stats['p50_ms']:>9} {stats['p95_ms']:>9} {stats['p99_ms']:>9}"
+    )
+
+
+def error_rate(stats: Dict[str, Any]) -> float:
+    return stats["errors"] / stats["requests"] if stats["requests"] else 0.0
+
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """Returns one message per regressed scenario and prints the comparison table."""
+    regressions = []
+    print(f"\n{'scenario':<10} {'req/s':>22} {'p95 ms':>22} {'errors':>13}")
+
+    for scenario, stats in results.items():
+        base = baseline.get("results", {}).get(scenario)
+        if base is None:
+            continue
+
+        rps_change = stats["throughput_rps"] / base["throughput_rps"] - 1 if base["throughput_rps"] else 0.0
+        p95_change = stats["p95_ms"] / base["p95_ms"] - 1 if base["p95_ms"] else 0.0
+        print(
+            f"{scenario:<10} {base['throughput_rps']:>9} → {stats['throughput_rps']:<9} ({rps_change:+.0%})"
+            f" {base['p95_ms']:>8} → {stats['p95_ms']:<8} ({p95_change:+.0%})"
+            f" {base['errors']:>5} → {stats['errors']:<5}"
+        )
+
+        # Failed requests are usually fast, so more errors can hide behind better latency numbers
+        if error_rate(stats) > error_rate(base):
+            regressions.append(f"{scenario}: error rate {error_rate(base):.1%} → {error_rate(stats):.1%}")
+        if rps_change < -tolerance or p95_change > tolerance:
+            regressions.append(f"{scenario}: throughput {rps_change:+.0%}, p95 {p95_change:+.0%}")
+
+    return regressions
+
+
+# -------------------- Main --------------------
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scale", default="10k", help="Patients in the dataset: 10k, 100k, 1m or a number")
+    parser.add_argument("--requests", type=int, default=200, help="Requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--scenarios", nargs="*", default=SCENARIOS, choices=SCENARIOS)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    parser.add_argument("--baseline", help="Compare against this JSON results file")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed relative regression (default 0.2)")
+    args = parser.parse_args()
+
+    n_patients = parse_scale(args.scale)
+    print(HEADER)
+    results = asyncio.run(run_benchmarks(args.scenarios, n_patients, args.requests, args.concurrency, args.seed))
+
+    report = {
+        "meta": {
+            "scale": n_patients,
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "seed": args.seed,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "results": results,
+    }
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=4)
+
+    if args.baseline:
+        with open(args.baseline, "r") as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        if regressions:
+            print("\nRegressions:\n  " + "\n  ".join(regressions))
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
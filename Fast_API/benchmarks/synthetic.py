@@ -0,0 +1,124 @@
+"""
+Synthetic data generators for benchmarks.
+
+- generate_patients(n):   patient.json-shaped dict  {"P0000001": {name, city, age, ...}}
+- generate_applicants(n): insurance.csv-shaped DataFrame (age, weight, height, ...)
+
+Both are seeded, so every run with the same arguments produces the same data.
+
+CLI (run from the Fast_API folder):
+    python benchmarks/synthetic.py patients 100k /tmp/patient.json
+    python benchmarks/synthetic.py applicants 1m /tmp/applicants.csv
+"""
+
+# -------------------- Imports --------------------
+
+import argparse
+import json
+import os
+import sys
+from typing import Any, Dict
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from features import TIER_1_CITIES, TIER_2_CITIES, bmi_verdict_column  # noqa: E402
+
+
+# Named dataset sizes used across the benchmark suite
+SCALES = {"10k": 10_000, "100k": 100_000, "1m": 1_000_000}
+
+# Tier 3 cities are anything not in the tier lists
+OTHER_CITIES = ["Shimla", "Gangtok", "Puducherry", "Panaji", "Itanagar", "Kohima"]
+CITIES = TIER_1_CITIES + TIER_2_CITIES + OTHER_CITIES
+
+OCCUPATIONS = ["retired", "freelancer", "student", "government_job", "business_owner", "unemployed", "private_job"]
+GENDERS = ["Male", "Female", "Other"]
+FIRST_NAMES = ["Ananya", "Ravi", "Sneha", "Arjun", "Neha", "Rahul", "Priya", "Vikram", "Kavya", "Rohan"]
+LAST_NAMES = ["Verma", "Mehta", "Kulkarni", "Sinha", "Sharma", "Iyer", "Reddy", "Das", "Patel", "Nair"]
+
+
+def parse_scale(value: str) -> int:
+    """Accepts a named scale (10k, 100k, 1m) or a plain number."""
+    return SCALES.get(value.lower()) or int(value)
+
+
+# -------------------- Patients --------------------
+
+def generate_patients(n: int, seed: int = 42) -> Dict[str, Dict[str, Any]]:
+    """Patients in the patient.json layout, keyed by ID (P0000001, P0000002, ...)."""
+    rng = np.random.default_rng(seed)
+
+    height = np.round(rng.normal(1.68, 0.09, n).clip(1.4, 2.05), 2)
+    weight = np.round(rng.normal(72, 14, n).clip(38, 160), 1)
+    bmi = np.round(weight / height ** 2, 2)
+    verdict = bmi_verdict_column(bmi)
+    age = rng.integers(18, 90, n)
+    city = rng.choice(CITIES, n)
+    gender = rng.choice(GENDERS, n, p=[0.49, 0.49, 0.02])
+    first = rng.choice(FIRST_NAMES, n)
+    last = rng.choice(LAST_NAMES, n)
+
+    return {
+        f"P{i + 1:07d}": {
+            "name": f"{first[i]} {last[i]}",
+            "city": str(city[i]),
+            "age": int(age[i]),
+            "gender": str(gender[i]),
+            "height": float(height[i]),
+            "weight": float(weight[i]),
+            "bmi": float(bmi[i]),
+            "verdict": str(verdict[i]),
+        }
+        for i in range(n)
+    }
+
+
+def write_patients(path: str, n: int, seed: int = 42):
+    with open(path, "w") as f:
+        json.dump(generate_patients(n, seed), f)
+
+
+# -------------------- Insurance Applicants --------------------
+
+def generate_applicants(n: int, seed: int = 42) -> pd.DataFrame:
+    """Applicants with the insurance.csv input columns (no target column)."""
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "age": rng.integers(18, 80, n),
+        "weight": np.round(rng.normal(75, 18, n).clip(40, 160), 1),
+        "height": np.round(rng.normal(1.68, 0.1, n).clip(1.4, 2.05), 2),
+        "income_lpa": np.round(rng.lognormal(2.3, 0.8, n).clip(0.5, 100), 2),
+        "smoker": rng.random(n) < 0.25,
+        "city": rng.choice(CITIES, n),
+        "occupation": rng.choice(OCCUPATIONS, n),
+    })
+
+
+# -------------------- CLI --------------------
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("kind", choices=["patients", "applicants"])
+    parser.add_argument("scale", help="10k, 100k, 1m or a number of rows")
+    parser.add_argument("output", help="patients → .json, applicants → .csv or .parquet")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    n = parse_scale(args.scale)
+    if args.kind == "patients":
+        write_patients(args.output, n, args.seed)
+    else:
+        df = generate_applicants(n, args.seed)
+        if args.output.endswith((".parquet", ".pq")):
+            df.to_parquet(args.output, index=False)
+        else:
+            df.to_csv(args.output, index=False)
+
+    print(f"Wrote {n:,} {args.kind} to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
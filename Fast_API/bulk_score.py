@@ -0,0 +1,193 @@
+"""
+Offline bulk scoring of insurance applicants.
+
+Streams a CSV or Parquet file with the insurance.csv schema
+(age, weight, height, income_lpa, smoker, city, occupation) in chunks,
+applies the shared feature engineering (features.py) and the model pipeline,
+and writes predictions chunk by chunk, so memory stays bounded.
+
+Examples (run from the Fast_API folder):
+    python bulk_score.py policies.csv scored.csv
+    python bulk_score.py policies.parquet scored.parquet --workers 8 --chunk-size 200000 --proba
+"""
+
+# -------------------- Imports --------------------
+
+import argparse
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterator, List, Optional
+
+import pandas as pd
+
+from features import FEATURE_COLUMNS, add_engineered_features
+from model_registry import load_pipeline
+
+
+# -------------------- Worker Side --------------------
+# Each worker process loads the model once (pool initializer) and reuses it for every chunk.
+# With a model.joblib export (model_artifact.py) the workers share its arrays instead of copying them.
+
+_worker_model = None
+_worker_proba = False
+
+
+def _init_worker(model_path: str, with_proba: bool):
+    global _worker_model, _worker_proba
+    _worker_model = load_pipeline(model_path)
+    _worker_proba = with_proba
+
+
+def _score_chunk(chunk: pd.DataFrame, keep_columns: Optional[List[str]] = None) -> pd.DataFrame:
+    """Adds predicted_category (and proba_<class> columns) to one chunk."""
+    features = add_engineered_features(chunk)[FEATURE_COLUMNS]
+
+    result = chunk if keep_columns is None else chunk[keep_columns]
+    result = result.copy()
+    result["predicted_category"] = _worker_model.predict(features)
+
+    if _worker_proba:
+        probabilities = _worker_model.predict_proba(features)
+        for i, label in enumerate(_worker_model.classes_):
+            result[f"proba_{label}"] = probabilities[:, i]
+
+    return result
+
+
+# -------------------- Readers --------------------
+
+def _file_format(path: str) -> str:
+    return "parquet" if path.lower().endswith((".parquet", ".pq")) else "csv"
+
+
+def read_chunks(path: str, chunk_size: int) -> Iterator[pd.DataFrame]:
+    """Yields the input file as DataFrames of at most chunk_size rows."""
+    if _file_format(path) == "parquet":
+        import pyarrow.parquet as pq
+
+        parquet_file = pq.ParquetFile(path)
+        for batch in parquet_file.iter_batches(batch_size=chunk_size):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(path, chunksize=chunk_size)
+
+
+# -------------------- Writers --------------------
+
+class ChunkWriter:
+    """Appends scored chunks to a CSV or Parquet file as they arrive."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.format = _file_format(path)
+        self._parquet_writer = None
+        self._wrote_header = False
+
+    def write(self, chunk: pd.DataFrame):
+        if self.format == "parquet":
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+
+            table = pa.Table.from_pandas(chunk, preserve_index=False)
+            if self._parquet_writer is None:
+                self._parquet_writer = pq.ParquetWriter(self.path, table.schema)
+            self._parquet_writer.write_table(table)
+        else:
+            chunk.to_csv(self.path, mode="a" if self._wrote_header else "w", header=not self._wrote_header, index=False)
+            self._wrote_header = True
+
+    def close(self):
+        if self._parquet_writer is not None:
+            self._parquet_writer.close()
+
+
+# -------------------- Progress --------------------
+
+def report_progress(rows: int, started: float, final: bool = False):
+    elapsed = time.perf_counter() - started
+    rate = rows / elapsed if elapsed > 0 else 0.0
+    end = "\n" if final else "\r"
+    print(f"scored {rows:,} rows in {elapsed:.1f}s ({rate:,.0f} rows/sec)", end=end, file=sys.stderr, flush=True)
+
+
+# -------------------- Main --------------------
+
+def bulk_score(
+    input_path: str,
+    output_path: str,
+    model_path: str = "model.pkl",
+    chunk_size: int = 100_000,
+    workers: int = os.cpu_count() or 1,
+    with_proba: bool = False,
+    keep_columns: Optional[List[str]] = None,
+) -> int:
+    """
+    Scores input_path into output_path and returns the number of rows scored.
+
+    - workers=0 scores in the current process (useful for debugging).
+    - At most 2 chunks per worker are in flight, so memory does not grow with file size.
+    - Output rows keep the input order.
+    """
+    writer = ChunkWriter(output_path)
+    started = time.perf_counter()
+    rows = 0
+
+    try:
+        if workers == 0:
+            _init_worker(model_path, with_proba)
+            for chunk in read_chunks(input_path, chunk_size):
+                writer.write(_score_chunk(chunk, keep_columns))
+                rows += len(chunk)
+                report_progress(rows, started)
+        else:
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(model_path, with_proba)) as pool:
+                pending = deque()
+
+                def drain_one():
+                    nonlocal rows
+                    scored = pending.popleft().result()
+                    writer.write(scored)
+                    rows += len(scored)
+                    report_progress(rows, started)
+
+                for chunk in read_chunks(input_path, chunk_size):
+                    if len(pending) >= workers * 2:
+                        drain_one()
+                    pending.append(pool.submit(_score_chunk, chunk, keep_columns))
+
+                while pending:
+                    drain_one()
+    finally:
+        writer.close()
+
+    report_progress(rows, started, final=True)
+    return rows
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("input", help="Input .csv or .parquet file")
+    parser.add_argument("output", help="Output .csv or .parquet file")
+    parser.add_argument("--model", default="model.pkl", help="Pickled pipeline or its .joblib export (default: model.pkl)")
+    parser.add_argument("--chunk-size", type=int, default=100_000, help="Rows per chunk (default: 100000)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Worker processes, 0 = in-process")
+    parser.add_argument("--proba", action="store_true", help="Also write class probabilities")
+    parser.add_argument("--keep-columns", nargs="*", default=None, help="Input columns to copy to the output (default: all)")
+    args = parser.parse_args(argv)
+
+    bulk_score(
+        args.input,
+        args.output,
+        model_path=args.model,
+        chunk_size=args.chunk_size,
+        workers=args.workers,
+        with_proba=args.proba,
+        keep_columns=args.keep_columns,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+# -------------------- Imports --------------------
+
+from email.utils import formatdate
+from typing import Dict, Optional
+
+from fastapi import Request, Response
+
+
+# -------------------- Conditional GET --------------------
+# Clients poll /view, /patient/{id} and /sort although the data rarely changes.
+# Each response carries an ETag built from the store's version (patient_store.Version),
+# plus Last-Modified. A client that sends the ETag back in If-None-Match gets an empty
+# 304 Not Modified as long as the version is unchanged: the check costs one version
+# lookup, the patients are neither read nor serialized.
+#
+# The version is read before the data, so a response is never labelled with a newer
+# ETag than its body (at worst the next poll downloads the same data once more).
+#
+# A gzipped body is a different representation, so it gets its own strong ETag
+# ("<token>-gz", see response_cache.json_response). If-None-Match accepts either form.
+
+GZIP_ETAG_SUFFIX = "-gz"
+
+
+def etag_for(token: str) -> str:
+    return f'"{token}"'
+
+
+def gzip_etag(etag: str) -> str:
+    """The ETag of the gzipped representation: '"v1"' → '"v1-gz"'."""
+    return f'{etag[:-1]}{GZIP_ETAG_SUFFIX}"'
+
+
+def cache_headers(etag: str, modified: Optional[float]) -> Dict[str, str]:
+    # no-cache: clients may keep the response but must revalidate it on every use
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if modified is not None:
+        headers["Last-Modified"] = formatdate(modified, usegmt=True)
+    return headers
+
+
+def matching_etag(if_none_match: Optional[str], etag: str) -> Optional[str]:
+    """
+    The form of etag (plain or gzip) that If-None-Match names, or None.
+    If-None-Match uses the weak comparison: W/"x" matches "x".
+    """
+    if not if_none_match:
+        return None
+    if if_none_match.strip() == "*":
+        return etag
+    candidates = {candidate.strip().removeprefix("W/") for candidate in if_none_match.split(",")}
+    for form in (etag, gzip_etag(etag)):
+        if form in candidates:
+            return form
+    return None
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    return matching_etag(if_none_match, etag) is not None
+
+
+def not_modified(request: Request, headers: Dict[str, str]) -> Optional[Response]:
+    """A 304 response if the client already has this version, else None."""
+    etag = matching_etag(request.headers.get("if-none-match"), headers["ETag"])
+    if etag is None:
+        return None
+    if etag != headers["ETag"]:
+        # The client holds the gzipped representation: validate that one
+        headers = {**headers, "ETag": etag, "Vary": "Accept-Encoding"}
+    return Response(status_code=304, headers=headers)
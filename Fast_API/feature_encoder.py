@@ -0,0 +1,131 @@
+# -------------------- Imports --------------------
+
+import sys
+from typing import Any, Dict, List, Sequence, Tuple
+
+import numpy as np
+
+
+# -------------------- Fast Feature Encoder --------------------
+# The pickled pipeline is: ColumnTransformer(OneHotEncoder + passthrough) -> RandomForest.
+# Running the ColumnTransformer on a one-row DataFrame costs more than the forest itself,
+# so this encoder reads the fitted categories once and fills the NumPy vector directly.
+
+class FastFeatureEncoder:
+    """
+    Maps validated user objects straight to the dense feature matrix
+    the classifier inside the pipeline was trained on.
+
+    - Built once from the fitted pipeline (no refitting, no DataFrame).
+    - Output columns follow the ColumnTransformer output order exactly.
+    - Raises ValueError if the pipeline uses options this encoder does not support,
+      so the caller can fall back to the full pipeline.
+    """
+
+    def __init__(self, pipeline):
+        preprocessor = pipeline.named_steps["preprocessor"]
+        self.classifier = pipeline.steps[-1][1]
+
+        # (feature name, {category value: output column})
+        self._onehot: List[Tuple[str, Dict[Any, int], bool]] = []
+        # (feature name, output column)
+        self._passthrough: List[Tuple[str, int]] = []
+
+        position = 0
+        for name, transformer, columns in preprocessor.transformers_:
+            if transformer == "drop" or len(columns) == 0:
+                continue
+
+            if type(transformer).__name__ == "OneHotEncoder":
+                self._check_onehot(transformer)
+                ignore_unknown = transformer.handle_unknown != "error"
+                for column, categories in zip(columns, transformer.categories_):
+                    lookup = {value: position + i for i, value in enumerate(categories.tolist())}
+                    self._onehot.append((column, lookup, ignore_unknown))
+                    position += len(categories)
+
+            elif self._is_passthrough(transformer):
+                for column in columns:
+                    self._passthrough.append((column, position))
+                    position += 1
+
+            else:
+                raise ValueError(f"Unsupported transformer '{name}' for fast encoding")
+
+        self.n_features = position
+
+        if self.n_features != self.classifier.n_features_in_:
+            raise ValueError(
+                f"Encoder produces {self.n_features} features, "
+                f"classifier expects {self.classifier.n_features_in_}"
+            )
+
+    @staticmethod
+    def _check_onehot(encoder):
+        # Only the plain OneHotEncoder() used in the notebook is supported
+        if encoder.drop is not None or encoder.min_frequency is not None or encoder.max_categories is not None:
+            raise ValueError("OneHotEncoder with drop / infrequent categories is not supported")
+
+    @staticmethod
+    def _is_passthrough(transformer) -> bool:
+        # Fitted ColumnTransformers store "passthrough" as an identity FunctionTransformer
+        if transformer == "passthrough":
+            return True
+        return type(transformer).__name__ == "FunctionTransformer" and transformer.func is None
+
+    def encode(self, users: Sequence[Any]) -> np.ndarray:
+        """
+        Returns a (len(users), n_features) float64 matrix.
+        Each user only needs attribute access to the model features
+        (UserInput instances work as-is).
+        """
+        X = np.zeros((len(users), self.n_features), dtype=np.float64)
+
+        for row, user in enumerate(users):
+            for column, lookup, ignore_unknown in self._onehot:
+                value = getattr(user, column)
+                index = lookup.get(value)
+                if index is not None:
+                    X[row, index] = 1.0
+                elif not ignore_unknown:
+                    raise ValueError(f"Found unknown category {value!r} in column '{column}'")
+
+            for column, index in self._passthrough:
+                X[row, index] = getattr(user, column)
+
+        return X
+
+    def predict(self, users: Sequence[Any]) -> np.ndarray:
+        """Encodes the users and runs only the classifier step."""
+        return self.classifier.predict(self.encode(users))
+
+
+# -------------------- Parity Check --------------------
+
+def verify_parity(csv_path: str = "insurance.csv") -> int:
+    """
+    Scores every row of insurance.csv through the full pipeline and
+    through the fast encoder, and returns the number of mismatches.
+    """
+    import pandas as pd
+    from app import UserInput, model_registry
+    from features import build_feature_frame
+
+    model = model_registry.active.pipeline
+    encoder = FastFeatureEncoder(model)
+    rows = pd.read_csv(csv_path).drop(columns=["insurance_premium_category"])
+    users = [UserInput.model_validate(row) for row in rows.to_dict(orient="records")]
+
+    expected = model.predict(build_feature_frame(users))
+    actual = encoder.predict(users)
+
+    # Single-row calls must agree with the batched ones as well
+    single = np.array([encoder.predict([user])[0] for user in users])
+
+    mismatches = int((expected != actual).sum() + (expected != single).sum())
+    print(f"Checked {len(users)} rows: {mismatches} mismatches")
+    return mismatches
+
+
+if __name__ == "__main__":
+    sys.exit(1 if verify_parity(*sys.argv[1:]) else 0)
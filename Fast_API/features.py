@@ -0,0 +1,203 @@
+# -------------------- Imports --------------------
+
+import math
+from typing import TYPE_CHECKING, Any, Dict, Sequence
+
+import numpy as np
+
+if TYPE_CHECKING:
+    # pandas is imported inside the functions that use it, so the API's scalar
+    # functions do not pay for it at startup (see APP_WARMUP in app.py)
+    import pandas as pd
+
+
+# -------------------- Feature Engineering --------------------
+# Single source of truth for the engineered features used by the model.
+# - The notebook uses the vectorized *_column functions on whole DataFrames.
+# - The API (UserInput in app.py) uses the scalar get_* functions for one user.
+# Both paths produce exactly the same values, so training and serving cannot drift apart.
+
+# Columns the trained pipeline expects, in order
+FEATURE_COLUMNS = ["bmi", "age_group", "lifestyle_risk", "city_tier", "income_lpa", "occupation"]
+
+
+# -------------------- City Tier Data --------------------
+
+TIER_1_CITIES = ["Mumbai", "Delhi", "Bangalore", "Chennai", "Kolkata", "Hyderabad", "Pune"]
+
+TIER_2_CITIES = [
+    "Jaipur", "Chandigarh", "Indore", "Lucknow", "Patna", "Ranchi", "Visakhapatnam",
+    "Coimbatore", "Bhopal", "Nagpur", "Vadodara", "Surat", "Rajkot", "Jodhpur",
+    "Raipur", "Amritsar", "Varanasi", "Agra", "Dehradun", "Mysore", "Jabalpur",
+    "Guwahati", "Thiruvananthapuram", "Ludhiana", "Nashik", "Allahabad", "Udaipur",
+    "Aurangabad", "Hubli", "Belgaum", "Salem", "Vijayawada", "Tiruchirappalli",
+    "Bhavnagar", "Gwalior", "Dhanbad", "Bareilly", "Aligarh", "Gaya", "Kozhikode",
+    "Warangal", "Kolhapur", "Bilaspur", "Jalandhar", "Noida", "Guntur",
+    "Asansol", "Siliguri"
+]
+
+# Every other city is tier 3
+DEFAULT_CITY_TIER = 3
+
+
+# -------------------- BMI Verdicts --------------------
+# Upper bounds (exclusive) of each verdict; anything from 30 up is Obese
+BMI_VERDICTS = [(18.5, "Underweight"), (25.0, "Normal"), (30.0, "Overweight")]
+OBESE_VERDICT = "Obese"
+
+
+def normalize_city(city: str) -> str:
+    """Cities are matched case-insensitively and without surrounding spaces."""
+    return city.strip().casefold()
+
+
+# Hashed lookup: normalized city name → tier (O(1) instead of scanning the lists)
+CITY_TIERS: Dict[str, int] = {
+    **{normalize_city(city): 2 for city in TIER_2_CITIES},
+    **{normalize_city(city): 1 for city in TIER_1_CITIES},
+}
+
+
+# -------------------- Scalar Features (one user) --------------------
+
+def compute_bmi(weight: float, height: float) -> float:
+    """BMI from weight in kg and height in meters, rounded to 2 decimals."""
+    bmi = weight / (height ** 2)
+    # The same steps as np.round(bmi, 2) in bmi_column (scale, round half to even, unscale).
+    # round(bmi, 2) differs on some half-way values: 30.1 kg at 2.0 m → 7.53 instead of 7.52
+    return round(bmi * 100) / 100 if math.isfinite(bmi) else bmi
+
+
+def get_bmi_verdict(bmi: float) -> str:
+    for upper, verdict in BMI_VERDICTS:
+        if bmi < upper:
+            return verdict
+    return OBESE_VERDICT
+
+
+def get_age_group(age: int) -> str:
+    if age < 25:
+        return "young"
+    elif age < 45:
+        return "adult"
+    elif age < 60:
+        return "middle_aged"
+    return "senior"
+
+
+def get_lifestyle_risk(smoker: bool, bmi: float) -> str:
+    if smoker and bmi > 30:
+        return "high"
+    elif smoker or bmi > 27:
+        return "medium"
+    return "low"
+
+
+def get_city_tier(city: str) -> int:
+    return CITY_TIERS.get(normalize_city(city), DEFAULT_CITY_TIER)
+
+
+# -------------------- Vectorized Features (whole DataFrame) --------------------
+
+AGE_BINS = [-np.inf, 25, 45, 60, np.inf]
+AGE_LABELS = ["young", "adult", "middle_aged", "senior"]
+
+
+def _as_bool(values: "pd.Series") -> np.ndarray:
+    """Smoker flags may arrive as booleans or as "True"/"False" strings (e.g. from CSV)."""
+    if values.dtype == bool:
+        return values.to_numpy()
+    return values.astype(str).str.strip().str.casefold().isin(["true", "1", "yes"]).to_numpy()
+
+
+def bmi_column(weight: "pd.Series | np.ndarray", height: "pd.Series | np.ndarray") -> np.ndarray:
+    return np.round(np.asarray(weight, dtype=np.float64) / np.asarray(height, dtype=np.float64) ** 2, 2)
+
+
+def bmi_verdict_column(bmi: np.ndarray) -> np.ndarray:
+    return np.select(
+        [bmi < upper for upper, _ in BMI_VERDICTS],
+        [verdict for _, verdict in BMI_VERDICTS],
+        default=OBESE_VERDICT,
+    ).astype(object)
+
+
+def age_group_column(age: "pd.Series") -> np.ndarray:
+    import pandas as pd
+
+    # right=False → bins are [-inf, 25), [25, 45), [45, 60), [60, inf), same as get_age_group
+    groups = pd.cut(age, bins=AGE_BINS, labels=AGE_LABELS, right=False)
+    return np.asarray(groups.astype(object))
+
+
+def lifestyle_risk_column(smoker: "pd.Series", bmi: np.ndarray) -> np.ndarray:
+    smoker = _as_bool(smoker)
+    return np.select(
+        [smoker & (bmi > 30), smoker | (bmi > 27)],
+        ["high", "medium"],
+        default="low",
+    ).astype(object)
+
+
+def city_tier_column(city: "pd.Series") -> np.ndarray:
+    import pandas as pd
+
+    # Normalize and look up each distinct city once, then broadcast back to the rows
+    codes, uniques = pd.factorize(city)
+    unique_tiers = np.array(
+        [CITY_TIERS.get(normalize_city(str(name)), DEFAULT_CITY_TIER) for name in uniques] + [DEFAULT_CITY_TIER],
+        dtype=np.int64,
+    )
+    # Missing cities get code -1, which picks the trailing DEFAULT_CITY_TIER
+    return unique_tiers[codes]
+
+
+def add_engineered_features(df: "pd.DataFrame") -> "pd.DataFrame":
+    """
+    Returns a copy of the raw applicant frame (age, weight, height, smoker, city, ...)
+    with bmi, age_group, lifestyle_risk and city_tier added.
+    """
+    df = df.copy()
+    df["bmi"] = bmi_column(df["weight"], df["height"])
+    df["age_group"] = age_group_column(df["age"])
+    df["lifestyle_risk"] = lifestyle_risk_column(df["smoker"], df["bmi"].to_numpy())
+    df["city_tier"] = city_tier_column(df["city"])
+    return df
+
+
+def build_feature_frame(users: Sequence[Any]) -> "pd.DataFrame":
+    """
+    Builds one DataFrame holding the model features for many already-engineered
+    objects (e.g. UserInput instances). Columns are filled in one pass.
+    """
+    import pandas as pd
+
+    columns = {name: [getattr(user, name) for user in users] for name in FEATURE_COLUMNS}
+    return pd.DataFrame(columns, columns=FEATURE_COLUMNS)
+
+
+# -------------------- Parity Check --------------------
+
+def verify_bmi_parity() -> int:
+    """
+    Compares bmi_column with compute_bmi over a grid of weights (30-200 kg, 0.1 kg steps)
+    and heights (1.00-2.50 m, 1 cm steps). Returns the number of mismatches.
+    """
+    import pandas as pd
+
+    weights = [w / 10 for w in range(300, 2001)]
+    heights = [h / 100 for h in range(100, 251)]
+    grid = pd.DataFrame([(w, h) for w in weights for h in heights], columns=["weight", "height"])
+
+    vectorized = bmi_column(grid["weight"], grid["height"])
+    scalar = [compute_bmi(w, h) for w, h in zip(grid["weight"].tolist(), grid["height"].tolist())]
+
+    mismatches = int((vectorized != np.array(scalar)).sum())
+    print(f"Checked {len(grid)} (weight, height) pairs: {mismatches} mismatches")
+    return mismatches
+
+
+if __name__ == "__main__":
+    import sys
+
+    sys.exit(1 if verify_bmi_parity() else 0)
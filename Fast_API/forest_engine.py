@@ -0,0 +1,97 @@
+# -------------------- Imports --------------------
+
+from typing import Optional
+
+import numpy as np
+
+
+# -------------------- Flat Forest Engine --------------------
+# scikit-learn's RandomForest.predict validates input, dispatches work to a thread pool
+# and loops over every estimator in Python. For one row that fixed cost dominates.
+# Here all trees are flattened into a few NumPy arrays and walked together.
+
+class FlatForest:
+    """
+    Array-based evaluator for a fitted RandomForestClassifier.
+
+    - All nodes of all trees live in shared arrays (feature, threshold, children, values).
+    - Leaves point to themselves, so every row/tree pair can take the same number of steps.
+    - predict / predict_proba follow the RandomForestClassifier interface.
+    """
+
+    def __init__(self, feature, threshold, left, right, value, roots, max_depth, classes):
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.value = value
+        self.roots = roots
+        self.max_depth = int(max_depth)
+        self.classes_ = classes
+        self.n_features_in_: Optional[int] = None
+
+    @classmethod
+    def from_classifier(cls, forest) -> "FlatForest":
+        """Copies the node arrays of every fitted tree into one flat layout."""
+        features, thresholds, lefts, rights, values, roots = [], [], [], [], [], []
+        offset = 0
+        max_depth = 0
+
+        for estimator in forest.estimators_:
+            tree = estimator.tree_
+            n_nodes = tree.node_count
+            node_ids = np.arange(offset, offset + n_nodes, dtype=np.int64)
+            is_leaf = tree.children_left == -1
+
+            # Leaves loop back to themselves; internal nodes get global child ids
+            lefts.append(np.where(is_leaf, node_ids, tree.children_left + offset))
+            rights.append(np.where(is_leaf, node_ids, tree.children_right + offset))
+            features.append(np.where(is_leaf, 0, tree.feature).astype(np.int64))
+            thresholds.append(np.where(is_leaf, np.inf, tree.threshold))
+
+            # Class distribution of each node, normalized like DecisionTree.predict_proba
+            node_values = tree.value[:, 0, :].astype(np.float64)
+            totals = node_values.sum(axis=1, keepdims=True)
+            totals[totals == 0.0] = 1.0
+            values.append(node_values / totals)
+
+            roots.append(offset)
+            offset += n_nodes
+            max_depth = max(max_depth, tree.max_depth)
+
+        engine = cls(
+            feature=np.concatenate(features),
+            threshold=np.concatenate(thresholds),
+            left=np.concatenate(lefts),
+            right=np.concatenate(rights),
+            value=np.concatenate(values),
+            roots=np.asarray(roots, dtype=np.int64),
+            max_depth=max_depth,
+            classes=np.asarray(forest.classes_),
+        )
+        engine.n_features_in_ = forest.n_features_in_
+        return engine
+
+    def _leaves(self, X) -> np.ndarray:
+        """Returns the leaf reached by every (row, tree) pair, shape (n_rows, n_trees)."""
+        # Trees were fitted on float32 inputs, so compare with the same precision
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+
+        rows = np.arange(X.shape[0])[:, None]
+        nodes = np.broadcast_to(self.roots, (X.shape[0], self.roots.shape[0])).copy()
+
+        for _ in range(self.max_depth):
+            go_left = X[rows, self.feature[nodes]] <= self.threshold[nodes]
+            nodes = np.where(go_left, self.left[nodes], self.right[nodes])
+
+        return nodes
+
+    def predict_proba(self, X) -> np.ndarray:
+        """Mean of the per-tree class probabilities, shape (n_rows, n_classes)."""
+        leaves = self._leaves(X)
+        return self.value[leaves].sum(axis=1) / self.roots.shape[0]
+
+    def predict(self, X) -> np.ndarray:
+        return self.classes_[np.argmax(self.predict_proba(X), axis=1)]
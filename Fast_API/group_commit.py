@@ -0,0 +1,147 @@
+# -------------------- Imports --------------------
+
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from metrics import REGISTRY
+
+
+# -------------------- Group Commit --------------------
+# One writer thread per patient store. Concurrent mutations are queued, handed to the
+# store in submission order as one batch, and persisted together (one snapshot rewrite,
+# one fsync or one SQLite transaction per batch). Every caller returns only after its
+# batch is durable.
+#
+# The store provides commit_batch(mutations) → [(result, error), ...]:
+# - an error in one mutation only fails that mutation
+# - raising from commit_batch fails the whole batch (nothing was saved)
+
+# (result, error) per mutation, in submission order
+Outcome = Tuple[Any, Optional[BaseException]]
+CommitBatch = Callable[[Sequence[Any]], List[Outcome]]
+
+# Group commit metrics (shown on /metrics of main.py and patient.py)
+COMMIT_LATENCY = REGISTRY.histogram("patient_commit_duration_seconds", "Time to apply and persist one commit batch")
+COMMIT_BATCH_SIZE = REGISTRY.histogram(
+    "patient_commit_batch_size", "Mutations per commit batch", buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024)
+)
+WRITES = REGISTRY.counter("patient_writes_total", "Patient mutations committed", ("result",))
+
+
+class GroupCommitWriter:
+    """
+    Serializes writes through one background thread and commits them in batches.
+
+    - commit_interval_ms: how long to wait for more writes before flushing
+      (0 → flush as soon as the previous batch is done; writes that arrive
+      during a flush form the next batch)
+    - max_batch: maximum mutations per flush
+    """
+
+    def __init__(self, commit_batch: CommitBatch, commit_interval_ms: float = 0.0, max_batch: int = 1024,
+                 name: str = "patient-writer"):
+        self.commit_batch = commit_batch
+        self.commit_interval = commit_interval_ms / 1000
+        self.max_batch = max_batch
+        self.name = name
+
+        self._queue: "queue.Queue[Tuple[Any, Future]]" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._thread_lock = threading.Lock()
+
+        self._started_at = time.monotonic()
+        self.commits = 0
+        self.writes = 0
+        self.failed_commits = 0
+        self.max_batch_seen = 0
+        self.total_commit_time = 0.0
+
+    def submit(self, mutation: Any) -> Any:
+        """Queues a mutation and waits until it is durable. Re-raises the mutation's error."""
+        if self._thread is None:
+            with self._thread_lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+                    self._thread.start()
+
+        future: Future = Future()
+        self._queue.put((mutation, future))
+        return future.result()
+
+    # -------------------- Writer Thread --------------------
+
+    def _collect(self) -> List[Tuple[Any, Future]]:
+        """Blocks for the first mutation, then takes whatever else is queued (up to max_batch)."""
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.commit_interval
+
+        while len(batch) < self.max_batch:
+            try:
+                remaining = deadline - time.monotonic()
+                batch.append(self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            try:
+                self._commit(batch)
+            except Exception as exc:
+                # Anything unexpected (e.g. a malformed outcome list) fails this batch only:
+                # if the thread died, every later submit() would wait forever
+                self.failed_commits += 1
+                pending = [future for _, future in batch if not future.done()]
+                WRITES.inc(("error",), len(pending))
+                for future in pending:
+                    future.set_exception(exc)
+
+    def _commit(self, batch: List[Tuple[Any, Future]]):
+        start = time.perf_counter()
+        try:
+            outcomes = self.commit_batch([mutation for mutation, _ in batch])
+        except Exception as exc:
+            self.failed_commits += 1
+            WRITES.inc(("error",), len(batch))
+            for _, future in batch:
+                future.set_exception(exc)
+            return
+
+        if len(outcomes) != len(batch):
+            raise RuntimeError(f"commit_batch returned {len(outcomes)} outcomes for {len(batch)} mutations")
+
+        elapsed = time.perf_counter() - start
+        self.commits += 1
+        self.writes += len(batch)
+        self.max_batch_seen = max(self.max_batch_seen, len(batch))
+        self.total_commit_time += elapsed
+        COMMIT_LATENCY.observe((), elapsed)
+        COMMIT_BATCH_SIZE.observe((), len(batch))
+        WRITES.inc(("ok",), len(batch))
+
+        # Acknowledge only now: the whole batch is durable
+        for (_, future), (result, error) in zip(batch, outcomes):
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(result)
+
+    # -------------------- Stats --------------------
+
+    def stats(self) -> Dict[str, Any]:
+        uptime = time.monotonic() - self._started_at
+        return {
+            "commits": self.commits,
+            "writes": self.writes,
+            "failed_commits": self.failed_commits,
+            "queued": self._queue.qsize(),
+            "avg_batch_size": round(self.writes / self.commits, 2) if self.commits else 0.0,
+            "max_batch_size": self.max_batch_seen,
+            "avg_commit_ms": round(self.total_commit_time / self.commits * 1000, 3) if self.commits else 0.0,
+            "writes_per_sec": round(self.writes / uptime, 2) if uptime > 0 else 0.0,
+            "commit_interval_ms": self.commit_interval * 1000,
+        }
@@ -1,19 +1,45 @@
-from fastapi import FastAPI, Path, HTTPException, Query
+import json
+from typing import Dict, List, Optional, Tuple
+
+from fastapi import FastAPI, Path, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
 # FastAPI -> to create the API
 # Path -> to validate path parameters
 # Query -> to validate query parameters
 # HTTPException -> to handle exceptions
+# StreamingResponse -> to send /view?format=ndjson chunk by chunk
+# Request -> to read If-None-Match and Accept-Encoding
 
-import json
-# to handle json data``
+from metrics import install_metrics
+# request / stage latency metrics exposed on /metrics
+
+from patient_store import PatientStore, get_store
+# in-memory patient data shared with patient.py (loaded once, reloaded only if the file changes)
+
+from pagination import decode_cursor, encode_cursor, is_position
+# opaque page cursors for /view, /sort and /patients/query
+
+from patient_stats import same_summary
+# compares maintained and recomputed /stats aggregates
+
+from conditional import cache_headers, etag_for, not_modified
+# ETag / Last-Modified headers and 304 Not Modified for polling clients
+
+from response_cache import EncodedBody, ResponseCache, json_response
+# encoded (and gzipped) response bodies, cached per data version
 
 app = FastAPI()
+install_metrics(app, "main")
+
+DATA_FILE = 'patient.json'
 
-# function to load dat afrom json : helper function 
+# Encoded bodies of /view, /sort and /patient/{id} (RESPONSE_CACHE_MAX_BYTES, see response_cache.py)
+response_cache = ResponseCache()
+
+# function to load data from json : helper function
+# (served from the shared in-memory store instead of re-reading the file)
 def load_data():
-    with open('patient.json', 'r') as f:
-        data = json.load(f)
-    return data
+    return get_store(DATA_FILE).all()
 
 @app.get("/")
 def hello(): 
@@ -23,25 +49,175 @@ def hello():
 def about():
     return {"message": "Fully functional patient management system API."} 
 
+# patients per chunk of the NDJSON stream (one store lookup per chunk)
+VIEW_CHUNK_SIZE = 1000
+
+
+def stream_patients(after, limit):
+    """
+    Walks the store page by page and yields NDJSON lines ({"ID": ..., other fields}).
+    Only one chunk is held in memory at a time; patients written while the stream
+    runs may or may not be included.
+    """
+    store = get_store(DATA_FILE)
+    remaining = limit
+    while remaining is None or remaining > 0:
+        page_size = VIEW_CHUNK_SIZE if remaining is None else min(VIEW_CHUNK_SIZE, remaining)
+        items, after = store.scan_page(limit=page_size, after=after)
+        if items:
+            yield "".join(json.dumps({"ID": patient_id, **record}) + "\n" for patient_id, record in items).encode()
+        if remaining is not None:
+            remaining -= len(items)
+        if after is None:
+            break
+
+
+def dataset_version() -> Tuple[str, Dict[str, str]]:
+    """Version of the whole dataset and its ETag / Last-Modified (read before the data, see conditional.py)."""
+    token, modified = get_store(DATA_FILE).version()
+    return token, cache_headers(etag_for(token), modified)
+
+
 @app.get("/view")
-def view():
-    data = load_data() # fetching the data using helper [load_data] function
-    return data
+def view(request: Request,
+         limit: Optional[int] = Query(None, ge=1, description="page size (default: all patients)"),
+         cursor: Optional[str] = Query(None, description="next_cursor of the previous page"),
+         format: str = Query("json", description="json, or ndjson to stream one patient per line")):
+
+    if format not in ["json", "ndjson"]:
+        raise HTTPException(status_code=400, detail="Invalid format. Must be 'json' or 'ndjson'")
+
+    after = None
+    if cursor is not None:
+        try:
+            kind, after = decode_cursor(cursor)
+        except (ValueError, TypeError):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        if kind != "view":
+            raise HTTPException(status_code=400, detail="Cursor does not belong to /view")
+        # in-memory positions are [value, seq], SQLite ones a rowid
+        if isinstance(get_store(DATA_FILE), PatientStore):
+            if not is_position(after):
+                raise HTTPException(status_code=400, detail="Invalid cursor")
+            after = tuple(after)
+        elif not isinstance(after, int) or isinstance(after, bool):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+
+    # unchanged since the client's copy → 304 without reading the patients
+    version, headers = dataset_version()
+    unchanged = not_modified(request, headers)
+    if unchanged is not None:
+        return unchanged
+
+    # streaming: constant memory and time-to-first-byte, whatever the number of patients
+    if format == "ndjson":
+        return StreamingResponse(stream_patients(after, limit), media_type="application/x-ndjson", headers=headers)
+
+    if limit is None and cursor is None:
+        # encoded once per version (fetching the data using helper [load_data] function)
+        body = response_cache.encode(("view",), version, load_data)
+        return json_response(request, body, headers)
+
+    # one page in insertion order, {"patients": {ID: data}, "next_cursor": ...}
+    items, next_after = get_store(DATA_FILE).scan_page(limit=limit, after=after)
+    next_cursor = encode_cursor(["view", next_after]) if next_after is not None else None
+    return json_response(request, EncodedBody.of({"patients": dict(items), "next_cursor": next_cursor}), headers)
 
 
 @app.get("/patient/{patient_id}")
-def view_patient(patient_id: str = Path(..., description="The ID of the patient to retrieve", example="P001")): 
+def view_patient(request: Request,
+                 patient_id: str = Path(..., description="The ID of the patient to retrieve", example="P001")): 
     # here ... means that this parameter is required
-    # load all the patient data
-    data = load_data()
-    
-    # filter the data based on patient_id
-    if patient_id in data:
-        return data[patient_id]
-    raise HTTPException(status_code=404, detail="Patient not found")
+    store = get_store(DATA_FILE)
+
+    # the ETag follows this patient's own version, so edits to other patients keep it valid
+    version = store.record_version(patient_id)
+    if version is None:
+        raise HTTPException(status_code=404, detail="Patient not found")
+
+    token, modified = version
+    headers = cache_headers(etag_for(token), modified)
+    unchanged = not_modified(request, headers)
+    if unchanged is not None:
+        return unchanged
+
+    body = response_cache.get(("patient", patient_id), token)
+    if body is None:
+        # O(1) lookup in the shared store (no need to load all the patient data)
+        patient = store.get(patient_id)
+        if patient is None:
+            raise HTTPException(status_code=404, detail="Patient not found")
+        body = EncodedBody.of(patient)
+        response_cache.put(("patient", patient_id), token, body)
+
+    return json_response(request, body, headers)
+
+@app.get("/patients/query")
+def query_patients(city: Optional[List[str]] = Query(None, description="city (repeat for several, case-insensitive)"),
+                   gender: Optional[List[str]] = Query(None, description="gender (repeat for several)"),
+                   verdict: Optional[List[str]] = Query(None, description="BMI verdict (repeat for several)"),
+                   age_min: Optional[float] = Query(None), age_max: Optional[float] = Query(None),
+                   height_min: Optional[float] = Query(None), height_max: Optional[float] = Query(None),
+                   weight_min: Optional[float] = Query(None), weight_max: Optional[float] = Query(None),
+                   bmi_min: Optional[float] = Query(None), bmi_max: Optional[float] = Query(None),
+                   fields: Optional[str] = Query(None, description="comma-separated fields to return, e.g. name,city,bmi"),
+                   limit: int = Query(100, ge=1, le=1000, description="page size"),
+                   cursor: Optional[str] = Query(None, description="next_cursor of the previous page")):
+    """
+    Filters patients without downloading /view, e.g.
+        /patients/query?city=Pune&bmi_min=30&age_min=40&age_max=60&fields=name,bmi
+    - equality filters on city / gender / verdict, inclusive ranges on age / height / weight / bmi
+    - every filter must match; ranges never match patients missing the field
+    - results in insertion order, with the total number of matches
+    """
+    equals = {name: values for name, values in (("city", city), ("gender", gender), ("verdict", verdict)) if values}
+    ranges = {
+        name: bounds
+        for name, bounds in (
+            ("age", (age_min, age_max)), ("height", (height_min, height_max)),
+            ("weight", (weight_min, weight_max)), ("bmi", (bmi_min, bmi_max)),
+        )
+        if bounds != (None, None)
+    }
+    selected = [field.strip() for field in fields.split(",") if field.strip()] if fields else None
+
+    after = None
+    if cursor is not None:
+        try:
+            kind, after = decode_cursor(cursor)
+        except (ValueError, TypeError):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        if kind != "query" or not isinstance(after, int):
+            raise HTTPException(status_code=400, detail="Cursor does not belong to /patients/query")
+
+    patients, total, next_after = get_store(DATA_FILE).query(equals, ranges, fields=selected, limit=limit, after=after)
+    next_cursor = encode_cursor(["query", next_after]) if next_after is not None else None
+    return {"patients": patients, "total": total, "next_cursor": next_cursor}
+
+
+@app.get("/stats")
+def patient_stats(recompute: bool = Query(False, description="compute from scratch and compare with the maintained aggregates")):
+    """
+    Patient counts, BMI count / sum / sum of squares / mean / std / min / max and verdict
+    histograms, overall and by city and gender.
+    The aggregates are updated on every create / edit / delete, so reading them does not
+    touch the individual patients.
+    """
+    store = get_store(DATA_FILE)
+    stats = store.stats()
+    if not recompute:
+        return stats
+
+    recomputed = store.stats(recompute=True)
+    return {**recomputed, "consistent": same_summary(stats, recomputed)}
+
 
 @app.get("/sort")
-def sort_patients(sort_by: str = Query(..., description="sort on the basic of height, weight or BMI"), order : str = Query("asc", description="sort in ascending or descending order")):
+def sort_patients(request: Request,
+                  sort_by: str = Query(..., description="sort on the basic of height, weight or BMI"), order : str = Query("asc", description="sort in ascending or descending order"),
+                  limit: Optional[int] = Query(None, ge=1, description="page size (default: all patients)"),
+                  offset: int = Query(0, ge=0, description="patients to skip"),
+                  cursor: Optional[str] = Query(None, description="next_cursor of the previous page")):
 
 
     valid_fields = ["height", "weight", "bmi"]
@@ -50,9 +226,46 @@ def sort_patients(sort_by: str = Query(..., description="sort on the basic of he
     
     if order not in ["asc", "desc"]:
         raise HTTPException(status_code=400, detail="Invalid order. Must be 'asc' or 'desc'")
-    
-    data = load_data()
+
+    # the cursor remembers where the previous page ended (only valid for the same sort)
+    after = None
+    if cursor is not None:
+        try:
+            cursor_sort_by, cursor_order, after = decode_cursor(cursor)
+        except (ValueError, TypeError):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        # [value, seq] (in memory) or [value, rowid] (SQLite, where the value may be null)
+        if not is_position(after, nullable_value=not isinstance(get_store(DATA_FILE), PatientStore)):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        after = tuple(after)
+        if (cursor_sort_by, cursor_order) != (sort_by, order):
+            raise HTTPException(status_code=400, detail="Cursor belongs to a different sort_by / order")
+
+    version, headers = dataset_version()
+    unchanged = not_modified(request, headers)
+    if unchanged is not None:
+        return unchanged
+
+    # the store keeps sorted indexes, so a page costs O(log N + limit) instead of a full sort
+    # patients without the field come first in ascending and last in descending order
     sort_order = True if order == "desc" else False
-    sorted_data = sorted(data.values(), key=lambda x: x[sort_by], reverse=sort_order)
 
-    return {"sorted_patients": sorted_data}
\ No newline at end of file
+    def sort_page():
+        return get_store(DATA_FILE).sort_page(sort_by, descending=sort_order, limit=limit, offset=offset, after=after)
+
+    if limit is None and cursor is None:
+        if offset:
+            return json_response(request, EncodedBody.of({"sorted_patients": sort_page()[0]}), headers)
+        # the full sort is encoded once per version, sort_by and order
+        body = response_cache.encode(("sort", sort_by, order), version, lambda: {"sorted_patients": sort_page()[0]})
+        return json_response(request, body, headers)
+
+    sorted_data, next_after = sort_page()
+    next_cursor = encode_cursor([sort_by, order, next_after]) if next_after is not None else None
+    return json_response(request, EncodedBody.of({"sorted_patients": sorted_data, "next_cursor": next_cursor}), headers)
+
+
+@app.get("/cache/stats")
+def cache_stats():
+    """Hits, misses and size of the encoded response cache."""
+    return response_cache.stats()
@@ -0,0 +1,262 @@
+# -------------------- Imports --------------------
+
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
+
+
+# -------------------- Metrics --------------------
+# Small, dependency-free Prometheus metrics for the three apps (app.py, main.py, patient.py).
+# - MetricsMiddleware: per-route request count, latency, in-flight requests and payload sizes
+# - stage_timer(): latency of named hot-path stages (validation, model, file I/O, ...)
+# - install_metrics(): adds the middleware and a /metrics route in Prometheus text format
+# Recording a value is a dict lookup, a bisect and a few additions under a lock.
+
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (100, 1_000, 10_000, 100_000, 1_000_000, 10_000_000)
+
+LabelValues = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help_text: str, label_names: Sequence[str] = ()):
+        self.name = name
+        self.help = help_text
+        self.label_names = tuple(label_names)
+        self._lock = threading.Lock()
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name, help_text, label_names=()):
+        super().__init__(name, help_text, label_names)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, labels: LabelValues = (), amount: float = 1.0):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = list(self._values.items())
+        return self.header() + [
+            f"{self.name}{_format_labels(self.label_names, labels)} {_format_value(value)}" for labels, value in items
+        ]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, labels: LabelValues = (), amount: float = 1.0):
+        self.inc(labels, -amount)
+
+    def set(self, labels: LabelValues, value: float):
+        with self._lock:
+            self._values[labels] = value
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, help_text, label_names=(), buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, help_text, label_names)
+        self.buckets = tuple(buckets)
+        # labels → [per-bucket counts..., +Inf count, sum]
+        self._values: Dict[LabelValues, List[float]] = {}
+
+    def observe(self, labels: LabelValues, value: float):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(labels)
+            if state is None:
+                state = self._values[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+            state[index] += 1
+            state[-1] += value
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = [(labels, list(state)) for labels, state in self._values.items()]
+
+        lines = self.header()
+        for labels, state in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), state[:-1]):
+                cumulative += count
+                le = 'le="' + _format_value(bound) + '"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.label_names, labels, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.label_names, labels)} {_format_value(state[-1])}")
+            lines.append(f"{self.name}_count{_format_labels(self.label_names, labels)} {cumulative}")
+        return lines
+
+
+# -------------------- Registry --------------------
+
+# A collector returns (name, kind, help, {labels tuple: value}) entries computed at scrape time
+Collector = Callable[[], Iterable[Tuple[str, str, str, Sequence[str], Dict[LabelValues, float]]]]
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._collectors: List[Collector] = []
+        self._lock = threading.Lock()
+
+    def _get_or_create(self, cls, name, help_text, label_names, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, help_text, label_names, **kwargs)
+            return metric
+
+    def counter(self, name: str, help_text: str, label_names: Sequence[str] = ()) -> Counter:
+        return self._get_or_create(Counter, name, help_text, label_names)
+
+    def gauge(self, name: str, help_text: str, label_names: Sequence[str] = ()) -> Gauge:
+        return self._get_or_create(Gauge, name, help_text, label_names)
+
+    def histogram(self, name: str, help_text: str, label_names: Sequence[str] = (), buckets=LATENCY_BUCKETS) -> Histogram:
+        return self._get_or_create(Histogram, name, help_text, label_names, buckets=buckets)
+
+    def register_collector(self, collector: Collector):
+        """Adds a callback whose values are read at scrape time (e.g. cache counters)."""
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in list(self._metrics.values()):
+            lines.extend(metric.render())
+
+        for collector in self._collectors:
+            for name, kind, help_text, label_names, values in collector():
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} {kind}")
+                for labels, value in values.items():
+                    lines.append(f"{name}{_format_labels(label_names, labels)} {_format_value(value)}")
+
+        return "\n".join(lines) + "\n"
+
+
+# Process-wide default registry
+REGISTRY = MetricsRegistry()
+
+REQUESTS = REGISTRY.counter("http_requests_total", "HTTP requests handled", ("app", "method", "route", "status"))
+REQUEST_LATENCY = REGISTRY.histogram("http_request_duration_seconds", "HTTP request latency", ("app", "method", "route"))
+IN_FLIGHT = REGISTRY.gauge("http_requests_in_flight", "HTTP requests currently being handled", ("app",))
+REQUEST_SIZE = REGISTRY.histogram("http_request_size_bytes", "HTTP request body size", ("app", "route"), SIZE_BUCKETS)
+RESPONSE_SIZE = REGISTRY.histogram("http_response_size_bytes", "HTTP response body size", ("app", "route"), SIZE_BUCKETS)
+STAGE_LATENCY = REGISTRY.histogram("app_stage_duration_seconds", "Latency of hot-path stages", ("app", "stage"))
+
+
+# -------------------- Stage Timer --------------------
+
+@contextmanager
+def stage_timer(app_name: str, stage: str):
+    """
+    Times one hot-path stage:
+        with stage_timer("predict", "model"):
+            ...
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        STAGE_LATENCY.observe((app_name, stage), time.perf_counter() - start)
+
+
+def observe_stage(app_name: str, stage: str, seconds: float):
+    """Records a stage duration measured by the caller."""
+    STAGE_LATENCY.observe((app_name, stage), seconds)
+
+
+# -------------------- Middleware --------------------
+
+class MetricsMiddleware:
+    """
+    Pure ASGI middleware (no BaseHTTPMiddleware overhead).
+    Routes are labelled by their path template (/patient/{patient_id}), never by raw path,
+    so the number of series stays bounded.
+    """
+
+    def __init__(self, app, app_name: str):
+        self.app = app
+        self.app_name = app_name
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        app_labels = (self.app_name,)
+        IN_FLIGHT.inc(app_labels)
+        start = time.perf_counter()
+        status = 500
+        response_bytes = 0
+
+        async def send_wrapper(message):
+            nonlocal status, response_bytes
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                response_bytes += len(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            IN_FLIGHT.dec(app_labels)
+
+            route = scope.get("route")
+            route_path = getattr(route, "path", None) or "unmatched"
+            method = scope["method"]
+
+            REQUESTS.inc((self.app_name, method, route_path, str(status)))
+            REQUEST_LATENCY.observe((self.app_name, method, route_path), elapsed)
+            RESPONSE_SIZE.observe((self.app_name, route_path), response_bytes)
+
+            for name, value in scope.get("headers", ()):
+                if name == b"content-length":
+                    REQUEST_SIZE.observe((self.app_name, route_path), int(value))
+                    break
+
+
+# -------------------- Installation --------------------
+
+def install_metrics(app: FastAPI, app_name: str, registry: Optional[MetricsRegistry] = None):
+    """Adds MetricsMiddleware and a GET /metrics route (Prometheus text format)."""
+    registry = registry or REGISTRY
+    app.add_middleware(MetricsMiddleware, app_name=app_name)
+
+    @app.get("/metrics", include_in_schema=False)
+    def metrics():
+        return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
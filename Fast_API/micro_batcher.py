@@ -0,0 +1,155 @@
+# -------------------- Imports --------------------
+
+import asyncio
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+
+# -------------------- Micro Batcher --------------------
+# Concurrent /predict requests that arrive within a few milliseconds are put on one
+# asyncio queue and scored together, instead of each request running model.predict
+# on its own thread and fighting the others for the GIL.
+
+class MicroBatcher:
+    """
+    Coalesces single predictions into vectorized batch calls.
+
+    - predict_fn: takes a list of items, returns one result per item (same order)
+    - max_batch_size: flush as soon as this many items are waiting
+    - max_wait_ms: flush at the latest this long after the first item of a batch arrived
+    - max_queue_size: submit() raises asyncio.QueueFull beyond this many waiting items
+
+    The batch itself runs in a worker thread so the event loop keeps accepting requests.
+    """
+
+    def __init__(
+        self,
+        predict_fn: Callable[[Sequence[Any]], Sequence[Any]],
+        max_batch_size: int = 64,
+        max_wait_ms: float = 2.0,
+        max_queue_size: int = 10000,
+    ):
+        self.predict_fn = predict_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.max_queue_size = max_queue_size
+
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+
+        # Metrics
+        self.batches = 0
+        self.items = 0
+        self.rejected = 0
+        self.max_queue_depth = 0
+        self.max_batch_seen = 0
+        self.total_wait = 0.0
+        self.max_wait_seen = 0.0
+        self.total_predict_time = 0.0
+        self.batch_size_counts: Dict[int, int] = {}
+
+    # -------------------- Lifecycle --------------------
+
+    async def start(self):
+        self._queue = asyncio.Queue(maxsize=self.max_queue_size)
+        self._worker = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+
+    # -------------------- Submitting --------------------
+
+    async def submit(self, item: Any) -> Any:
+        """Queues one item and waits for its result."""
+        if self._queue is None:
+            raise RuntimeError("MicroBatcher is not started")
+
+        future = asyncio.get_running_loop().create_future()
+        try:
+            self._queue.put_nowait((item, future, time.perf_counter()))
+        except asyncio.QueueFull:
+            self.rejected += 1
+            raise
+
+        self.max_queue_depth = max(self.max_queue_depth, self._queue.qsize())
+        return await future
+
+    # -------------------- Worker --------------------
+
+    async def _collect(self) -> List[tuple]:
+        """Waits for the first item, then gathers more until the batch is full or the wait is over."""
+        batch = [await self._queue.get()]
+        deadline = time.perf_counter() + self.max_wait
+
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout=remaining))
+            except asyncio.TimeoutError:
+                break
+
+        # Anything that is already waiting can join without delaying the batch
+        while len(batch) < self.max_batch_size and not self._queue.empty():
+            batch.append(self._queue.get_nowait())
+
+        return batch
+
+    async def _run(self):
+        while True:
+            batch = await self._collect()
+            items = [item for item, _, _ in batch]
+            flushed_at = time.perf_counter()
+
+            try:
+                results = await asyncio.to_thread(self.predict_fn, items)
+            except Exception as exc:
+                for _, future, _ in batch:
+                    if not future.done():
+                        future.set_exception(exc)
+            else:
+                for (_, future, _), result in zip(batch, results):
+                    if not future.done():
+                        future.set_result(result)
+
+            self._record(batch, flushed_at, time.perf_counter() - flushed_at)
+
+    def _record(self, batch: List[tuple], flushed_at: float, predict_time: float):
+        size = len(batch)
+        self.batches += 1
+        self.items += size
+        self.max_batch_seen = max(self.max_batch_seen, size)
+        self.batch_size_counts[size] = self.batch_size_counts.get(size, 0) + 1
+        self.total_predict_time += predict_time
+
+        for _, _, queued_at in batch:
+            waited = flushed_at - queued_at
+            self.total_wait += waited
+            self.max_wait_seen = max(self.max_wait_seen, waited)
+
+    # -------------------- Metrics --------------------
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000,
+            "max_queue_size": self.max_queue_size,
+            "queue_depth": self._queue.qsize() if self._queue is not None else 0,
+            "max_queue_depth": self.max_queue_depth,
+            "batches": self.batches,
+            "items": self.items,
+            "rejected": self.rejected,
+            "avg_batch_size": round(self.items / self.batches, 2) if self.batches else 0.0,
+            "max_batch_seen": self.max_batch_seen,
+            "batch_size_counts": dict(sorted(self.batch_size_counts.items())),
+            "avg_queue_wait_ms": round(self.total_wait / self.items * 1000, 3) if self.items else 0.0,
+            "max_queue_wait_ms": round(self.max_wait_seen * 1000, 3),
+            "avg_predict_ms": round(self.total_predict_time / self.batches * 1000, 3) if self.batches else 0.0,
+        }
@@ -0,0 +1,64 @@
+"""
+Imports patient.json into the SQLite database used by PATIENT_STORAGE=sqlite.
+
+Rows are upserted in bulk transactions (one per --batch-size patients), so an
+interrupted import can simply be run again. Progress is reported on stderr.
+
+Examples (run from the Fast_API folder):
+    python migrate_patients.py patient.json patient.db
+    python migrate_patients.py patient.json patient.db --replace --batch-size 50000
+"""
+
+# -------------------- Imports --------------------
+
+import argparse
+import json
+import sys
+import time
+from typing import List, Optional
+
+from patient_sqlite import connect, import_records
+
+
+# -------------------- Migration --------------------
+
+def migrate(json_path: str, database_path: str, batch_size: int = 10_000, replace: bool = False) -> int:
+    """Copies every patient of `json_path` into `database_path`. Returns the number of patients."""
+    start = time.perf_counter()
+
+    with open(json_path, "r") as f:
+        data = json.load(f)
+
+    conn = connect(database_path)
+    try:
+        if replace:
+            conn.execute("DELETE FROM patients")
+
+        def report(done: int):
+            print(f"\r{done:,} / {len(data):,} patients", end="", file=sys.stderr, flush=True)
+
+        total = import_records(conn, data.items(), batch_size=batch_size, on_batch=report)
+        conn.execute("PRAGMA optimize")
+    finally:
+        conn.close()
+
+    elapsed = time.perf_counter() - start
+    print(f"\nImported {total:,} patients into {database_path} in {elapsed:.1f}s", file=sys.stderr)
+    return total
+
+
+# -------------------- CLI --------------------
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("input", help="patient.json file")
+    parser.add_argument("output", help="SQLite database file (created if missing)")
+    parser.add_argument("--batch-size", type=int, default=10_000, help="Patients per transaction (default: 10000)")
+    parser.add_argument("--replace", action="store_true", help="Delete existing patients in the database first")
+    args = parser.parse_args(argv)
+
+    migrate(args.input, args.output, batch_size=args.batch_size, replace=args.replace)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+"""
+Exports a pickled model pipeline to a memory-mapped artifact (model.joblib) that
+every worker process can share.
+
+Example (run from the Fast_API folder):
+    python model_artifact.py model.pkl                 # writes model.joblib next to it
+    python model_artifact.py models/v3/model.pkl       # writes models/v3/model.joblib
+
+ModelRegistry serves model.joblib instead of model.pkl when both exist (MODEL_MMAP=0 turns this off).
+"""
+
+# -------------------- Imports --------------------
+
+import argparse
+import os
+import sys
+import tempfile
+from typing import Optional
+
+import joblib
+import numpy as np
+from sklearn.base import BaseEstimator
+from sklearn.pipeline import Pipeline
+
+from forest_engine import FlatForest
+from model_registry import ARTIFACT_SUFFIX, artifact_path_for, load_pipeline
+
+
+# -------------------- Memory-Mapped Artifact --------------------
+# With N uvicorn workers, each one unpickles its own model.pkl, so memory grows with N
+# and the tree arrays of a large forest are most of it. A joblib file written with
+# joblib.dump stores NumPy arrays as raw aligned bytes; joblib.load(mmap_mode="r") maps
+# them read-only instead of copying, and the OS keeps one copy of those pages for all
+# processes mapping the file.
+#
+# scikit-learn trees cannot use that: Tree.__setstate__ copies the node arrays into
+# memory of its own. So the artifact stores the forest as a FlatForest (a handful of
+# large flat arrays, see forest_engine.py) wrapped in FlatForestClassifier, which keeps
+# pipeline.predict / predict_proba / classes_ working for every caller.
+# Loading is model_registry.load_pipeline (it does not import scikit-learn up front).
+#
+# The file is never rewritten in place (workers may have it mapped): export writes a
+# temp file and renames it over the old one, so running workers keep the old version.
+
+PARITY_ROWS = 2000
+
+
+class FlatForestClassifier(BaseEstimator):
+    """
+    Makes a FlatForest usable as the last step of a scikit-learn Pipeline.
+    Prediction only: the forest was fitted before it was flattened.
+    """
+
+    def __init__(self, forest: Optional[FlatForest] = None):
+        self.forest = forest
+
+    @property
+    def classes_(self) -> np.ndarray:
+        return self.forest.classes_
+
+    @property
+    def n_features_in_(self) -> int:
+        return self.forest.n_features_in_
+
+    def __sklearn_is_fitted__(self) -> bool:
+        return self.forest is not None
+
+    def fit(self, X, y=None):
+        raise NotImplementedError("FlatForestClassifier wraps an already fitted forest")
+
+    def predict_proba(self, X) -> np.ndarray:
+        return self.forest.predict_proba(_dense(X))
+
+    def predict(self, X) -> np.ndarray:
+        return self.forest.predict(_dense(X))
+
+
+def _dense(X):
+    # ColumnTransformer returns a sparse matrix when most outputs are zeros
+    return X.toarray() if hasattr(X, "toarray") else X
+
+
+# -------------------- Export --------------------
+
+def export(model_path: str, artifact_path: Optional[str] = None) -> str:
+    """
+    Writes the memory-mapped artifact of a pickled pipeline. Returns its path.
+    Raises ValueError if the artifact does not predict the same labels as the original.
+    """
+    artifact_path = artifact_path or artifact_path_for(model_path)
+    pipeline = load_pipeline(model_path)
+
+    classifier = pipeline.steps[-1][1]
+    if not isinstance(classifier, FlatForestClassifier):
+        classifier = FlatForestClassifier(FlatForest.from_classifier(classifier))
+    flat_pipeline = Pipeline(pipeline.steps[:-1] + [(pipeline.steps[-1][0], classifier)])
+
+    directory = os.path.dirname(os.path.abspath(artifact_path))
+    fd, temp_path = tempfile.mkstemp(prefix=".model-", suffix=ARTIFACT_SUFFIX, dir=directory)
+    os.close(fd)
+    try:
+        joblib.dump(flat_pipeline, temp_path)
+        umask = os.umask(0)
+        os.umask(umask)
+        os.chmod(temp_path, 0o666 & ~umask)  # mkstemp creates it private to the owner
+        _check_parity(pipeline.steps[-1][1], load_pipeline(temp_path).steps[-1][1])
+        os.replace(temp_path, artifact_path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+    return artifact_path
+
+
+def _check_parity(original, exported):
+    """Compares both classifiers on random rows shaped like the encoder output."""
+    rng = np.random.default_rng(0)
+    X = rng.integers(0, 2, size=(PARITY_ROWS, original.n_features_in_)).astype(np.float64)
+    X[:, -2] = rng.uniform(15, 45, PARITY_ROWS)    # bmi
+    X[:, -1] = rng.uniform(1, 60, PARITY_ROWS)     # income_lpa
+
+    mismatches = int((original.predict(X) != exported.predict(X)).sum())
+    if mismatches:
+        raise ValueError(f"Exported model disagrees with the original on {mismatches} of {PARITY_ROWS} rows")
+
+
+# -------------------- CLI --------------------
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("model", nargs="?", default="model.pkl", help="Pickled pipeline (default: model.pkl)")
+    parser.add_argument("--output", default=None, help="Artifact path (default: next to the model, .joblib)")
+    args = parser.parse_args(argv)
+
+    path = export(args.model, args.output)
+    print(f"Wrote {path} ({os.path.getsize(path) / 1024:.1f} KiB, from {os.path.getsize(args.model) / 1024:.1f} KiB)")
+    return 0
+
+
+if __name__ == "__main__":
+    # Run through the imported module, so the artifact references model_artifact.FlatForestClassifier
+    # (classes defined in __main__ could not be unpickled by the server)
+    import model_artifact
+
+    sys.exit(model_artifact.main())
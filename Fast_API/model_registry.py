@@ -0,0 +1,393 @@
+# -------------------- Imports --------------------
+
+import os
+import pickle
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from feature_encoder import FastFeatureEncoder
+from features import build_feature_frame
+from forest_engine import FlatForest
+from metrics import stage_timer
+
+
+# -------------------- Model Layout --------------------
+# models/
+#     v1/model.pkl
+#     v2/model.pkl
+#     v2/model.joblib  ← optional, memory-mapped export of model.pkl (see model_artifact.py)
+#     CURRENT          ← optional, contains the version to serve (e.g. "v2")
+#
+# Without CURRENT the highest version (natural sort: v2 < v10) is served.
+# Without any version folder, the legacy single file (model.pkl) is served as "default".
+# A model.joblib next to a model.pkl is served instead of it (unless use_mmap is False or
+# model.pkl is newer): its arrays are mapped read-only, so all worker processes share one copy.
+
+MODEL_FILE_NAME = "model.pkl"
+ARTIFACT_SUFFIX = ".joblib"
+CURRENT_FILE_NAME = "CURRENT"
+LEGACY_VERSION = "default"
+
+# Feature rows used to warm up a freshly loaded model before it serves traffic
+WARMUP_ROWS = [
+    SimpleNamespace(bmi=bmi, age_group=age_group, lifestyle_risk=risk, city_tier=tier, income_lpa=income, occupation=occupation)
+    for bmi, age_group, risk, tier, income, occupation in [
+        (22.5, "young", "low", 1, 8.0, "student"),
+        (27.8, "adult", "medium", 2, 15.0, "private_job"),
+        (31.2, "middle_aged", "high", 3, 25.0, "business_owner"),
+        (24.0, "senior", "low", 1, 4.0, "retired"),
+    ]
+]
+
+
+def _natural_key(name: str):
+    return [int(part) if part.isdigit() else part for part in re.split(r"(\d+)", name)]
+
+
+def artifact_path_for(model_path: str) -> str:
+    """model.pkl → model.joblib (same folder)."""
+    return os.path.splitext(model_path)[0] + ARTIFACT_SUFFIX
+
+
+def load_pipeline(path: str):
+    """Loads model.pkl (pickle) or model.joblib (NumPy arrays memory-mapped read-only)."""
+    if path.endswith(ARTIFACT_SUFFIX):
+        import joblib  # only needed for exported models
+
+        return joblib.load(path, mmap_mode="r")
+    # rb = read binary mode
+    with open(path, "rb") as f:
+        return pickle.load(f)
+
+
+# -------------------- Loaded Model --------------------
+
+class LoadedModel:
+    """
+    One model version plus everything derived from it (fast encoder, inference engine).
+    Requests keep a reference to the LoadedModel they started with, so a swap
+    never changes the model in the middle of a prediction.
+    """
+
+    def __init__(self, version: str, path: str, pipeline, use_fast_encoder: bool = True, inference_engine: str = "sklearn"):
+        self.version = version
+        self.path = path
+        self.pipeline = pipeline
+        self.mtime_ns = os.stat(path).st_mtime_ns
+        self.loaded_at = time.time()
+        # Milliseconds per load step, filled in by ModelRegistry.load
+        self.load_timings: Dict[str, float] = {}
+
+        self.encoder = None
+        if use_fast_encoder:
+            try:
+                self.encoder = FastFeatureEncoder(pipeline)
+            except (ValueError, AttributeError, KeyError):
+                # Unsupported pipeline layout → fall back to pipeline.predict on a DataFrame
+                self.encoder = None
+
+        self.classifier = pipeline.steps[-1][1]
+        exported = getattr(self.classifier, "forest", None)
+        if isinstance(exported, FlatForest):
+            # Memory-mapped export (model_artifact.py): the forest is already flat, whatever the engine
+            if self.encoder is not None:
+                self.classifier = exported
+        elif inference_engine == "flat" and self.encoder is not None:
+            self.classifier = FlatForest.from_classifier(self.classifier)
+
+    def predict(self, users: Sequence[Any]) -> List[str]:
+        """
+        Predicts the premium category for each user.
+        Uses the fast encoder + configured engine when available, otherwise the full pipeline.
+        """
+        if self.encoder is not None:
+            # Reading the features also evaluates UserInput's computed fields
+            with stage_timer("app", "features"):
+                X = self.encoder.encode(users)
+            with stage_timer("app", "model"):
+                predictions = self.classifier.predict(X)
+        else:
+            with stage_timer("app", "dataframe"):
+                X = build_feature_frame(users)
+            with stage_timer("app", "model"):
+                predictions = self.pipeline.predict(X)
+        return [str(prediction) for prediction in predictions]
+
+    def info(self) -> Dict[str, Any]:
+        return {
+            "version": self.version,
+            "path": self.path,
+            "loaded_at": self.loaded_at,
+            "fast_encoder": self.encoder is not None,
+            "engine": type(self.classifier).__name__,
+            "load_timings": self.load_timings,
+        }
+
+
+# -------------------- Model Registry --------------------
+
+class ModelRegistry:
+    """
+    Loads model versions from a directory and swaps the served version without downtime.
+
+    - activate(): load → warm up → atomically replace the active model
+    - reload(): activate whatever the directory currently points to (if it changed)
+    - start_watching(): poll the directory and reload on change
+    - set_shadow(): score live traffic on a candidate version in the background
+    """
+
+    def __init__(
+        self,
+        models_dir: str = "models",
+        legacy_path: str = MODEL_FILE_NAME,
+        use_fast_encoder: bool = True,
+        inference_engine: str = "sklearn",
+        max_shadow_pending: int = 1000,
+        use_mmap: bool = True,
+    ):
+        self.models_dir = models_dir
+        self.legacy_path = legacy_path
+        self.use_fast_encoder = use_fast_encoder
+        self.inference_engine = inference_engine
+        self.use_mmap = use_mmap
+
+        self._active: Optional[LoadedModel] = None
+        self._shadow: Optional[LoadedModel] = None
+        self._reload_lock = threading.Lock()
+        self._listeners: List[Callable[[LoadedModel], None]] = []
+
+        self._watch_thread: Optional[threading.Thread] = None
+        self._watch_stop = threading.Event()
+
+        # Shadow scoring runs on its own thread, off the request path
+        self._shadow_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="shadow")
+        self._shadow_pending = 0
+        self._shadow_lock = threading.Lock()
+        self.max_shadow_pending = max_shadow_pending
+        self._reset_shadow_stats()
+
+    # -------------------- Versions --------------------
+
+    def list_versions(self) -> List[str]:
+        """Version folders that contain a model file (or only its export), oldest first."""
+        if not os.path.isdir(self.models_dir):
+            return []
+        versions = []
+        for name in os.listdir(self.models_dir):
+            path = os.path.join(self.models_dir, name, MODEL_FILE_NAME)
+            if os.path.isfile(path) or (self.use_mmap and os.path.isfile(artifact_path_for(path))):
+                versions.append(name)
+        return sorted(versions, key=_natural_key)
+
+    def target_version(self) -> str:
+        """The version the directory says should be served."""
+        current_file = os.path.join(self.models_dir, CURRENT_FILE_NAME)
+        if os.path.isfile(current_file):
+            with open(current_file, "r") as f:
+                version = f.read().strip()
+            if version:
+                return version
+
+        versions = self.list_versions()
+        return versions[-1] if versions else LEGACY_VERSION
+
+    def path_for(self, version: str) -> str:
+        """The file served for a version: its memory-mapped export if there is one, else the pickle."""
+        if version == LEGACY_VERSION:
+            path = self.legacy_path
+        else:
+            path = os.path.join(self.models_dir, version, MODEL_FILE_NAME)
+
+        artifact = artifact_path_for(path)
+        if not self.use_mmap or not os.path.isfile(artifact):
+            return path
+        # A model.pkl replaced after the export is served until it is exported again
+        if os.path.isfile(path) and os.stat(path).st_mtime_ns > os.stat(artifact).st_mtime_ns:
+            return path
+        return artifact
+
+    def load(self, version: str) -> LoadedModel:
+        """Loads and warms up one version (does not activate it)."""
+        path = self.path_for(version)
+        if not os.path.isfile(path):
+            raise FileNotFoundError(f"Model version '{version}' not found at {path}")
+
+        start = time.perf_counter()
+        timings: Dict[str, float] = {}
+
+        def lap(step: str):
+            nonlocal start
+            now = time.perf_counter()
+            timings[step] = round((now - start) * 1000, 2)
+            start = now
+
+        pipeline = load_pipeline(path)
+        lap("unpickle")
+
+        loaded = LoadedModel(version, path, pipeline, self.use_fast_encoder, self.inference_engine)
+        lap("prepare")
+
+        # A few synthetic predictions pull the code paths and arrays into memory,
+        # so the first real request after a swap is not the slow one
+        loaded.predict(WARMUP_ROWS)
+        lap("warmup")
+
+        loaded.load_timings = timings
+        return loaded
+
+    # -------------------- Activation --------------------
+
+    @property
+    def active(self) -> LoadedModel:
+        if self._active is None:
+            raise RuntimeError("No model has been activated yet")
+        return self._active
+
+    def on_swap(self, listener: Callable[[LoadedModel], None]):
+        """Registers a callback run after every swap (e.g. cache invalidation)."""
+        self._listeners.append(listener)
+
+    def activate(self, version: Optional[str] = None) -> LoadedModel:
+        """
+        Loads the given version (default: target_version()) and swaps it in.
+        The old model keeps serving until the new one is fully loaded and warmed up.
+        """
+        with self._reload_lock:
+            loaded = self.load(version or self.target_version())
+
+            # A single reference assignment → requests see either the old or the new model
+            self._active = loaded
+
+            for listener in self._listeners:
+                listener(loaded)
+            return loaded
+
+    def reload(self, force: bool = False) -> bool:
+        """Activates the target version if it differs from the active one. Returns True if swapped."""
+        version = self.target_version()
+        current = self._active
+
+        if not force and current is not None and current.version == version:
+            path = self.path_for(version)
+            if os.path.isfile(path) and os.stat(path).st_mtime_ns == current.mtime_ns:
+                return False
+
+        self.activate(version)
+        return True
+
+    # -------------------- File Watch --------------------
+
+    def _signature(self) -> Tuple:
+        """Cheap fingerprint of the model directory (versions, CURRENT file, target file mtime)."""
+        def mtime(path):
+            return os.stat(path).st_mtime_ns if os.path.isfile(path) else None
+
+        version = self.target_version()
+        return (
+            tuple(self.list_versions()),
+            mtime(os.path.join(self.models_dir, CURRENT_FILE_NAME)),
+            version,
+            mtime(self.path_for(version)),
+        )
+
+    def start_watching(self, interval: float = 5.0):
+        """Polls the model directory in a daemon thread and reloads when it changes."""
+        if self._watch_thread is not None:
+            return
+
+        self._watch_stop.clear()
+
+        def watch():
+            last = self._signature()
+            while not self._watch_stop.wait(interval):
+                try:
+                    signature = self._signature()
+                    if signature != last:
+                        self.reload()
+                        last = signature
+                except Exception:
+                    # A half-copied file fails to load; keep the old model and retry next tick
+                    continue
+
+        self._watch_thread = threading.Thread(target=watch, name="model-watch", daemon=True)
+        self._watch_thread.start()
+
+    def stop_watching(self):
+        if self._watch_thread is not None:
+            self._watch_stop.set()
+            self._watch_thread.join()
+            self._watch_thread = None
+
+    # -------------------- Shadow Mode --------------------
+
+    def _reset_shadow_stats(self):
+        self.shadow_stats_data = {
+            "compared": 0,
+            "agreed": 0,
+            "disagreed": 0,
+            "errors": 0,
+            "dropped": 0,
+            "total_ms": 0.0,
+        }
+
+    @property
+    def shadow(self) -> Optional[LoadedModel]:
+        return self._shadow
+
+    def set_shadow(self, version: Optional[str]) -> Optional[LoadedModel]:
+        """Loads a candidate version for shadow scoring (None turns shadow mode off)."""
+        candidate = self.load(version) if version else None
+        with self._shadow_lock:
+            self._shadow = candidate
+            self._reset_shadow_stats()
+        return candidate
+
+    def shadow_score(self, users: Sequence[Any], predictions: Sequence[str]):
+        """
+        Queues the users for scoring on the shadow model and returns immediately.
+        Results are only compared with the live predictions, never returned to clients.
+        """
+        candidate = self._shadow
+        if candidate is None:
+            return
+
+        with self._shadow_lock:
+            if self._shadow_pending >= self.max_shadow_pending:
+                self.shadow_stats_data["dropped"] += len(users)
+                return
+            self._shadow_pending += 1
+
+        self._shadow_executor.submit(self._run_shadow, candidate, list(users), list(predictions))
+
+    def _run_shadow(self, candidate: LoadedModel, users: List[Any], predictions: List[str]):
+        start = time.perf_counter()
+        try:
+            shadow_predictions = candidate.predict(users)
+        except Exception:
+            shadow_predictions = None
+
+        with self._shadow_lock:
+            self._shadow_pending -= 1
+            if candidate is not self._shadow:
+                return  # shadow model was replaced meanwhile
+            stats = self.shadow_stats_data
+            stats["total_ms"] += (time.perf_counter() - start) * 1000
+            if shadow_predictions is None:
+                stats["errors"] += len(users)
+                return
+            agreed = sum(1 for live, shadow in zip(predictions, shadow_predictions) if live == shadow)
+            stats["compared"] += len(users)
+            stats["agreed"] += agreed
+            stats["disagreed"] += len(users) - agreed
+
+    def shadow_stats(self) -> Dict[str, Any]:
+        with self._shadow_lock:
+            stats = dict(self.shadow_stats_data)
+            stats["version"] = self._shadow.version if self._shadow is not None else None
+            stats["pending"] = self._shadow_pending
+            stats["agreement"] = round(stats["agreed"] / stats["compared"], 4) if stats["compared"] else None
+            return stats
@@ -0,0 +1,36 @@
+# -------------------- Imports --------------------
+
+import base64
+import json
+from typing import Any
+
+
+# -------------------- Cursors --------------------
+# Paginated endpoints hand out an opaque cursor: URL-safe base64 of a small JSON value
+# (e.g. which sort it belongs to and where the page ended). Clients send it back as-is
+# to get the next page.
+
+def encode_cursor(payload: Any) -> str:
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Any:
+    """Inverse of encode_cursor. Raises ValueError for anything that is not a valid cursor."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        return json.loads(raw)
+    except (ValueError, UnicodeDecodeError) as exc:
+        raise ValueError("Invalid cursor") from exc
+
+
+def is_position(after: Any, nullable_value: bool = False) -> bool:
+    """
+    True if a decoded cursor holds a page position as the stores return it: [value, seq]
+    with a numeric value (or null, for SQLite sorts over a missing field) and an integer seq.
+    """
+    if not isinstance(after, list) or len(after) != 2:
+        return False
+    value, seq = after
+    numeric = isinstance(value, (int, float)) and not isinstance(value, bool)
+    return (numeric or (nullable_value and value is None)) and isinstance(seq, int) and not isinstance(seq, bool)
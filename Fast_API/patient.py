@@ -1,24 +1,30 @@
 # -------------------- Imports --------------------
 
 # FastAPI framework and exception handling
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Body, Query
 from fastapi.responses import JSONResponse
 
 # Pydantic is used for request validation
-from pydantic import BaseModel
+from pydantic import BaseModel, Field, ValidationError, computed_field
 
 # Used for optional fields and fixed values
-from typing import Optional, Literal
+from typing import Any, Dict, List, Optional, Literal
 
-# Used to work with JSON files and file system
-import json
-import os
+# Request and stage latency metrics (exposed on /metrics)
+from metrics import install_metrics
+
+# In-memory patient data shared with main.py (see patient_store.py)
+from patient_store import BULK_FAILED, BULK_ROLLED_BACK, get_store
+
+# Shared BMI formula and verdict thresholds (also used by the ML features)
+from features import compute_bmi, get_bmi_verdict
 
 
 # -------------------- App Initialization --------------------
 
 # Create FastAPI application instance
 app = FastAPI()
+install_metrics(app, "patient")
 
 # Name of the JSON file where patient data is stored
 DATA_FILE = "patient.json"
@@ -34,8 +40,20 @@ class Patient(BaseModel):
     city: str                # Patient city
     age: int                 # Patient age
     gender: Literal["Male", "Female", "Other"]  # Allowed gender values
-    height: float            # Height in cm
-    weight: float            # Weight in kg
+    height: float = Field(..., gt=0)  # Height in metres
+    weight: float = Field(..., gt=0)  # Weight in kg
+
+    # Computed from height and weight, included in model_dump() and stored with the patient
+    # (/edit recomputes them only when height or weight change, see patient_store.merge_changes)
+    @computed_field
+    @property
+    def bmi(self) -> float:
+        return compute_bmi(self.weight, self.height)
+
+    @computed_field
+    @property
+    def verdict(self) -> str:
+        return get_bmi_verdict(self.bmi)
 
 
 # Patient model for UPDATE operation
@@ -45,42 +63,48 @@ class PatientUpdate(BaseModel):
     city: Optional[str] = None
     age: Optional[int] = None
     gender: Optional[Literal["Male", "Female", "Other"]] = None
-    height: Optional[float] = None
-    weight: Optional[float] = None
+    height: Optional[float] = Field(None, gt=0)
+    weight: Optional[float] = Field(None, gt=0)
+
+
+# Patient model for BULK UPDATE
+# Same optional fields, plus the ID of the patient to update
+class PatientBulkUpdate(PatientUpdate):
+    ID: str
 
 
 # -------------------- Helper Functions --------------------
 
-def load_data():
+def patient_store():
     """
-    Loads patient data from the JSON file.
-
-    - If the file does not exist, return an empty dictionary.
-    - If the file exists but is empty or corrupted, return an empty dictionary.
-    - This prevents the API from crashing (500 Internal Server Error).
+    Returns the process-wide store for DATA_FILE.
+    - The file is read once and kept in memory.
+    - It is re-read only if it changes on disk (e.g. written by another process).
     """
+    return get_store(DATA_FILE)
 
-    # Check whether the file exists in the project directory
-    if not os.path.exists(DATA_FILE):
-        return {}  # No file → no patients yet
 
-    try:
-        # Open file and convert JSON into Python dictionary
-        with open(DATA_FILE, "r") as f:
-            return json.load(f)
+def load_data():
+    """
+    Returns all patients as a dictionary {ID: patient data}.
 
-    except json.JSONDecodeError:
-        # Handles case where file is empty or invalid JSON
-        return {}
+    - If the file does not exist, return an empty dictionary.
+    - If the file exists but is empty or corrupted, return an empty dictionary
+      (with PATIENT_STORAGE=wal a corrupted file raises StorageError instead).
+    - Served from memory, the file is not parsed again on every call.
+    """
+    return patient_store().all()
 
 
 def save_data(data):
     """
-    Saves patient data into the JSON file.
-    indent=4 is used to make the file readable for humans.
+    Replaces all patient data with `data` through the shared store (store.replace_all).
+
+    - json / wal: the in-memory data is swapped and a new snapshot file is written
+      atomically (the write-ahead log, if any, is cleared).
+    - sqlite: all rows are replaced in one transaction.
     """
-    with open(DATA_FILE, "w") as f:
-        json.dump(data, f, indent=4)
+    patient_store().replace_all(data)
 
 
 # -------------------- API Routes --------------------
@@ -101,18 +125,13 @@ def create_patient(patient: Patient):
     - Patient ID is NOT duplicated inside the JSON object.
     """
 
-    # Load existing patients
-    data = load_data()
-
-    # Check if patient ID already exists
-    if patient.ID in data:
-        raise HTTPException(status_code=400, detail="Patient already exists")
-
     # Store patient data (excluding ID because ID is used as key)
-    data[patient.ID] = patient.model_dump(exclude={"ID"})
+    # bmi and verdict are computed fields, so model_dump() stores them too
+    # create() returns False if the patient ID already exists
+    created = patient_store().create(patient.ID, patient.model_dump(exclude={"ID"}))
 
-    # Save updated data to file
-    save_data(data)
+    if not created:
+        raise HTTPException(status_code=400, detail="Patient already exists")
 
     return {"message": "Patient created successfully ✅"}
 
@@ -127,26 +146,13 @@ def update_patient(patient_id: str, patient_update: PatientUpdate):
     - Other fields remain unchanged.
     """
 
-    # Load existing data
-    data = load_data()
-
-    # Check if patient exists
-    if patient_id not in data:
-        raise HTTPException(status_code=404, detail="Patient not found")
-
-    # Get existing patient information
-    patient_data = data[patient_id]
-
     # Extract only the fields provided by client
     updates = patient_update.model_dump(exclude_unset=True)
 
-    # Update only those fields
-    for key, value in updates.items():
-        patient_data[key] = value
-
-    # Save updated patient data
-    data[patient_id] = patient_data
-    save_data(data)
+    # Update only those fields and save (None → patient does not exist)
+    # bmi / verdict are recomputed by the store if height or weight changed
+    if patient_store().update(patient_id, updates) is None:
+        raise HTTPException(status_code=404, detail="Patient not found")
 
     return {"message": "Patient updated successfully ✅"}
 
@@ -159,21 +165,107 @@ def delete_patient(patient_id: str):
     Deletes a patient using patient ID.
     """
 
-    # Load existing data
-    data = load_data()
-
-    # Check if patient exists
-    if patient_id not in data:
+    # Remove patient and save (False → patient does not exist)
+    if not patient_store().delete(patient_id):
         raise HTTPException(status_code=404, detail="Patient not found")
 
-    # Remove patient from dictionary
-    del data[patient_id]
-
-    # Save updated data
-    save_data(data)
-
     # Correct usage: status_code (NOT status)
     return JSONResponse(
         status_code=200,
         content={"message": "Patient deleted successfully ✅"}
     )
+
+
+# -------------------- Bulk Operations --------------------
+
+def run_bulk(kind: str, items: List[Any], atomic: bool) -> JSONResponse:
+    """
+    Shared by the bulk endpoints.
+    1. Validate every item in one pass (one bad item does not fail the others)
+    2. Apply all valid items with ONE store write (one file rewrite / fsync / transaction)
+    3. Return one result per item, in input order
+
+    atomic=True: all-or-nothing. If any item is invalid or fails, nothing is saved
+    and the response status is 409, so the same request can simply be retried.
+    """
+    results: List[Dict[str, Any]] = [{"index": i} for i in range(len(items))]
+    changes = []
+    positions: List[int] = []
+
+    for i, item in enumerate(items):
+        try:
+            if kind == "create":
+                patient = Patient.model_validate(item)
+                changes.append(("create", patient.ID, patient.model_dump(exclude={"ID"})))
+            elif kind == "update":
+                patient_update = PatientBulkUpdate.model_validate(item)
+                changes.append(("update", patient_update.ID, patient_update.model_dump(exclude_unset=True, exclude={"ID"})))
+            else:
+                changes.append(("delete", item, None))
+        except ValidationError as exc:
+            results[i]["status"] = "invalid"
+            results[i]["errors"] = exc.errors(include_url=False, include_context=False)
+            continue
+
+        results[i]["ID"] = changes[-1][1]
+        positions.append(i)
+
+    invalid = len(items) - len(changes)
+    if atomic and invalid:
+        # Nothing is sent to the store
+        statuses = [BULK_ROLLED_BACK] * len(changes)
+    else:
+        statuses = patient_store().bulk_write(changes, atomic=atomic) if changes else []
+
+    for i, status in zip(positions, statuses):
+        results[i]["status"] = status
+
+    succeeded = sum(1 for status in statuses if status not in BULK_FAILED and status != BULK_ROLLED_BACK)
+    failed = invalid + sum(1 for status in statuses if status in BULK_FAILED)
+    applied = not (atomic and failed)
+
+    return JSONResponse(
+        status_code=409 if atomic and failed else 200,
+        content={"results": results, "succeeded": succeeded, "failed": failed, "applied": applied},
+    )
+
+
+@app.post("/patients/bulk/create")
+def bulk_create(patients: List[Dict[str, Any]] = Body(..., description="List of Patient records"),
+                atomic: bool = Query(False, description="save nothing if any patient fails")):
+    """
+    Creates many patients at once.
+    Per-item status: created, duplicate (ID already exists) or invalid.
+    """
+    return run_bulk("create", patients, atomic)
+
+
+@app.put("/patients/bulk/edit")
+def bulk_update(updates: List[Dict[str, Any]] = Body(..., description="List of PatientUpdate fields with an ID"),
+                atomic: bool = Query(False, description="save nothing if any update fails")):
+    """
+    Updates many patients at once (only the fields sent for each ID).
+    Per-item status: updated, not_found or invalid.
+    """
+    return run_bulk("update", updates, atomic)
+
+
+@app.post("/patients/bulk/delete")
+def bulk_delete(patient_ids: List[str] = Body(..., description="List of patient IDs"),
+                atomic: bool = Query(False, description="delete nothing if any ID does not exist")):
+    """
+    Deletes many patients at once.
+    Per-item status: deleted or not_found.
+    """
+    return run_bulk("delete", patient_ids, atomic)
+
+
+# -------------------- Storage Stats --------------------
+
+@app.get("/store/stats")
+def store_stats():
+    """
+    Group commit statistics of the patient store
+    (commit latency, batch size, writes/sec).
+    """
+    return patient_store().commit_stats()
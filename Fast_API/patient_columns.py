@@ -0,0 +1,178 @@
+# -------------------- Imports --------------------
+
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+# -------------------- Columnar Patient Table --------------------
+# Backs /patients/query ("patients in Pune with bmi >= 30 aged 40-60").
+# - Numeric fields are NumPy float64 arrays (NaN = missing), so range filters are
+#   vectorized comparisons over the whole column.
+# - city / gender / verdict are dictionary-encoded: an int32 code per row plus a
+#   vocabulary. A hash index maps the normalized value to its codes, so an equality
+#   filter is one dict lookup and a vectorized np.isin over the code column.
+# - Rows stay in insertion order (seq column): updates are written in place, deletes
+#   leave a tombstone until the next compaction, new patients are appended.
+#
+# The table is owned by PatientStore, built on the first query and then kept up to
+# date from the same write operations as the sorted indexes.
+
+NUMERIC_FIELDS = ("age", "height", "weight", "bmi")
+CATEGORICAL_FIELDS = ("city", "gender", "verdict")
+
+# Ranges are inclusive (min, max); either bound may be None
+Range = Tuple[Optional[float], Optional[float]]
+
+INITIAL_CAPACITY = 1024
+
+
+def normalize(value: Any) -> str:
+    """Categorical values match case-insensitively and without surrounding spaces."""
+    return str(value).strip().casefold()
+
+
+def _number(value: Any) -> float:
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        return np.nan
+    return float(value)
+
+
+class ColumnarTable:
+    def __init__(self, capacity: int = INITIAL_CAPACITY):
+        self.size = 0   # rows in use, including deleted ones
+        self.live = 0   # rows holding a patient
+        self.row_of: Dict[str, int] = {}
+
+        self.ids = np.empty(capacity, dtype=object)
+        self.seq = np.zeros(capacity, dtype=np.int64)
+        self.valid = np.zeros(capacity, dtype=bool)
+        self.numeric = {field: np.full(capacity, np.nan) for field in NUMERIC_FIELDS}
+        self.codes = {field: np.full(capacity, -1, dtype=np.int32) for field in CATEGORICAL_FIELDS}
+
+        # Dictionary encoding: raw value ↔ code, and the hash index normalized value → codes
+        self.vocab: Dict[str, List[str]] = {field: [] for field in CATEGORICAL_FIELDS}
+        self.code_of: Dict[str, Dict[str, int]] = {field: {} for field in CATEGORICAL_FIELDS}
+        self.index: Dict[str, Dict[str, List[int]]] = {field: {} for field in CATEGORICAL_FIELDS}
+
+    @classmethod
+    def build(cls, data: Dict[str, Dict[str, Any]], order: Dict[str, int]) -> "ColumnarTable":
+        table = cls(max(INITIAL_CAPACITY, len(data)))
+        for patient_id in sorted(data, key=order.__getitem__):
+            table.upsert(patient_id, data[patient_id], order[patient_id])
+        return table
+
+    # -------------------- Writes --------------------
+
+    def _encode(self, field: str, value: Any) -> int:
+        if value is None:
+            return -1
+        raw = str(value)
+        code = self.code_of[field].get(raw)
+        if code is None:
+            code = self.code_of[field][raw] = len(self.vocab[field])
+            self.vocab[field].append(raw)
+            self.index[field].setdefault(normalize(raw), []).append(code)
+        return code
+
+    def _grow(self):
+        capacity = len(self.ids) * 2
+        self.ids = np.concatenate([self.ids, np.full(capacity - len(self.ids), None, dtype=object)])
+        self.seq = np.concatenate([self.seq, np.zeros(capacity - len(self.seq), dtype=np.int64)])
+        self.valid = np.concatenate([self.valid, np.zeros(capacity - len(self.valid), dtype=bool)])
+        for field, column in self.numeric.items():
+            self.numeric[field] = np.concatenate([column, np.full(capacity - len(column), np.nan)])
+        for field, column in self.codes.items():
+            self.codes[field] = np.concatenate([column, np.full(capacity - len(column), -1, dtype=np.int32)])
+
+    def upsert(self, patient_id: str, record: Dict[str, Any], seq: int):
+        row = self.row_of.get(patient_id)
+        if row is None:
+            if self.size == len(self.ids):
+                self._grow()
+            row = self.row_of[patient_id] = self.size
+            self.size += 1
+            self.live += 1
+            self.ids[row] = patient_id
+            self.seq[row] = seq
+            self.valid[row] = True
+
+        for field in NUMERIC_FIELDS:
+            self.numeric[field][row] = _number(record.get(field))
+        for field in CATEGORICAL_FIELDS:
+            self.codes[field][row] = self._encode(field, record.get(field))
+
+    def remove(self, patient_id: str):
+        row = self.row_of.pop(patient_id, None)
+        if row is None:
+            return
+        self.valid[row] = False
+        self.ids[row] = None
+        self.live -= 1
+
+        # Drop tombstones once they are the majority
+        if self.size > INITIAL_CAPACITY and self.live < self.size // 2:
+            self._compact()
+
+    def _compact(self):
+        keep = np.flatnonzero(self.valid[:self.size])
+        capacity = max(INITIAL_CAPACITY, len(keep) * 2)
+
+        def packed(column, fill):
+            result = np.full(capacity, fill, dtype=column.dtype)
+            result[:len(keep)] = column[keep]
+            return result
+
+        self.ids = packed(self.ids, None)
+        self.seq = packed(self.seq, 0)
+        self.valid = packed(self.valid, False)
+        self.numeric = {field: packed(column, np.nan) for field, column in self.numeric.items()}
+        self.codes = {field: packed(column, -1) for field, column in self.codes.items()}
+        self.size = len(keep)
+        self.row_of = {patient_id: row for row, patient_id in enumerate(self.ids[:self.size])}
+
+    # -------------------- Queries --------------------
+
+    def query(self, equals: Dict[str, Sequence[Any]], ranges: Dict[str, Range], limit: int,
+              after: Optional[int] = None) -> Tuple[List[str], int, Optional[int]]:
+        """
+        Patient IDs matching every filter, in insertion order.
+        - equals: {categorical field: accepted values}, ranges: {numeric field: (min, max)}
+        - after: seq of the last patient of the previous page
+        Returns (IDs of this page, total number of matches, seq to continue from or None).
+        """
+        n = self.size
+        mask = self.valid[:n].copy()
+
+        for field, values in equals.items():
+            codes = [code for value in values for code in self.index[field].get(normalize(value), ())]
+            mask &= np.isin(self.codes[field][:n], codes)
+
+        for field, (low, high) in ranges.items():
+            column = self.numeric[field][:n]
+            # NaN compares False → patients without the field never match a range
+            if low is not None:
+                mask &= column >= low
+            if high is not None:
+                mask &= column <= high
+
+        rows = np.flatnonzero(mask)
+        total = len(rows)
+
+        # Rows are in seq order, so the cursor is a binary search
+        if after is not None:
+            rows = rows[np.searchsorted(self.seq[rows], after, side="right"):]
+
+        page = rows[:limit]
+        next_after = int(self.seq[page[-1]]) if len(rows) > limit else None
+        return list(self.ids[page]), total, next_after
+
+    def __len__(self) -> int:
+        return self.live
+
+
+def project(patient_id: str, record: Dict[str, Any], fields: Optional[Iterable[str]]) -> Dict[str, Any]:
+    """{"ID": ..., selected fields} (all fields when `fields` is None)."""
+    if fields is None:
+        return {"ID": patient_id, **record}
+    return {"ID": patient_id, **{field: record[field] for field in fields if field in record}}
@@ -0,0 +1,132 @@
+# -------------------- Imports --------------------
+
+import sys
+from collections.abc import Mapping
+from typing import Any, Dict, Iterator, Union
+
+
+# -------------------- Compact Patient Records --------------------
+# PatientStore keeps every patient in memory. As plain dicts, a million patients cost
+# several hundred bytes each: a hash table per record plus separate copies of strings
+# like "Mumbai" and floats like 1.75 for every patient that has them.
+#
+# PatientRecord stores the usual fields in __slots__ (no per-record hash table) and
+# shares repeated values:
+# - city / gender / verdict strings are interned (one "Mumbai" for all patients)
+# - height / weight / bmi floats come from a bounded pool of already seen values
+#
+# It is a read-only Mapping, so the store's internals (indexes, columnar table,
+# statistics, merge_changes) read it like a dict. The store converts it back to a
+# plain dict (to_dict) only where records leave it: API responses and persistence.
+#
+# Records whose keys are not in the usual order stay plain dicts, so every record
+# round-trips to exactly the same JSON.
+
+FIELDS = ("name", "city", "age", "gender", "height", "weight", "bmi", "verdict")
+INTERNED_FIELDS = ("city", "gender", "verdict")
+POOLED_FIELDS = ("height", "weight", "bmi")
+
+# Distinct floats kept in the pool (beyond that, new values are stored unshared)
+FLOAT_POOL_SIZE = 1 << 16
+
+_MISSING = object()  # slot value of a field the record does not have
+_POSITION = {field: position for position, field in enumerate(FIELDS)}
+_float_pool: Dict[float, float] = {}
+
+Record = Union["PatientRecord", Dict[str, Any]]
+
+
+def _shared(field: str, value: Any) -> Any:
+    if field in INTERNED_FIELDS:
+        return sys.intern(value) if type(value) is str else value
+    if field in POOLED_FIELDS and type(value) is float and value:  # 0.0 == -0.0, keep their signs apart
+        pooled = _float_pool.get(value)
+        if pooled is not None:
+            return pooled
+        if len(_float_pool) < FLOAT_POOL_SIZE:
+            _float_pool[value] = value
+    return value
+
+
+class PatientRecord(Mapping):
+    __slots__ = FIELDS + ("extra", "complete")
+
+    def __init__(self, record: Dict[str, Any]):
+        for field in FIELDS:
+            value = record.get(field, _MISSING)
+            object.__setattr__(self, field, value if value is _MISSING else _shared(field, value))
+        object.__setattr__(self, "complete", all(field in record for field in FIELDS))
+        # Fields beyond the usual ones (they always come after them, see compact())
+        extra = {key: value for key, value in record.items() if key not in _POSITION}
+        object.__setattr__(self, "extra", extra or None)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("PatientRecord is read-only")
+
+    # -------------------- Mapping --------------------
+
+    def __getitem__(self, key: str) -> Any:
+        if key in _POSITION:
+            value = getattr(self, key)
+            if value is not _MISSING:
+                return value
+        elif self.extra is not None and key in self.extra:
+            return self.extra[key]
+        raise KeyError(key)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        if key in _POSITION:
+            value = getattr(self, key)
+            return default if value is _MISSING else value
+        return self.extra.get(key, default) if self.extra is not None else default
+
+    def __contains__(self, key: object) -> bool:
+        return self.get(key, _MISSING) is not _MISSING  # type: ignore[arg-type]
+
+    def __iter__(self) -> Iterator[str]:
+        for field in FIELDS:
+            if getattr(self, field) is not _MISSING:
+                yield field
+        if self.extra is not None:
+            yield from self.extra
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    def to_dict(self) -> Dict[str, Any]:
+        if self.complete:
+            # The usual case, spelled out: a dict display is several times faster than a loop
+            record = {
+                "name": self.name, "city": self.city, "age": self.age, "gender": self.gender,
+                "height": self.height, "weight": self.weight, "bmi": self.bmi, "verdict": self.verdict,
+            }
+        else:
+            record = {field: value for field in FIELDS if (value := getattr(self, field)) is not _MISSING}
+        if self.extra is not None:
+            record.update(self.extra)
+        return record
+
+    def __repr__(self) -> str:
+        return f"PatientRecord({self.to_dict()!r})"
+
+
+def compact(record: Record) -> Record:
+    """
+    The compact form of a record (a PatientRecord), or the record itself if it cannot
+    be stored compactly without changing its key order.
+    """
+    if not isinstance(record, dict):
+        return record
+
+    position = -1
+    for key in record:
+        key_position = _POSITION.get(key, len(FIELDS))
+        if key_position < position:
+            return record
+        position = key_position
+    return PatientRecord(record)
+
+
+def to_dict(record: Record) -> Dict[str, Any]:
+    """Plain dict of a record (for API responses and JSON files)."""
+    return record.to_dict() if type(record) is PatientRecord else record
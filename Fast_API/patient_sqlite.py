@@ -0,0 +1,633 @@
+# -------------------- Imports --------------------
+
+import json
+import os
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from group_commit import GroupCommitWriter, Outcome
+from metrics import stage_timer
+from patient_columns import Range, normalize, project
+from patient_stats import UNKNOWN, summarize
+from patient_store import BULK_FAILED, BULK_OK, BULK_ROLLED_BACK, Change, Version, merge_changes
+
+
+# -------------------- SQLite Patient Store --------------------
+# PATIENT_STORAGE=sqlite keeps the patients in an SQLite database instead of memory.
+# The store has the same methods as PatientStore (patient_store.py), so main.py and
+# patient.py do not care which one they get.
+#
+# - Each record is stored as JSON in the `data` column (any field round-trips unchanged).
+# - city / height / weight / bmi are generated columns extracted from that JSON and
+#   indexed, so /sort is an index scan instead of a Python sort over every patient.
+# - journal_mode=WAL: readers never block the writer and vice versa.
+# - Writes use the group commit writer: one transaction per batch of requests.
+# - Triggers keep the versions used for ETags: patient_meta holds the dataset version,
+#   patient_versions the version of each record's last change. They live in the database,
+#   so every process (and migrate_patients.py) sees and bumps the same versions.
+# - Triggers also keep the /stats aggregates (patient_stats, patient_stats_verdicts):
+#   counts, BMI sums and verdict histograms per group, so /stats does not scan the table.
+#
+# PATIENT_SQLITE_PATH        → database file (default: patient.json → patient.db)
+# PATIENT_SQLITE_POOL_SIZE   → pooled connections (default 8)
+# PATIENT_SQLITE_SYNCHRONOUS → FULL (default, every commit survives power loss) or NORMAL
+#
+# Import an existing patient.json with migrate_patients.py.
+
+Record = Dict[str, Any]
+
+# A mutation runs inside the batch transaction and returns the caller's result
+Mutation = Callable[[sqlite3.Connection], Any]
+
+SQLITE_PATH = os.getenv("PATIENT_SQLITE_PATH")
+POOL_SIZE = int(os.getenv("PATIENT_SQLITE_POOL_SIZE", "8"))
+SYNCHRONOUS = os.getenv("PATIENT_SQLITE_SYNCHRONOUS", "FULL").upper()
+
+# Indexed columns (and the only columns /sort may use)
+INDEXED_FIELDS = ("city", "height", "weight", "bmi")
+SORT_FIELDS = ("height", "weight", "bmi")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS patients (
+    id     TEXT PRIMARY KEY,
+    data   TEXT NOT NULL,
+    city   TEXT GENERATED ALWAYS AS (json_extract(data, '$.city'))   VIRTUAL,
+    height REAL GENERATED ALWAYS AS (json_extract(data, '$.height')) VIRTUAL,
+    weight REAL GENERATED ALWAYS AS (json_extract(data, '$.weight')) VIRTUAL,
+    bmi    REAL GENERATED ALWAYS AS (json_extract(data, '$.bmi'))    VIRTUAL
+);
+""" + "".join(
+    f"CREATE INDEX IF NOT EXISTS idx_patients_{field} ON patients({field});\n" for field in INDEXED_FIELDS
+) + (
+    # /patients/query matches cities case-insensitively
+    "CREATE INDEX IF NOT EXISTS idx_patients_city_normalized ON patients(lower(trim(city)));\n"
+)
+
+# Current time as a UNIX timestamp with sub-second precision
+NOW = "((julianday('now') - 2440587.5) * 86400.0)"
+
+VERSIONS_SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS patient_meta (
+    id          INTEGER PRIMARY KEY CHECK (id = 1),
+    epoch       TEXT NOT NULL,
+    version     INTEGER NOT NULL,
+    modified_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS patient_versions (
+    id          TEXT PRIMARY KEY,
+    version     INTEGER NOT NULL,
+    modified_at REAL NOT NULL
+) WITHOUT ROWID;
+""" + "".join(
+    f"""
+CREATE TRIGGER IF NOT EXISTS patients_version_{event.lower()} AFTER {event} ON patients BEGIN
+    UPDATE patient_meta SET version = version + 1, modified_at = {NOW};
+    {record_change};
+END;
+"""
+    for event, record_change in (
+        ("INSERT", "INSERT OR REPLACE INTO patient_versions SELECT NEW.id, version, modified_at FROM patient_meta"),
+        ("UPDATE", "INSERT OR REPLACE INTO patient_versions SELECT NEW.id, version, modified_at FROM patient_meta"),
+        ("DELETE", "DELETE FROM patient_versions WHERE id = OLD.id"),
+    )
+)
+
+# The random epoch keeps versions of a re-created database from matching old ETags
+INIT_VERSION = f"INSERT OR IGNORE INTO patient_meta VALUES (1, lower(hex(randomblob(4))), 0, {NOW})"
+
+# /stats groups and the SQL expression of a patient's key in each ({row} is "NEW.", "OLD." or "")
+STATS_GROUPS = {
+    "total": "'total'",
+    "city": f"COALESCE({{row}}city, '{UNKNOWN}')",
+    "gender": f"COALESCE(json_extract({{row}}data, '$.gender'), '{UNKNOWN}')",
+}
+VERDICT = "json_extract({row}data, '$.verdict')"
+
+
+def _group_key(field: str, row: str = "") -> str:
+    return STATS_GROUPS[field].format(row=row)
+
+
+def _stats_change(row: str, sign: int) -> str:
+    """Trigger statements adding (sign 1) or removing (sign -1) one patient's contribution."""
+    groups = ", ".join(
+        f"('{field}', {_group_key(field, row)}, {sign}, {sign} * ({row}bmi IS NOT NULL), "
+        f"{sign} * COALESCE({row}bmi, 0.0), {sign} * COALESCE({row}bmi * {row}bmi, 0.0))"
+        for field in STATS_GROUPS
+    )
+    verdicts = ", ".join(
+        f"('{field}', {_group_key(field, row)}, {VERDICT.format(row=row)}, {sign})" for field in STATS_GROUPS
+    )
+    statements = f"""
+    INSERT INTO patient_stats VALUES {groups}
+        ON CONFLICT (field, key) DO UPDATE SET
+            count = count + excluded.count, bmi_count = bmi_count + excluded.bmi_count,
+            bmi_sum = bmi_sum + excluded.bmi_sum, bmi_sum_sq = bmi_sum_sq + excluded.bmi_sum_sq;
+    INSERT INTO patient_stats_verdicts SELECT * FROM (VALUES {verdicts}) WHERE column3 IS NOT NULL
+        ON CONFLICT (field, key, verdict) DO UPDATE SET count = count + excluded.count;"""
+    if sign < 0:
+        # Forget the groups this patient emptied
+        keys = ", ".join(f"('{field}', {_group_key(field, row)})" for field in STATS_GROUPS)
+        statements += f"""
+    DELETE FROM patient_stats WHERE count = 0 AND (field, key) IN (VALUES {keys});
+    DELETE FROM patient_stats_verdicts WHERE count = 0 AND (field, key) IN (VALUES {keys});"""
+    return statements
+
+
+# Created and filled from the existing rows in one write transaction (see ensure_stats)
+STATS_SCHEMA = [
+    """CREATE TABLE patient_stats (
+    field      TEXT NOT NULL,
+    key        TEXT NOT NULL,
+    count      INTEGER NOT NULL,
+    bmi_count  INTEGER NOT NULL,
+    bmi_sum    REAL NOT NULL,
+    bmi_sum_sq REAL NOT NULL,
+    PRIMARY KEY (field, key)
+) WITHOUT ROWID""",
+    """CREATE TABLE patient_stats_verdicts (
+    field   TEXT NOT NULL,
+    key     TEXT NOT NULL,
+    verdict TEXT NOT NULL,
+    count   INTEGER NOT NULL,
+    PRIMARY KEY (field, key, verdict)
+) WITHOUT ROWID""",
+    # BMI min / max of a group are index seeks
+    f"CREATE INDEX IF NOT EXISTS idx_patients_stats_city ON patients({_group_key('city')}, bmi)",
+    f"CREATE INDEX IF NOT EXISTS idx_patients_stats_gender ON patients({_group_key('gender')}, bmi)",
+    f"CREATE TRIGGER patients_stats_insert AFTER INSERT ON patients BEGIN{_stats_change('NEW.', 1)}\nEND",
+    f"CREATE TRIGGER patients_stats_update AFTER UPDATE ON patients BEGIN"
+    f"{_stats_change('OLD.', -1)}{_stats_change('NEW.', 1)}\nEND",
+    f"CREATE TRIGGER patients_stats_delete AFTER DELETE ON patients BEGIN{_stats_change('OLD.', -1)}\nEND",
+] + [
+    statement
+    for field in STATS_GROUPS
+    for statement in (
+        f"INSERT INTO patient_stats SELECT '{field}', {_group_key(field)}, COUNT(*), COUNT(bmi), "
+        f"COALESCE(SUM(bmi), 0.0), COALESCE(SUM(bmi * bmi), 0.0) FROM patients GROUP BY 2",
+        f"INSERT INTO patient_stats_verdicts SELECT '{field}', {_group_key(field)}, {VERDICT.format(row='')}, COUNT(*) "
+        f"FROM patients WHERE {VERDICT.format(row='')} IS NOT NULL GROUP BY 2, 3",
+    )
+]
+
+STATS_MIN_MAX = {
+    field: f"SELECT (SELECT MIN(bmi) FROM patients WHERE {_group_key(field)} = ?), "
+           f"(SELECT MAX(bmi) FROM patients WHERE {_group_key(field)} = ?)"
+    for field in STATS_GROUPS
+}
+
+UPSERT = "INSERT INTO patients (id, data) VALUES (?, ?) ON CONFLICT(id) DO UPDATE SET data = excluded.data"
+
+
+def database_path_for(json_path: str) -> str:
+    """PATIENT_SQLITE_PATH, or the patient file with a .db extension (patient.json → patient.db)."""
+    return os.path.abspath(SQLITE_PATH or os.path.splitext(json_path)[0] + ".db")
+
+
+def encode(record: Record) -> str:
+    return json.dumps(record, separators=(",", ":"))
+
+
+def connect(path: str, synchronous: str = SYNCHRONOUS) -> sqlite3.Connection:
+    """
+    Opens a connection in autocommit mode (transactions are started explicitly)
+    and makes sure the schema exists.
+    """
+    conn = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute(f"PRAGMA synchronous={synchronous}")
+    conn.executescript(SCHEMA + VERSIONS_SCHEMA)
+    # Checked first, so opening a connection does not wait for the write lock
+    if conn.execute("SELECT 1 FROM patient_meta").fetchone() is None:
+        conn.execute(INIT_VERSION)
+    ensure_stats(conn)
+    return conn
+
+
+def ensure_stats(conn: sqlite3.Connection):
+    """
+    Creates the /stats tables and triggers of a database that has none yet and fills them
+    from the existing rows. Both happen in one write transaction, so every concurrent
+    write is counted exactly once (by the initial scan or by the triggers).
+    """
+    exists = "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'patient_stats'"
+    if conn.execute(exists).fetchone() is not None:
+        return
+
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        if conn.execute(exists).fetchone() is None:
+            for statement in STATS_SCHEMA:
+                conn.execute(statement)
+        conn.execute("COMMIT")
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+
+
+def import_records(conn: sqlite3.Connection, items: Iterable[Tuple[str, Record]], batch_size: int = 10_000,
+                   on_batch: Optional[Callable[[int], None]] = None) -> int:
+    """
+    Upserts (ID, record) pairs, one transaction per `batch_size` rows.
+    Returns the number of rows written; on_batch(total so far) is called after each commit.
+    """
+    total = 0
+    batch: List[Tuple[str, str]] = []
+
+    def flush():
+        nonlocal total
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.executemany(UPSERT, batch)
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        total += len(batch)
+        batch.clear()
+        if on_batch is not None:
+            on_batch(total)
+
+    for patient_id, record in items:
+        batch.append((patient_id, encode(record)))
+        if len(batch) >= batch_size:
+            flush()
+    if batch:
+        flush()
+
+    return total
+
+
+# -------------------- Connection Pool --------------------
+
+class ConnectionPool:
+    """
+    At most `size` connections, created on demand and reused.
+    sqlite3 connections are not safe to use from two threads at once, so every
+    request borrows one for the duration of a query and hands it back.
+    """
+
+    def __init__(self, path: str, size: int = POOL_SIZE):
+        self.path = path
+        self.size = size
+        self._idle: "queue.LifoQueue[sqlite3.Connection]" = queue.LifoQueue()
+        self._created = 0
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        conn = self._acquire()
+        try:
+            yield conn
+        finally:
+            self._idle.put(conn)
+
+    def _acquire(self) -> sqlite3.Connection:
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+
+        with self._lock:
+            if self._created < self.size:
+                self._created += 1
+                try:
+                    return connect(self.path)
+                except BaseException:
+                    self._created -= 1
+                    raise
+
+        # Pool exhausted: wait for a connection to come back
+        return self._idle.get()
+
+    def close(self):
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
+            with self._lock:
+                self._created -= 1
+
+
+# -------------------- Store --------------------
+
+class SqlitePatientStore:
+    """
+    Patient store backed by SQLite (same interface as PatientStore).
+
+    - Reads borrow a pooled connection; lookups use the primary key,
+      sorted reads walk the height / weight / bmi indexes.
+    - Writes are queued for the group commit writer, which runs each batch in one
+      transaction (one savepoint per request, so one failing request does not
+      undo the others) and acknowledges the requests after COMMIT.
+    """
+
+    def __init__(self, path: str, pool_size: int = POOL_SIZE, commit_interval_ms: float = 0.0, max_batch: int = 1024):
+        self.path = path
+        self.pool = ConnectionPool(path, pool_size)
+        self._writer = GroupCommitWriter(self._commit_batch, commit_interval_ms, max_batch)
+
+        # Create the database and schema right away, so a bad path fails early
+        with self.pool.connection():
+            pass
+
+    # -------------------- Group Commit --------------------
+
+    def _submit(self, mutation: Mutation) -> Any:
+        return self._writer.submit(mutation)
+
+    def _commit_batch(self, mutations: Sequence[Mutation]) -> List[Outcome]:
+        outcomes: List[Outcome] = []
+
+        with self.pool.connection() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                for mutation in mutations:
+                    conn.execute("SAVEPOINT request")
+                    try:
+                        outcomes.append((mutation(conn), None))
+                    except Exception as exc:
+                        conn.execute("ROLLBACK TO request")
+                        outcomes.append((None, exc))
+                    conn.execute("RELEASE request")
+
+                with stage_timer("patient_store", "persist"):
+                    conn.execute("COMMIT")
+            except BaseException:
+                if conn.in_transaction:
+                    conn.execute("ROLLBACK")
+                raise
+
+        return outcomes
+
+    def commit_stats(self) -> Dict[str, Any]:
+        return {"storage": "sqlite", **self._writer.stats()}
+
+    # -------------------- Reads --------------------
+
+    def _query(self, sql: str, parameters: Sequence[Any] = ()) -> List[Tuple]:
+        with self.pool.connection() as conn:
+            return conn.execute(sql, parameters).fetchall()
+
+    def get(self, patient_id: str) -> Optional[Record]:
+        rows = self._query("SELECT data FROM patients WHERE id = ?", (patient_id,))
+        return json.loads(rows[0][0]) if rows else None
+
+    def contains(self, patient_id: str) -> bool:
+        return bool(self._query("SELECT 1 FROM patients WHERE id = ?", (patient_id,)))
+
+    def all(self) -> Dict[str, Record]:
+        """{ID: record} in insertion order."""
+        with stage_timer("patient_store", "load"):
+            rows = self._query("SELECT id, data FROM patients ORDER BY rowid")
+        return {patient_id: json.loads(data) for patient_id, data in rows}
+
+    def records(self) -> List[Record]:
+        return [json.loads(data) for (data,) in self._query("SELECT data FROM patients ORDER BY rowid")]
+
+    def scan_page(self, limit: Optional[int] = None,
+                  after: Optional[int] = None) -> Tuple[List[Tuple[str, Record]], Optional[int]]:
+        """(ID, record) pairs in insertion order after rowid `after` (same contract as PatientStore.scan_page)."""
+        rows = self._query(
+            "SELECT rowid, id, data FROM patients WHERE rowid > ? ORDER BY rowid LIMIT ?",
+            (after or 0, -1 if limit is None else limit + 1),
+        )
+
+        has_more = limit is not None and len(rows) > limit
+        rows = rows[:limit] if has_more else rows
+        next_after = rows[-1][0] if has_more else None
+        return [(patient_id, json.loads(data)) for _, patient_id, data in rows], next_after
+
+    def query(self, equals: Dict[str, Sequence[Any]], ranges: Dict[str, Range], fields: Optional[List[str]] = None,
+              limit: int = 100, after: Optional[int] = None) -> Tuple[List[Record], int, Optional[int]]:
+        """
+        Filtered patients as SQL (same contract as PatientStore.query).
+        city / height / weight / bmi filters use their indexes; other fields are read from the JSON.
+        """
+        conditions: List[str] = []
+        parameters: List[Any] = []
+
+        def column(field: str) -> str:
+            return field if field in INDEXED_FIELDS else f"json_extract(data, '$.{field}')"
+
+        for field, values in equals.items():
+            conditions.append(f"lower(trim({column(field)})) IN ({', '.join('?' * len(values))})")
+            parameters.extend(normalize(value) for value in values)
+
+        for field, (low, high) in ranges.items():
+            if low is not None:
+                conditions.append(f"{column(field)} >= ?")
+                parameters.append(low)
+            if high is not None:
+                conditions.append(f"{column(field)} <= ?")
+                parameters.append(high)
+
+        where = " AND ".join(conditions) or "1"
+        total = self._query(f"SELECT COUNT(*) FROM patients WHERE {where}", parameters)[0][0]
+        rows = self._query(
+            f"SELECT rowid, id, data FROM patients WHERE ({where}) AND rowid > ? ORDER BY rowid LIMIT ?",
+            parameters + [after or 0, limit + 1],
+        )
+
+        next_after = rows[limit - 1][0] if len(rows) > limit else None
+        return [project(patient_id, json.loads(data), fields) for _, patient_id, data in rows[:limit]], total, next_after
+
+    def stats(self, recompute: bool = False) -> Dict[str, Any]:
+        """
+        Same aggregates as PatientStore.stats.
+        - Counts, BMI sums and verdicts come from the tables the triggers keep up to date,
+          min / max from index seeks: O(groups · log N) per call.
+        - recompute=True computes everything from scratch with GROUP BY scans (O(N)),
+          so /stats?recompute=true checks the maintained tables against the data.
+        """
+        if recompute:
+            return self._scan_stats()
+
+        result: Dict[str, Any] = {"total": summarize(0, 0, 0.0, 0.0, None, None, {}), "by_city": {}, "by_gender": {}}
+        with self.pool.connection() as conn:
+            conn.execute("BEGIN")  # one snapshot for all the queries below
+            try:
+                verdicts: Dict[Tuple[str, str], Dict[str, int]] = {}
+                for field, key, verdict, count in conn.execute("SELECT * FROM patient_stats_verdicts"):
+                    verdicts.setdefault((field, key), {})[verdict] = count
+
+                groups = conn.execute("SELECT * FROM patient_stats ORDER BY field, key").fetchall()
+                for field, key, count, bmi_count, bmi_sum, bmi_sum_sq in groups:
+                    bmi_min, bmi_max = conn.execute(STATS_MIN_MAX[field], (key, key)).fetchone()
+                    summary = summarize(count, bmi_count, bmi_sum, bmi_sum_sq, bmi_min, bmi_max,
+                                        verdicts.get((field, key), {}))
+                    if field == "total":
+                        result["total"] = summary
+                    else:
+                        result[f"by_{field}"][key] = summary
+            finally:
+                conn.execute("COMMIT")
+
+        return result
+
+    def _scan_stats(self) -> Dict[str, Any]:
+        """The /stats aggregates computed with GROUP BY queries over every patient."""
+        result: Dict[str, Any] = {}
+
+        for name in STATS_GROUPS:
+            expression = _group_key(name)
+            verdicts: Dict[str, Dict[str, int]] = {}
+            for key, verdict, count in self._query(
+                f"SELECT {expression}, json_extract(data, '$.verdict') AS verdict, COUNT(*) FROM patients "
+                f"WHERE verdict IS NOT NULL GROUP BY 1, 2"
+            ):
+                verdicts.setdefault(str(key), {})[str(verdict)] = count
+
+            summaries = {
+                str(key): summarize(count, bmi_count, bmi_sum or 0.0, bmi_sum_sq or 0.0, bmi_min, bmi_max,
+                                    verdicts.get(str(key), {}))
+                for key, count, bmi_count, bmi_sum, bmi_sum_sq, bmi_min, bmi_max in self._query(
+                    f"SELECT {expression}, COUNT(*), COUNT(bmi), SUM(bmi), SUM(bmi * bmi), MIN(bmi), MAX(bmi) "
+                    f"FROM patients GROUP BY 1 ORDER BY 1"
+                )
+            }
+
+            if name == "total":
+                result["total"] = summaries.get("total") or summarize(0, 0, 0.0, 0.0, None, None, {})
+            else:
+                result[f"by_{name}"] = summaries
+
+        return result
+
+    def sort_page(self, field: str, descending: bool = False, limit: Optional[int] = None, offset: int = 0,
+                  after: Optional[Tuple[Optional[float], int]] = None) -> Tuple[List[Record], Optional[Tuple]]:
+        """
+        Records ordered by an indexed field (same contract as PatientStore.sort_page).
+        - Ties keep insertion order (like Python's stable sort); missing values sort first (asc) / last (desc).
+        - `after` is (value, rowid) of the last record of the previous page: keyset pagination,
+          so a page is an index seek plus `limit` rows, however deep it is.
+        """
+        if field not in SORT_FIELDS:
+            raise ValueError(f"Cannot sort by {field!r}, must be one of {SORT_FIELDS}")
+
+        where, parameters = "", []
+        if after is not None:
+            value, rowid = after
+            if value is None:
+                where = f"WHERE ({field} IS NULL AND rowid > ?)" + ("" if descending else f" OR {field} IS NOT NULL")
+                parameters = [rowid]
+            elif descending:
+                where = f"WHERE {field} < ? OR ({field} = ? AND rowid > ?) OR {field} IS NULL"
+                parameters = [value, value, rowid]
+            else:
+                where = f"WHERE {field} > ? OR ({field} = ? AND rowid > ?)"
+                parameters = [value, value, rowid]
+
+        # One extra row tells whether there is a next page
+        direction = "DESC" if descending else "ASC"
+        rows = self._query(
+            f"SELECT rowid, {field}, data FROM patients {where} ORDER BY {field} {direction}, rowid LIMIT ? OFFSET ?",
+            parameters + [-1 if limit is None else limit + 1, offset],
+        )
+
+        has_more = limit is not None and len(rows) > limit
+        rows = rows[:limit] if has_more else rows
+        next_after = (rows[-1][1], rows[-1][0]) if has_more else None
+        return [json.loads(data) for _, _, data in rows], next_after
+
+    def __len__(self) -> int:
+        return self._query("SELECT COUNT(*) FROM patients")[0][0]
+
+    def version(self) -> Version:
+        """Version of the whole dataset (same contract as PatientStore.version)."""
+        epoch, version, modified = self._query("SELECT epoch, version, modified_at FROM patient_meta")[0]
+        return f"{epoch}-{version}", modified
+
+    def record_version(self, patient_id: str) -> Optional[Version]:
+        """
+        Version of one patient, or None if it does not exist.
+        Patients not changed since the database was created without versions get version 0.
+        """
+        rows = self._query(
+            "SELECT m.epoch, v.version, v.modified_at FROM patients p JOIN patient_meta m "
+            "LEFT JOIN patient_versions v ON v.id = p.id WHERE p.id = ?",
+            (patient_id,),
+        )
+        if not rows:
+            return None
+        epoch, version, modified = rows[0]
+        return f"{epoch}-{version or 0}", modified
+
+    # -------------------- Writes --------------------
+
+    def create(self, patient_id: str, record: Record) -> bool:
+        """Adds a patient. Returns False if the ID already exists."""
+        def mutation(conn):
+            cursor = conn.execute(
+                "INSERT INTO patients (id, data) VALUES (?, ?) ON CONFLICT(id) DO NOTHING", (patient_id, encode(record))
+            )
+            return cursor.rowcount == 1
+
+        return self._submit(mutation)
+
+    def update(self, patient_id: str, changes: Record) -> Optional[Record]:
+        """Applies the changed fields. Returns the updated record, or None if not found."""
+        def mutation(conn):
+            row = conn.execute("SELECT data FROM patients WHERE id = ?", (patient_id,)).fetchone()
+            if row is None:
+                return None
+            updated = merge_changes(json.loads(row[0]), changes)
+            conn.execute("UPDATE patients SET data = ? WHERE id = ?", (encode(updated), patient_id))
+            return updated
+
+        return self._submit(mutation)
+
+    def delete(self, patient_id: str) -> bool:
+        """Removes a patient. Returns False if the ID does not exist."""
+        def mutation(conn):
+            return conn.execute("DELETE FROM patients WHERE id = ?", (patient_id,)).rowcount == 1
+
+        return self._submit(mutation)
+
+    def bulk_write(self, changes: List[Change], atomic: bool = False) -> List[str]:
+        """Many creates / updates / deletes in one transaction (same contract as PatientStore.bulk_write)."""
+        def mutation(conn):
+            conn.execute("SAVEPOINT bulk")
+            statuses: List[str] = []
+
+            for kind, patient_id, payload in changes:
+                if kind == "create":
+                    cursor = conn.execute(
+                        "INSERT INTO patients (id, data) VALUES (?, ?) ON CONFLICT(id) DO NOTHING",
+                        (patient_id, encode(payload)),
+                    )
+                    done = cursor.rowcount == 1
+                elif kind == "update":
+                    row = conn.execute("SELECT data FROM patients WHERE id = ?", (patient_id,)).fetchone()
+                    done = row is not None
+                    if done:
+                        conn.execute(
+                            "UPDATE patients SET data = ? WHERE id = ?", (encode(merge_changes(json.loads(row[0]), payload)), patient_id)
+                        )
+                else:
+                    done = conn.execute("DELETE FROM patients WHERE id = ?", (patient_id,)).rowcount == 1
+
+                statuses.append(BULK_OK[kind] if done else ("duplicate" if kind == "create" else "not_found"))
+
+            if atomic and any(status in BULK_FAILED for status in statuses):
+                conn.execute("ROLLBACK TO bulk")
+                statuses = [status if status in BULK_FAILED else BULK_ROLLED_BACK for status in statuses]
+            conn.execute("RELEASE bulk")
+            return statuses
+
+        return self._submit(mutation)
+
+    def replace_all(self, data: Dict[str, Record]):
+        """Replaces the whole dataset in one transaction (used by the legacy save_data helper)."""
+        def mutation(conn):
+            conn.execute("DELETE FROM patients")
+            conn.executemany(UPSERT, [(patient_id, encode(record)) for patient_id, record in data.items()])
+
+        self._submit(mutation)
+
+    def close(self):
+        self.pool.close()
@@ -0,0 +1,151 @@
+# -------------------- Imports --------------------
+
+import math
+from bisect import bisect_left, insort
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+
+# -------------------- Patient Statistics --------------------
+# Aggregates for /stats: patient counts, BMI count / sum / sum of squares / min / max and
+# verdict histograms, overall and grouped by city and gender.
+#
+# PatientStore builds them on the first /stats request and then applies every saved
+# create / edit / delete to them, so a read costs O(number of groups), not O(patients).
+# Each patient's contribution is remembered, so an edit or delete subtracts exactly
+# what was added. Min / max come from a sorted list of BMI values per group, so they
+# stay correct when the current minimum is deleted.
+
+GROUP_FIELDS = ("city", "gender")
+UNKNOWN = "unknown"
+
+# What one patient adds to the aggregates: (city, gender, bmi or None, verdict or None)
+Contribution = Tuple[str, str, Optional[float], Optional[str]]
+
+
+def contribution(record: Dict[str, Any]) -> Contribution:
+    bmi = record.get("bmi")
+    if isinstance(bmi, bool) or not isinstance(bmi, (int, float)) or bmi != bmi:  # bmi != bmi → NaN
+        bmi = None
+    verdict = record.get("verdict")
+    return (
+        str(record["city"]) if record.get("city") is not None else UNKNOWN,
+        str(record["gender"]) if record.get("gender") is not None else UNKNOWN,
+        float(bmi) if bmi is not None else None,
+        str(verdict) if verdict is not None else None,
+    )
+
+
+def summarize(count: int, bmi_count: int, bmi_sum: float, bmi_sum_sq: float, bmi_min: Optional[float],
+              bmi_max: Optional[float], verdicts: Dict[str, int]) -> Dict[str, Any]:
+    """One group in the /stats response (mean and standard deviation derived from the sums)."""
+    mean = bmi_sum / bmi_count if bmi_count else None
+    std = math.sqrt(max(bmi_sum_sq / bmi_count - mean ** 2, 0.0)) if bmi_count else None
+    return {
+        "count": count,
+        "bmi": {
+            "count": bmi_count,
+            "sum": round(bmi_sum, 6),
+            "sum_sq": round(bmi_sum_sq, 6),
+            "mean": round(mean, 4) if mean is not None else None,
+            "std": round(std, 4) if std is not None else None,
+            "min": bmi_min,
+            "max": bmi_max,
+        },
+        "verdicts": dict(sorted(verdicts.items())),
+    }
+
+
+class GroupStats:
+    def __init__(self):
+        self.count = 0
+        self.bmi_sum = 0.0
+        self.bmi_sum_sq = 0.0
+        self.bmi_values: List[float] = []  # sorted, for min / max
+        self.verdicts: Counter = Counter()
+
+    def add(self, bmi: Optional[float], verdict: Optional[str]):
+        self.count += 1
+        if bmi is not None:
+            self.bmi_sum += bmi
+            self.bmi_sum_sq += bmi * bmi
+            insort(self.bmi_values, bmi)
+        if verdict is not None:
+            self.verdicts[verdict] += 1
+
+    def remove(self, bmi: Optional[float], verdict: Optional[str]):
+        self.count -= 1
+        if bmi is not None:
+            self.bmi_sum -= bmi
+            self.bmi_sum_sq -= bmi * bmi
+            del self.bmi_values[bisect_left(self.bmi_values, bmi)]
+        if verdict is not None:
+            self.verdicts[verdict] -= 1
+            if not self.verdicts[verdict]:
+                del self.verdicts[verdict]
+
+    def summary(self) -> Dict[str, Any]:
+        values = self.bmi_values
+        return summarize(
+            self.count, len(values), self.bmi_sum, self.bmi_sum_sq,
+            values[0] if values else None, values[-1] if values else None, self.verdicts,
+        )
+
+
+class PatientStats:
+    def __init__(self):
+        self.total = GroupStats()
+        self.groups: Dict[str, Dict[str, GroupStats]] = {field: {} for field in GROUP_FIELDS}
+        self.contributions: Dict[str, Contribution] = {}
+
+    @classmethod
+    def build(cls, items: Iterable[Tuple[str, Dict[str, Any]]]) -> "PatientStats":
+        stats = cls()
+        for patient_id, record in items:
+            stats.put(patient_id, record)
+        return stats
+
+    def _targets(self, city: str, gender: str) -> List[GroupStats]:
+        return [
+            self.total,
+            self.groups["city"].setdefault(city, GroupStats()),
+            self.groups["gender"].setdefault(gender, GroupStats()),
+        ]
+
+    def put(self, patient_id: str, record: Dict[str, Any]):
+        """Adds a new patient, or replaces the contribution of an edited one."""
+        self.delete(patient_id)
+        city, gender, bmi, verdict = self.contributions[patient_id] = contribution(record)
+        for group in self._targets(city, gender):
+            group.add(bmi, verdict)
+
+    def delete(self, patient_id: str):
+        previous = self.contributions.pop(patient_id, None)
+        if previous is None:
+            return
+        city, gender, bmi, verdict = previous
+        for group in self._targets(city, gender):
+            group.remove(bmi, verdict)
+
+        # Forget groups that became empty
+        for field, key in (("city", city), ("gender", gender)):
+            if not self.groups[field][key].count:
+                del self.groups[field][key]
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "total": self.total.summary(),
+            **{
+                f"by_{field}": {key: group.summary() for key, group in sorted(groups.items())}
+                for field, groups in self.groups.items()
+            },
+        }
+
+
+def same_summary(a: Any, b: Any, tolerance: float = 1e-4) -> bool:
+    """Compares two summaries, allowing float rounding drift from incremental updates."""
+    if isinstance(a, dict) and isinstance(b, dict):
+        return a.keys() == b.keys() and all(same_summary(a[key], b[key], tolerance) for key in a)
+    if isinstance(a, float) or isinstance(b, float):
+        return a is not None and b is not None and math.isclose(a, b, rel_tol=1e-9, abs_tol=tolerance)
+    return a == b
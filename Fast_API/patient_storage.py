@@ -0,0 +1,290 @@
+# -------------------- Imports --------------------
+
+import json
+import os
+import tempfile
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+from metrics import stage_timer
+from patient_record import PatientRecord
+
+
+# -------------------- Storage Backends --------------------
+# How PatientStore (patient_store.py) keeps its in-memory data on disk.
+#
+# - JsonFileBackend: rewrites the whole patient.json on every change (original behaviour).
+# - WalBackend:      appends each change to patient.json.wal (O(1) per write, fsynced) and
+#                    periodically folds the log into a fresh patient.json snapshot.
+#
+# Every change is passed to write() as an operation:
+#     ("put", patient_id, full record)   → create / update
+#     ("del", patient_id, None)          → delete
+# Both operations are idempotent, so replaying a log entry twice is harmless.
+
+Record = Dict[str, Any]
+Operation = Tuple[str, str, Optional[Record]]
+Signature = Optional[Tuple[int, int, int]]
+
+
+class StorageError(Exception):
+    """Raised when stored patient data is unreadable (instead of silently returning no patients)."""
+
+
+def file_signature(path: str) -> Signature:
+    """(mtime, inode, size) of a file, or None if it does not exist."""
+    try:
+        info = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return info.st_mtime_ns, info.st_ino, info.st_size
+
+
+def json_default(value: Any) -> Any:
+    """Lets json write the compact records the store keeps in memory (patient_record.py)."""
+    if isinstance(value, PatientRecord):
+        return value.to_dict()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def write_temp_json(path: str, data: Any, indent: Optional[int] = None) -> str:
+    """
+    Writes JSON to a fsynced temp file in the same folder as `path` and returns its path,
+    ready to be renamed over `path`. It gets the permissions of the file it will replace.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, temp_path = tempfile.mkstemp(prefix=".patient-", suffix=".tmp", dir=directory)
+    try:
+        with os.fdopen(fd, "w") as f:
+            json.dump(data, f, indent=indent, default=json_default)
+            f.flush()
+            os.fsync(f.fileno())
+
+        try:
+            os.chmod(temp_path, os.stat(path).st_mode & 0o777)
+        except FileNotFoundError:
+            umask = os.umask(0)
+            os.umask(umask)
+            os.chmod(temp_path, 0o666 & ~umask)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+    return temp_path
+
+
+def atomic_write_json(path: str, data: Any, indent: Optional[int] = None):
+    """
+    Writes JSON to a temp file in the same folder, fsyncs it and renames it over `path`.
+    A crash leaves either the old or the new file, never a half-written one.
+    """
+    temp_path = write_temp_json(path, data, indent)
+    try:
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+
+def read_snapshot(path: str, strict: bool) -> Dict[str, Record]:
+    """
+    Reads a JSON snapshot.
+    - Missing file → no patients yet.
+    - Empty or corrupted file → {} when strict is False (legacy behaviour),
+      StorageError when strict is True.
+    """
+    if not os.path.exists(path):
+        return {}
+    try:
+        with stage_timer("patient_store", "load"), open(path, "r") as f:
+            return json.load(f)
+    except json.JSONDecodeError as exc:
+        if strict:
+            raise StorageError(f"{path} is corrupted: {exc}") from exc
+        return {}
+
+
+# -------------------- JSON File Backend --------------------
+
+class JsonFileBackend:
+    """Keeps patient.json as the only copy; every write rewrites it atomically."""
+
+    mode = "json"
+
+    def __init__(self, path: str, indent: Optional[int] = 4):
+        self.path = path
+        self.indent = indent
+
+    def signature(self) -> Tuple:
+        return (file_signature(self.path),)
+
+    def load(self) -> Dict[str, Record]:
+        return read_snapshot(self.path, strict=False)
+
+    def write(self, data: Dict[str, Record], operations: List[Operation]):
+        with stage_timer("patient_store", "persist"):
+            atomic_write_json(self.path, data, indent=self.indent)
+
+    def write_snapshot(self, data: Dict[str, Record]):
+        self.write(data, [])
+
+    def needs_compaction(self) -> bool:
+        return False
+
+    def close(self):
+        pass
+
+
+# -------------------- Write-Ahead Log Backend --------------------
+
+class WalBackend:
+    """
+    Snapshot (patient.json) + append-only log (patient.json.wal).
+
+    - write(): appends one compact JSON line per operation and fsyncs → durable, O(1).
+    - load(): reads the snapshot and replays the log on top of it.
+      A torn last line (crash mid-append) is dropped; any other damage raises StorageError.
+    - Compaction: the store writes a new snapshot atomically, then the log prefix
+      it covers is cut off (entries appended meanwhile are kept).
+    """
+
+    mode = "wal"
+
+    def __init__(self, path: str, indent: Optional[int] = 4, compact_after_bytes: int = 4 * 1024 * 1024):
+        self.path = path
+        self.log_path = path + ".wal"
+        self.indent = indent
+        self.compact_after_bytes = compact_after_bytes
+        self._log = None
+        self._log_lock = threading.Lock()
+
+    # -------------------- Reading --------------------
+
+    def signature(self) -> Tuple:
+        return file_signature(self.path), file_signature(self.log_path)
+
+    def load(self) -> Dict[str, Record]:
+        data = read_snapshot(self.path, strict=True)
+
+        if not os.path.exists(self.log_path):
+            return data
+
+        with open(self.log_path, "rb") as f:
+            content = f.read()
+
+        # Every entry ends with a newline; a last line without one is a torn append
+        offset = 0
+        while offset < len(content):
+            end = content.find(b"\n", offset)
+            if end == -1:
+                break
+            line = content[offset:end]
+            if line.strip():
+                try:
+                    self._apply(data, json.loads(line))
+                except (json.JSONDecodeError, KeyError) as exc:
+                    raise StorageError(f"{self.log_path} is corrupted at byte {offset}: {exc}") from exc
+            offset = end + 1
+
+        # Cut the torn tail so new entries start on a clean line
+        if offset < len(content):
+            with open(self.log_path, "r+b") as f:
+                f.truncate(offset)
+
+        return data
+
+    @staticmethod
+    def _apply(data: Dict[str, Record], entry: Dict[str, Any]):
+        if entry["op"] == "put":
+            data[entry["id"]] = entry["data"]
+        elif entry["op"] == "del":
+            data.pop(entry["id"], None)
+        else:
+            raise StorageError(f"Unknown log operation {entry['op']!r}")
+
+    # -------------------- Writing --------------------
+
+    def _open_log(self):
+        if self._log is None:
+            self._log = open(self.log_path, "ab")
+        return self._log
+
+    def write(self, data: Dict[str, Record], operations: List[Operation]):
+        payload = b"".join(
+            json.dumps({"op": op, "id": patient_id, "data": record} if op == "put" else {"op": op, "id": patient_id},
+                       separators=(",", ":"), default=json_default).encode() + b"\n"
+            for op, patient_id, record in operations
+        )
+        if not payload:
+            return
+
+        with stage_timer("patient_store", "persist"), self._log_lock:
+            log = self._open_log()
+            log.write(payload)
+            log.flush()
+            os.fsync(log.fileno())
+
+    def log_position(self) -> int:
+        """Current end of the log (everything before it is covered by the in-memory data)."""
+        with self._log_lock:
+            if self._log is not None:
+                self._log.flush()
+            return os.path.getsize(self.log_path) if os.path.exists(self.log_path) else 0
+
+    def needs_compaction(self) -> bool:
+        return self.log_position() >= self.compact_after_bytes
+
+    def write_snapshot(self, data: Dict[str, Record]):
+        """Writes a new snapshot atomically (the log is trimmed separately with trim_log)."""
+        self.install_snapshot(self.prepare_snapshot(data))
+
+    def prepare_snapshot(self, data: Dict[str, Record]) -> str:
+        """Writes a snapshot to a temp file (the slow part) without touching patient.json yet."""
+        with stage_timer("patient_store", "snapshot"):
+            return write_temp_json(self.path, data, indent=self.indent)
+
+    def install_snapshot(self, temp_path: str):
+        """Renames a prepared snapshot over patient.json."""
+        try:
+            os.replace(temp_path, self.path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+    def trim_log(self, covered: int):
+        """Drops the first `covered` bytes of the log, which are now part of the snapshot."""
+        with self._log_lock:
+            if self._log is not None:
+                self._log.close()
+                self._log = None
+
+            if not os.path.exists(self.log_path):
+                return
+
+            with open(self.log_path, "rb") as f:
+                f.seek(covered)
+                tail = f.read()
+
+            temp_path = self.log_path + ".tmp"
+            with open(temp_path, "wb") as f:
+                f.write(tail)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temp_path, self.log_path)
+
+    def close(self):
+        with self._log_lock:
+            if self._log is not None:
+                self._log.close()
+                self._log = None
+
+
+def make_backend(path: str, mode: str = "json", **options):
+    """Creates the backend for PATIENT_STORAGE mode 'json' or 'wal'."""
+    if mode == "json":
+        return JsonFileBackend(path)
+    if mode == "wal":
+        return WalBackend(path, **options)
+    raise ValueError(f"Unknown patient storage mode {mode!r}")
@@ -0,0 +1,535 @@
+# -------------------- Imports --------------------
+
+import os
+import secrets
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from features import compute_bmi, get_bmi_verdict
+from group_commit import GroupCommitWriter, Outcome
+from patient_columns import ColumnarTable, Range, project
+from patient_record import compact, to_dict
+from patient_stats import PatientStats
+from patient_storage import Operation, make_backend
+from sort_index import INSERTION_ORDER, After, SortIndex
+
+
+# -------------------- Patient Store --------------------
+# main.py and patient.py used to read and parse the whole patient.json on every request,
+# even to look up a single ID. The store loads the data once, serves reads from memory
+# and writes changes back to disk through a storage backend (see patient_storage.py).
+#
+# PATIENT_STORAGE=json → rewrite patient.json atomically on every change (default)
+# PATIENT_STORAGE=wal  → append changes to patient.json.wal, compact in the background
+#                        (assumes a single writing process)
+# PATIENT_STORAGE=sqlite → keep the patients in an SQLite database instead of memory
+#                          (see patient_sqlite.py, import patient.json with migrate_patients.py)
+# PATIENT_WAL_COMPACT_BYTES → log size that triggers a compaction (default 4 MiB)
+#
+# Writes go through a single writer thread with group commit (group_commit.py): concurrent
+# mutations are queued, applied in order, persisted with one backend write per batch, and
+# each request returns only after its batch is durable.
+# PATIENT_COMMIT_INTERVAL_MS → how long the writer waits for more writes before flushing (default 0)
+# PATIENT_COMMIT_MAX_BATCH   → maximum mutations per flush (default 1024)
+#
+# Every store (PatientStore here, SqlitePatientStore in patient_sqlite.py) offers the same methods:
+#     get, contains, all, records, scan_page, sort_page, query, stats, __len__ → reads
+#     create, update, delete, bulk_write, replace_all            → writes
+#     version, record_version                                    → ETags for conditional GETs
+#     commit_stats                                               → group commit statistics
+
+Record = Dict[str, Any]
+
+# A mutation runs on the writer thread against the live data and returns (result, operations to persist)
+Mutation = Callable[[Dict[str, Record]], Tuple[Any, List[Operation]]]
+
+# Bulk changes: ("create", ID, record) / ("update", ID, changed fields) / ("delete", ID, None)
+Change = Tuple[str, str, Optional[Record]]
+
+# Per-change results of bulk_write
+BULK_OK = {"create": "created", "update": "updated", "delete": "deleted"}
+BULK_FAILED = ("duplicate", "not_found")
+BULK_ROLLED_BACK = "rolled_back"
+
+# bmi / verdict are stored with each record and depend only on these fields
+BMI_INPUTS = ("height", "weight")
+
+# (version token, last modification as a UNIX timestamp or None if unknown)
+# The token changes whenever the data it covers changes; main.py turns it into an ETag.
+Version = Tuple[str, Optional[float]]
+
+STORAGE_MODE = os.getenv("PATIENT_STORAGE", "json")
+WAL_COMPACT_BYTES = int(os.getenv("PATIENT_WAL_COMPACT_BYTES", str(4 * 1024 * 1024)))
+COMMIT_INTERVAL_MS = float(os.getenv("PATIENT_COMMIT_INTERVAL_MS", "0"))
+COMMIT_MAX_BATCH = int(os.getenv("PATIENT_COMMIT_MAX_BATCH", "1024"))
+
+
+def merge_changes(current: Record, changes: Record) -> Record:
+    """
+    Copy of `current` with `changes` applied.
+    bmi and verdict are recomputed only when height or weight changed, so reads never compute them.
+    """
+    updated = {**current, **changes}
+    if any(field in changes for field in BMI_INPUTS):
+        height, weight = updated.get("height"), updated.get("weight")
+        if isinstance(height, (int, float)) and isinstance(weight, (int, float)) and height > 0:
+            updated["bmi"] = compute_bmi(weight, height)
+            updated["verdict"] = get_bmi_verdict(updated["bmi"])
+        else:
+            updated["bmi"] = updated["verdict"] = None
+    return updated
+
+
+class PatientStore:
+    """
+    Process-wide, in-memory view of the patient data.
+
+    - Reads (get / contains) are dictionary lookups, O(1) per patient.
+    - Writes are queued for one writer thread, which applies them in order and
+      persists each batch with a single backend write (atomic snapshot rewrite,
+      or an fsynced log append in WAL mode). The lock is held until the batch is
+      on disk, so readers never see changes that are not durable yet.
+    - Before every operation the backing files are checked with stat();
+      the data is re-read only if someone else changed them.
+    - Records are held as compact PatientRecords (patient_record.py) and
+      returned as plain dicts.
+
+    Records returned by the store may be shared: treat them as read-only.
+    """
+
+    def __init__(self, path: str, backend=None, commit_interval_ms: float = 0.0, max_batch: int = 1024):
+        self.path = path
+        self.backend = backend or make_backend(path, "json")
+        self._data: Dict[str, Record] = {}
+        self._signature: Optional[Tuple] = None
+        self._loaded = False
+        self._lock = threading.RLock()
+        self._compaction: Optional[threading.Thread] = None
+
+        # Sorted indexes for /sort (and insertion order for /view pages),
+        # built on first use and then kept up to date on every write
+        self._indexes: Dict[Optional[str], SortIndex] = {}
+        self._order: Optional[Dict[str, int]] = None  # patient ID → insertion sequence
+        self._next_seq = 0
+        self._table: Optional[ColumnarTable] = None  # columnar copy for /patients/query
+        self._stats: Optional[PatientStats] = None   # aggregates for /stats
+
+        # Versions for ETags: a counter bumped by every saved change, and the version of
+        # the last change of each record (records unchanged since loading use the load
+        # version). The epoch is random per load, so versions handed out before a reload,
+        # or by another process, never match the current ones.
+        self._epoch = ""
+        self._version = 0
+        self._modified = 0.0
+        self._loaded_version: Tuple[int, float] = (0, 0.0)
+        self._record_versions: Dict[str, Tuple[int, float]] = {}
+
+        self._writer = GroupCommitWriter(self._commit_batch, commit_interval_ms, max_batch)
+
+    # -------------------- Loading --------------------
+
+    def refresh(self):
+        """Reloads the data if the backing files changed since they were last read or written."""
+        with self._lock:
+            signature = self.backend.signature()
+            if self._loaded and signature == self._signature:
+                return
+            self._data = self.backend.load()
+            # Converted one by one, so the parsed dicts are freed as we go
+            for patient_id, record in self._data.items():
+                self._data[patient_id] = compact(record)
+            # load() may repair a torn log tail, so take the signature afterwards
+            self._signature = self.backend.signature()
+            self._loaded = True
+            self._reset_indexes()
+            self._reset_versions()
+
+    # -------------------- Sorted Indexes --------------------
+
+    def _reset_indexes(self):
+        self._indexes = {}
+        self._order = None
+        self._table = None
+        self._stats = None
+
+    def _insertion_order(self) -> Dict[str, int]:
+        if self._order is None:
+            self._order = {patient_id: seq for seq, patient_id in enumerate(self._data)}
+            self._next_seq = len(self._order)
+        return self._order
+
+    def _index(self, field: Optional[str]) -> SortIndex:
+        """The sorted index of a field (built once, O(N log N))."""
+        index = self._indexes.get(field)
+        if index is None:
+            index = self._indexes[field] = SortIndex(field)
+            index.build(self._data, self._insertion_order())
+        return index
+
+    def _columns(self) -> ColumnarTable:
+        """The columnar table (built once, O(N))."""
+        if self._table is None:
+            self._table = ColumnarTable.build(self._data, self._insertion_order())
+        return self._table
+
+    def _update_indexes(self, operations: List[Operation]):
+        """Applies saved changes to the built indexes (O(log N) search + list insert per index)."""
+        if self._stats is not None:
+            for op, patient_id, record in operations:
+                if op == "put":
+                    self._stats.put(patient_id, record)
+                else:
+                    self._stats.delete(patient_id)
+
+        if self._order is None:
+            return
+
+        for op, patient_id, record in operations:
+            if op == "put":
+                seq = self._order.get(patient_id)
+                if seq is None:
+                    # New patients go to the end of the insertion order, like dict keys
+                    seq = self._order[patient_id] = self._next_seq
+                    self._next_seq += 1
+                for index in self._indexes.values():
+                    index.add(patient_id, record, seq)
+                if self._table is not None:
+                    self._table.upsert(patient_id, record, seq)
+            else:
+                self._order.pop(patient_id, None)
+                for index in self._indexes.values():
+                    index.remove(patient_id)
+                if self._table is not None:
+                    self._table.remove(patient_id)
+
+    # -------------------- Versions --------------------
+
+    def _reset_versions(self):
+        self._epoch = secrets.token_hex(4)
+        self._version = 0
+        self._modified = time.time()
+        self._loaded_version = (self._version, self._modified)
+        self._record_versions = {}
+
+    def _bump_versions(self, operations: List[Operation]):
+        """One version per saved operation (store-wide and for the record it touched)."""
+        now = time.time()
+        for op, patient_id, _ in operations:
+            self._version += 1
+            if op == "put":
+                self._record_versions[patient_id] = (self._version, now)
+            else:
+                self._record_versions.pop(patient_id, None)
+        self._modified = now
+
+    def version(self) -> Version:
+        """Version of the whole dataset (changes with every create / edit / delete)."""
+        with self._lock:
+            self.refresh()
+            return f"{self._epoch}-{self._version}", self._modified
+
+    def record_version(self, patient_id: str) -> Optional[Version]:
+        """Version of one patient, or None if it does not exist."""
+        with self._lock:
+            self.refresh()
+            if patient_id not in self._data:
+                return None
+            version, modified = self._record_versions.get(patient_id, self._loaded_version)
+            return f"{self._epoch}-{version}", modified
+
+    # -------------------- Group Commit --------------------
+
+    def _submit(self, mutation: Mutation) -> Any:
+        """Queues a mutation for the writer thread and waits until it is durable."""
+        return self._writer.submit(mutation)
+
+    def _commit_batch(self, mutations: Sequence[Mutation]) -> List[Outcome]:
+        """
+        Applies a batch in submission order and persists it with one backend write.
+        If persisting fails, the in-memory data is reloaded from disk, so memory never
+        holds changes that were not saved (every request of the batch gets the error).
+        """
+        outcomes: List[Outcome] = []
+        operations: List[Operation] = []
+
+        with self._lock:
+            self.refresh()
+
+            for mutation in mutations:
+                try:
+                    result, mutation_operations = mutation(self._data)
+                    operations.extend(mutation_operations)
+                    outcomes.append((result, None))
+                except Exception as exc:
+                    outcomes.append((None, exc))
+
+            try:
+                if operations:
+                    self._persist(operations)
+            except Exception:
+                self._loaded = False  # force a reload from disk on next access
+                raise
+
+            self._update_indexes(operations)
+            self._bump_versions(operations)
+
+        return outcomes
+
+    def commit_stats(self) -> Dict[str, Any]:
+        return {"storage": self.backend.mode, **self._writer.stats()}
+
+    # -------------------- Persistence --------------------
+
+    def _persist(self, operations: List[Operation]):
+        """Hands the changes to the backend and schedules a compaction if the log got large."""
+        self.backend.write(self._data, operations)
+
+        # Remember our own write so it does not trigger a reload
+        self._signature = self.backend.signature()
+
+        if self.backend.needs_compaction():
+            self._start_compaction()
+
+    def _start_compaction(self):
+        if self._compaction is not None and self._compaction.is_alive():
+            return
+        self._compaction = threading.Thread(target=self.compact, name="patient-compaction", daemon=True)
+        self._compaction.start()
+
+    def compact(self):
+        """
+        Folds the write-ahead log into a fresh snapshot.
+        - The data is copied under the lock (references only) together with the log position.
+        - The snapshot is serialized to a temp file outside the lock, so requests keep being served.
+        - Renaming it into place, trimming the covered log entries and recording the new
+          signature happen together under the lock, so readers never see a half-compacted
+          state and the store does not mistake its own compaction for an external change
+          (that would reload everything and start a new ETag epoch).
+        """
+        if not hasattr(self.backend, "trim_log"):
+            return
+
+        with self._lock:
+            self.refresh()
+            data = dict(self._data)
+            covered = self.backend.log_position()
+
+        temp_path = self.backend.prepare_snapshot(data)
+
+        with self._lock:
+            self.backend.install_snapshot(temp_path)
+            self.backend.trim_log(covered)
+            self._signature = self.backend.signature()
+
+    # -------------------- Reads --------------------
+
+    def get(self, patient_id: str) -> Optional[Record]:
+        with self._lock:
+            self.refresh()
+            record = self._data.get(patient_id)
+            return to_dict(record) if record is not None else None
+
+    def contains(self, patient_id: str) -> bool:
+        with self._lock:
+            self.refresh()
+            return patient_id in self._data
+
+    def all(self) -> Dict[str, Record]:
+        """
+        The {ID: record} mapping as plain dicts.
+        Converting the records is cheap compared to re-reading the file, and the caller
+        can iterate the result while other requests keep writing.
+        """
+        with self._lock:
+            self.refresh()
+            return {patient_id: to_dict(record) for patient_id, record in self._data.items()}
+
+    def records(self) -> List[Record]:
+        """All patient records (without IDs)."""
+        with self._lock:
+            self.refresh()
+            return [to_dict(record) for record in self._data.values()]
+
+    def scan_page(self, limit: Optional[int] = None,
+                  after: Optional[After] = None) -> Tuple[List[Tuple[str, Record]], Optional[After]]:
+        """
+        (ID, record) pairs in insertion order, starting behind `after` (a position returned
+        by a previous call). Returns the page and the position to continue from (None at the end).
+        """
+        with self._lock:
+            self.refresh()
+            patient_ids, next_after = self._index(INSERTION_ORDER).page(False, 0, limit, after)
+            return [(patient_id, to_dict(self._data[patient_id])) for patient_id in patient_ids], next_after
+
+    def sort_page(self, field: str, descending: bool = False, limit: Optional[int] = None, offset: int = 0,
+                  after: Optional[After] = None) -> Tuple[List[Record], Optional[After]]:
+        """
+        Patient records ordered by one field, from the field's sorted index.
+        - limit / offset select a page; `after` continues behind the last patient of a previous page.
+        - Returns (records, position of the last record), the position is None on the last page.
+        - Patients without a numeric value for the field sort first (asc) / last (desc).
+        """
+        with self._lock:
+            self.refresh()
+            patient_ids, next_after = self._index(field).page(descending, offset, limit, after)
+            return [to_dict(self._data[patient_id]) for patient_id in patient_ids], next_after
+
+    def query(self, equals: Dict[str, Sequence[Any]], ranges: Dict[str, Range], fields: Optional[List[str]] = None,
+              limit: int = 100, after: Optional[int] = None) -> Tuple[List[Record], int, Optional[int]]:
+        """
+        Patients matching every filter, evaluated on the columnar table (patient_columns.py).
+        Returns (page of {"ID", selected fields}, total matches, position to continue from or None).
+        """
+        with self._lock:
+            self.refresh()
+            patient_ids, total, next_after = self._columns().query(equals, ranges, limit, after)
+            return [project(patient_id, self._data[patient_id], fields) for patient_id in patient_ids], total, next_after
+
+    def stats(self, recompute: bool = False) -> Dict[str, Any]:
+        """
+        Aggregates by city and gender (patient_stats.py).
+        Maintained on every write, so a read only walks the groups.
+        recompute=True computes them from scratch instead (for verification).
+        """
+        with self._lock:
+            self.refresh()
+            if recompute:
+                return PatientStats.build(self._data.items()).summary()
+            if self._stats is None:
+                self._stats = PatientStats.build(self._data.items())
+            return self._stats.summary()
+
+    def __len__(self) -> int:
+        with self._lock:
+            self.refresh()
+            return len(self._data)
+
+    # -------------------- Writes --------------------
+
+    def create(self, patient_id: str, record: Record) -> bool:
+        """Adds a patient. Returns False if the ID already exists."""
+        def mutation(data):
+            if patient_id in data:
+                return False, []
+            stored = data[patient_id] = compact(record)
+            return True, [("put", patient_id, stored)]
+
+        return self._submit(mutation)
+
+    def update(self, patient_id: str, changes: Record) -> Optional[Record]:
+        """Applies the changed fields. Returns the updated record, or None if not found."""
+        def mutation(data):
+            current = data.get(patient_id)
+            if current is None:
+                return None, []
+            # Copy-on-write: readers holding the old record never see a half-applied update
+            updated = merge_changes(current, changes)
+            stored = data[patient_id] = compact(updated)
+            return updated, [("put", patient_id, stored)]
+
+        return self._submit(mutation)
+
+    def delete(self, patient_id: str) -> bool:
+        """Removes a patient. Returns False if the ID does not exist."""
+        def mutation(data):
+            if patient_id not in data:
+                return False, []
+            del data[patient_id]
+            return True, [("del", patient_id, None)]
+
+        return self._submit(mutation)
+
+    def bulk_write(self, changes: List[Change], atomic: bool = False) -> List[str]:
+        """
+        Applies many creates / updates / deletes in order and saves them with one write.
+        Returns one status per change: created, updated, deleted, duplicate or not_found.
+        atomic=True: if any change fails, nothing is applied and the successful ones
+        are reported as rolled_back.
+        """
+        def mutation(data):
+            # Work on an overlay first, so an atomic batch can be dropped without undoing anything
+            pending: Dict[str, Optional[Record]] = {}
+            statuses: List[str] = []
+            operations: List[Operation] = []
+
+            for kind, patient_id, payload in changes:
+                current = pending[patient_id] if patient_id in pending else data.get(patient_id)
+
+                if kind == "create" and current is not None:
+                    statuses.append("duplicate")
+                    continue
+                if kind != "create" and current is None:
+                    statuses.append("not_found")
+                    continue
+
+                if kind == "delete":
+                    pending[patient_id] = None
+                    operations.append(("del", patient_id, None))
+                else:
+                    record = compact(payload if kind == "create" else merge_changes(current, payload))
+                    pending[patient_id] = record
+                    operations.append(("put", patient_id, record))
+                statuses.append(BULK_OK[kind])
+
+            if atomic and len(operations) < len(changes):
+                return [status if status in BULK_FAILED else BULK_ROLLED_BACK for status in statuses], []
+
+            for op, patient_id, record in operations:
+                if op == "put":
+                    data[patient_id] = record
+                else:
+                    del data[patient_id]
+            return statuses, operations
+
+        return self._submit(mutation)
+
+    def replace_all(self, data: Dict[str, Record]):
+        """Replaces the whole dataset (used by the legacy save_data helper)."""
+        with self._lock:
+            self.refresh()
+            self._data = {patient_id: compact(record) for patient_id, record in data.items()}
+            self._reset_indexes()
+            self._reset_versions()
+            self.backend.write_snapshot(self._data)
+            if hasattr(self.backend, "trim_log"):
+                # The new snapshot supersedes every logged change
+                self.backend.trim_log(self.backend.log_position())
+            self._signature = self.backend.signature()
+
+
+# -------------------- Shared Instances --------------------
+# One store per file per process, shared by main.py and patient.py.
+# Paths are resolved when the store is requested, like the old open("patient.json").
+
+_stores: Dict[str, Any] = {}
+_stores_lock = threading.Lock()
+
+
+def _create_store(path: str):
+    if STORAGE_MODE == "sqlite":
+        # Imported here so the JSON modes do not need sqlite3
+        from patient_sqlite import SqlitePatientStore, database_path_for
+        return SqlitePatientStore(
+            database_path_for(path), commit_interval_ms=COMMIT_INTERVAL_MS, max_batch=COMMIT_MAX_BATCH
+        )
+
+    options = {"compact_after_bytes": WAL_COMPACT_BYTES} if STORAGE_MODE == "wal" else {}
+    return PatientStore(
+        path,
+        make_backend(path, STORAGE_MODE, **options),
+        commit_interval_ms=COMMIT_INTERVAL_MS,
+        max_batch=COMMIT_MAX_BATCH,
+    )
+
+
+def get_store(path: str):
+    """The store for a patient file ('json' / 'wal'), or its SQLite database ('sqlite')."""
+    key = os.path.abspath(path)
+    store = _stores.get(key)
+    if store is None:
+        with _stores_lock:
+            store = _stores.get(key)
+            if store is None:
+                store = _stores[key] = _create_store(key)
+    return store
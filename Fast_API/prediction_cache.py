@@ -0,0 +1,126 @@
+# -------------------- Imports --------------------
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Sequence, Tuple
+
+
+# -------------------- Prediction Cache --------------------
+# The model only sees six engineered features and three of them are small categories,
+# so real traffic repeats the same feature tuples a lot. Caching the prediction per
+# tuple skips the encoder and the forest entirely on a hit.
+
+class PredictionCache:
+    """
+    Bounded LRU cache with optional TTL, keyed on the engineered feature tuple.
+
+    - max_size: maximum number of cached tuples (0 disables the cache)
+    - ttl_seconds: entries older than this are treated as misses (None = no expiry)
+    - round_digits: numeric features are rounded to this many digits in the key,
+      so nearly identical inputs share an entry (None = exact values)
+
+    invalidate() drops every entry and bumps the generation; predictions computed
+    against an older generation (i.e. an older model) are never stored.
+    """
+
+    def __init__(
+        self,
+        feature_names: Sequence[str],
+        max_size: int = 10000,
+        ttl_seconds: Optional[float] = None,
+        round_digits: Optional[int] = None,
+    ):
+        self.feature_names = list(feature_names)
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.round_digits = round_digits
+        self.generation = 0
+
+        self._entries: "OrderedDict[Hashable, Tuple[Any, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        # Counters exposed through stats()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_size > 0
+
+    def make_key(self, user) -> Tuple:
+        """Builds the cache key from the user's engineered features."""
+        values = []
+        for name in self.feature_names:
+            value = getattr(user, name)
+            if self.round_digits is not None and isinstance(value, float):
+                value = round(value, self.round_digits)
+            values.append(value)
+        return tuple(values)
+
+    def get(self, key: Hashable) -> Tuple[bool, Any]:
+        """Returns (found, value) and refreshes the entry's LRU position."""
+        with self._lock:
+            entry = self._entries.get(key)
+
+            if entry is None:
+                self.misses += 1
+                return False, None
+
+            value, stored_at = entry
+            if self.ttl_seconds is not None and time.monotonic() - stored_at > self.ttl_seconds:
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return False, None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return True, value
+
+    def put(self, key: Hashable, value: Any, generation: Optional[int] = None):
+        """
+        Stores a prediction.
+        If generation is given and the cache was invalidated since, the value is dropped.
+        """
+        if not self.enabled:
+            return
+
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                return
+
+            self._entries[key] = (value, time.monotonic())
+            self._entries.move_to_end(key)
+
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self):
+        """Drops all entries (called whenever the model is reloaded)."""
+        with self._lock:
+            self._entries.clear()
+            self.generation += 1
+            self.invalidations += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "enabled": self.enabled,
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "ttl_seconds": self.ttl_seconds,
+                "round_digits": self.round_digits,
+                "generation": self.generation,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+            }
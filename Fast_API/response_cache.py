@@ -0,0 +1,198 @@
+# -------------------- Imports --------------------
+
+import gzip
+import json
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+from fastapi import Request, Response
+
+from conditional import gzip_etag
+
+try:
+    import orjson
+except ImportError:  # optional: the standard json module is used without it
+    orjson = None
+
+
+# -------------------- Fast JSON Responses --------------------
+# Returning a dict from a route makes FastAPI walk it with jsonable_encoder and then
+# encode it with the json module, on every request. For /view and /sort that is most
+# of the request time. Routes in main.py instead return FastJSONResponse with bytes
+# encoded by orjson (when installed), and the encoded bytes of /view, each /sort and
+# each /patient/{id} are cached per data version (see conditional.py), so a write
+# invalidates them simply by bumping the version.
+#
+# RESPONSE_CACHE_MAX_BYTES → total size of the cached bodies (default 128 MiB, 0 disables the cache)
+# RESPONSE_GZIP_MIN_BYTES  → gzip bodies at least this large for clients that accept it
+#                            (default 64 KiB, 0 disables gzip)
+
+CACHE_MAX_BYTES = int(os.getenv("RESPONSE_CACHE_MAX_BYTES", str(128 * 1024 * 1024)))
+GZIP_MIN_BYTES = int(os.getenv("RESPONSE_GZIP_MIN_BYTES", str(64 * 1024)))
+GZIP_LEVEL = 5  # most of level 9's ratio at a fraction of its cost
+
+
+def dumps(content: Any) -> bytes:
+    """Compact UTF-8 JSON, the same document JSONResponse would send."""
+    if orjson is not None:
+        return orjson.dumps(content)
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode()
+
+
+class FastJSONResponse(Response):
+    """JSON response that skips jsonable_encoder: content must already be plain JSON types (or bytes)."""
+
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return content if isinstance(content, bytes) else dumps(content)
+
+
+class EncodedBody:
+    """An encoded response body, with its gzipped form computed on first use."""
+
+    def __init__(self, body: bytes):
+        self.body = body
+        self._gzipped: Optional[bytes] = None
+
+    @classmethod
+    def of(cls, content: Any) -> "EncodedBody":
+        return cls(dumps(content))
+
+    @property
+    def compressible(self) -> bool:
+        return GZIP_MIN_BYTES > 0 and len(self.body) >= GZIP_MIN_BYTES
+
+    def gzipped(self) -> bytes:
+        if self._gzipped is None:
+            self._gzipped = gzip.compress(self.body, compresslevel=GZIP_LEVEL)
+        return self._gzipped
+
+    @property
+    def size(self) -> int:
+        return len(self.body) + len(self._gzipped or b"")
+
+
+def accepts_gzip(request: Request) -> bool:
+    """
+    Whether Accept-Encoding allows gzip: "gzip" (or "x-gzip"), else "*", with a q-value
+    above 0. "gzip;q=0" refuses it.
+    """
+    qualities: Dict[str, float] = {}
+    for item in request.headers.get("accept-encoding", "").lower().split(","):
+        coding, _, params = item.partition(";")
+        quality = 1.0
+        for param in params.split(";"):
+            name, _, value = param.partition("=")
+            if name.strip() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if coding.strip():
+            qualities[coding.strip()] = quality
+
+    for coding in ("gzip", "x-gzip", "*"):
+        if coding in qualities:
+            return qualities[coding] > 0
+    return False
+
+
+def json_response(request: Request, body: EncodedBody, headers: Optional[Dict[str, str]] = None) -> Response:
+    """
+    Sends an encoded body, gzipped if it is large and the client accepts gzip.
+    The gzipped body carries its own ETag (conditional.gzip_etag).
+    """
+    headers = dict(headers or {})
+    if body.compressible:
+        headers["Vary"] = "Accept-Encoding"
+        if accepts_gzip(request):
+            headers["Content-Encoding"] = "gzip"
+            if "ETag" in headers:
+                headers["ETag"] = gzip_etag(headers["ETag"])
+            return FastJSONResponse(body.gzipped(), headers=headers)
+    return FastJSONResponse(body.body, headers=headers)
+
+
+# -------------------- Response Cache --------------------
+
+class ResponseCache:
+    """
+    Encoded bodies keyed by route, each tagged with the data version it was built from.
+
+    - get(key, version) only returns an entry built from that exact version, so after a
+      write (new version) the old body is never served again.
+    - Least recently used entries are evicted once the bodies exceed max_bytes.
+    """
+
+    def __init__(self, max_bytes: int = CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[Hashable, Tuple[str, EncodedBody]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+        # Counters exposed through stats()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0
+
+    def get(self, key: Hashable, version: str) -> Optional[EncodedBody]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] != version:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key: Hashable, version: str, body: EncodedBody):
+        if not self.enabled:
+            return
+        if body.compressible:
+            body.gzipped()  # compressed once here, so the entry's size never changes once cached
+        # Bodies larger than half the budget would evict everything else
+        if body.size > self.max_bytes // 2:
+            return
+
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= previous[1].size
+            self._entries[key] = (version, body)
+            self._bytes += body.size
+
+            while self._bytes > self.max_bytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self._bytes -= evicted.size
+                self.evictions += 1
+
+    def encode(self, key: Hashable, version: str, build) -> EncodedBody:
+        """The cached body for this version, or build() encoded and cached."""
+        body = self.get(key, version)
+        if body is None:
+            body = EncodedBody.of(build())
+            self.put(key, version, body)
+        return body
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "enabled": self.enabled,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "encoder": "orjson" if orjson is not None else "json",
+                "gzip_min_bytes": GZIP_MIN_BYTES,
+            }
@@ -0,0 +1,116 @@
+# -------------------- Imports --------------------
+
+import math
+from bisect import bisect_left, insort
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+
+# -------------------- Sorted Secondary Index --------------------
+# /sort used to run sorted() over every patient on every request. A SortIndex keeps the
+# patients ordered by one field and is updated on each create / edit / delete, so a page
+# of k patients costs O(log N + k).
+#
+# Keys are (value, seq, patient_id):
+# - seq is the patient's position in insertion order, so patients with equal values keep
+#   the order a stable sorted() would give them (in both directions, like sorted(reverse=True)).
+# - A missing or non-numeric value is stored as -inf: it sorts first ascending and last
+#   descending (the same place SQLite puts NULL).
+# - SortIndex(INSERTION_ORDER) has no field: every value is equal, so it simply lists the
+#   patients in insertion order (used to page through /view).
+
+Key = Tuple[float, int, str]
+# Position of the last patient of a page, used to continue after it: (value, seq)
+After = Tuple[float, int]
+
+MISSING = float("-inf")
+INSERTION_ORDER = None
+
+
+def sort_value(record: Dict[str, Any], field: Optional[str]) -> float:
+    if field is INSERTION_ORDER:
+        return MISSING
+    value = record.get(field)
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or value != value:  # value != value → NaN
+        return MISSING
+    return float(value)
+
+
+class SortIndex:
+    """
+    All patients ordered by one field.
+    Insert / remove are a binary search plus a list insert (a memmove, fast even at 1M patients).
+    """
+
+    def __init__(self, field: Optional[str]):
+        self.field = field
+        self.keys: List[Key] = []
+        self.key_of: Dict[str, Key] = {}
+
+    def build(self, data: Dict[str, Dict[str, Any]], order: Dict[str, int]):
+        self.key_of = {patient_id: (sort_value(record, self.field), order[patient_id], patient_id)
+                       for patient_id, record in data.items()}
+        self.keys = sorted(self.key_of.values())
+
+    def add(self, patient_id: str, record: Dict[str, Any], seq: int):
+        self.remove(patient_id)
+        key = (sort_value(record, self.field), seq, patient_id)
+        self.key_of[patient_id] = key
+        insort(self.keys, key)
+
+    def remove(self, patient_id: str):
+        key = self.key_of.pop(patient_id, None)
+        if key is not None:
+            del self.keys[bisect_left(self.keys, key)]
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    # -------------------- Pages --------------------
+
+    def page(self, descending: bool = False, offset: int = 0, limit: Optional[int] = None,
+             after: Optional[After] = None) -> Tuple[List[str], Optional[After]]:
+        """
+        Patient IDs of one page and the position to continue from (None on the last page).
+        `after` continues behind a previously returned position; `offset` skips further patients.
+        """
+        n = len(self.keys)
+        start = (self._position_after(after, descending) if after is not None else 0) + offset
+        count = n - start if limit is None else limit
+
+        chosen = list(self._iterate(start, count, descending))
+        has_more = start + len(chosen) < n
+        next_after = (chosen[-1][0], chosen[-1][1]) if chosen and has_more else None
+        return [key[2] for key in chosen], next_after
+
+    def _group(self, value: float) -> Tuple[int, int]:
+        """[lo, hi) range of the keys holding `value`."""
+        return bisect_left(self.keys, (value,)), bisect_left(self.keys, (value, math.inf))
+
+    def _position_after(self, after: After, descending: bool) -> int:
+        """Page position of the first patient behind `after` (which may have been deleted since)."""
+        value, seq = after
+        following = bisect_left(self.keys, (value, seq + 1))
+        if not descending:
+            return following
+
+        # Descending order = value groups from high to low, each group in ascending seq
+        lo, hi = self._group(value)
+        return (len(self.keys) - hi) + (following - lo)
+
+    def _iterate(self, start: int, count: int, descending: bool) -> Iterator[Key]:
+        keys = self.keys
+        n = len(keys)
+
+        if not descending:
+            yield from keys[start:start + count]
+            return
+
+        position = start
+        while count > 0 and position < n:
+            lo, hi = self._group(keys[n - 1 - position][0])
+            # This group occupies page positions n - hi .. n - lo - 1
+            first = lo + position - (n - hi)
+            for key in keys[first:min(hi, first + count)]:
+                yield key
+                count -= 1
+            position = n - lo
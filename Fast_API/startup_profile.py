@@ -0,0 +1,121 @@
+"""
+Records how long app.py takes to start: every import and load step, in order.
+
+GET /startup returns the report of the running server. To track cold-start
+regressions, run it from the Fast_API folder (fresh process, model loaded in the
+background like APP_WARMUP=background):
+    python startup_profile.py [--json report.json]
+"""
+
+# -------------------- Imports --------------------
+
+import argparse
+import importlib
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+
+
+# -------------------- Startup Profile --------------------
+
+class StartupProfile:
+    """
+    Timed steps since the profile was created (the first line of app.py).
+    - kind "import": importing a module (with everything it imports)
+    - kind "load":   any other startup work (model unpickling, warm-up, ...)
+    mark_ready() records when the model became usable.
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.steps: List[Dict[str, Any]] = []
+        self.ready_ms: Optional[float] = None
+        self.error: Optional[str] = None
+        self._lock = threading.Lock()
+
+    def elapsed_ms(self, since: Optional[float] = None) -> float:
+        return round((time.perf_counter() - (self.started if since is None else since)) * 1000, 2)
+
+    @contextmanager
+    def step(self, name: str, kind: str = "load") -> Iterator[None]:
+        start = time.perf_counter()
+        entry: Dict[str, Any] = {"name": name, "kind": kind, "start_ms": self.elapsed_ms()}
+        try:
+            yield
+        except BaseException as exc:
+            entry["error"] = repr(exc)
+            raise
+        finally:
+            entry["duration_ms"] = self.elapsed_ms(start)
+            with self._lock:
+                self.steps.append(entry)
+
+    def record(self, name: str, start_ms: float, duration_ms: float, kind: str = "load"):
+        """Adds a step that was timed elsewhere (e.g. inside ModelRegistry.load)."""
+        with self._lock:
+            self.steps.append({
+                "name": name, "kind": kind, "start_ms": round(start_ms, 2), "duration_ms": round(duration_ms, 2),
+            })
+
+    def import_module(self, name: str):
+        with self.step(name, "import"):
+            return importlib.import_module(name)
+
+    def mark_ready(self):
+        self.ready_ms = self.elapsed_ms()
+
+    def mark_failed(self, exc: BaseException):
+        self.error = repr(exc)
+
+    def report(self) -> Dict[str, Any]:
+        with self._lock:
+            steps = sorted(self.steps, key=lambda step: step["start_ms"])
+        return {
+            "uptime_ms": self.elapsed_ms(),
+            "ready_ms": self.ready_ms,
+            "error": self.error,
+            "import_ms": round(sum(step["duration_ms"] for step in steps if step["kind"] == "import"), 2),
+            "load_ms": round(sum(step["duration_ms"] for step in steps if step["kind"] == "load"), 2),
+            "steps": steps,
+        }
+
+    def summary(self) -> str:
+        """One line for the server log, e.g. 'ready in 1.92s (pandas 0.48s, sklearn.pipeline 0.96s, ...)'."""
+        parts = ", ".join(f"{step['name']} {step['duration_ms'] / 1000:.2f}s" for step in self.report()["steps"])
+        ready = f"ready in {self.ready_ms / 1000:.2f}s" if self.ready_ms is not None else "not ready"
+        return f"{ready} ({parts})"
+
+
+# -------------------- CLI --------------------
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--json", dest="json_path", default=None, help="Write the report to this file")
+    parser.add_argument("--timeout", type=float, default=120.0, help="Seconds to wait for the model")
+    args = parser.parse_args(argv)
+
+    os.environ["APP_WARMUP"] = "background"
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    import app
+
+    app.start_warmup()
+    app.model_ready.wait(args.timeout)
+    report = app.startup_profile.report()
+
+    print(f"{'step':<28} {'kind':<7} {'start ms':>10} {'ms':>10}")
+    for step in report["steps"]:
+        print(f"{step['name']:<28} {step['kind']:<7} {step['start_ms']:>10} {step['duration_ms']:>10}")
+    print(f"imports {report['import_ms']} ms, load steps {report['load_ms']} ms, "
+          f"model ready at {report['ready_ms']} ms" + (f", error: {report['error']}" if report["error"] else ""))
+
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump(report, f, indent=4)
+
+
+if __name__ == "__main__":
+    main()